@@ -172,6 +172,12 @@ CREATE TABLE tbl_promotions (
     end_date DATE,
     banner_image VARCHAR(512),
     status VARCHAR(20) DEFAULT 'active',
+    type VARCHAR(50) DEFAULT 'campaign', -- campaign | voucher
+    code VARCHAR(100),
+    discount_type VARCHAR(20), -- percentage | fixed
+    discount_value DECIMAL(10,2),
+    max_usage INT,
+    used_count INT DEFAULT 0,
 
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -212,9 +218,12 @@ CREATE TABLE tbl_customer_vouchers (
     id INT AUTO_INCREMENT PRIMARY KEY,
     tenant_id INT NOT NULL,
     customer_id INT NOT NULL,
-    voucher_id INT NOT NULL,
-    assigned_date DATETIME NOT NULL,
-    used_date DATETIME,
+    promotion_id INT, -- liên kết trực tiếp tới promotion
+    voucher_id INT, -- legacy
+    used_at DATETIME,
+    booking_request_id INT,
+    is_used TINYINT(1) DEFAULT 0,
+    assigned_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(20) DEFAULT 'assigned', -- assigned | used | expired
 
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
@@ -224,19 +233,26 @@ CREATE TABLE tbl_customer_vouchers (
     deleted TINYINT(1) DEFAULT 0,
     deleted_at DATETIME DEFAULT NULL,
     deleted_by VARCHAR(50) DEFAULT NULL,
-    INDEX idx_tenant_id (tenant_id)
+    -- 1 khi bản ghi chưa xóa, NULL khi đã xóa: mỗi customer chỉ có một claim còn hiệu lực cho mỗi promotion
+    live_claim INT GENERATED ALWAYS AS (CASE WHEN deleted = 0 THEN 1 END) VIRTUAL,
+    INDEX idx_tenant_id (tenant_id),
+    UNIQUE KEY uq_customer_vouchers_live_claim (customer_id, promotion_id, live_claim)
 );
 
 -- Bảng lưu thông tin khách đang lưu trú
 CREATE TABLE tbl_room_stays (
     id INT AUTO_INCREMENT PRIMARY KEY,
     tenant_id INT NOT NULL,
-    customer_id INT NOT NULL,
-    room_id INT NOT NULL,
-    check_in DATETIME NOT NULL,
-    check_out DATETIME,
-    status VARCHAR(20) DEFAULT 'staying', -- staying/checked_out
-    note TEXT,
+    booking_request_id INT,
+    room_id INT,
+    customer_id INT,
+    checkin_date DATETIME NOT NULL,
+    checkout_date DATETIME NOT NULL,
+    actual_checkin DATETIME,
+    actual_checkout DATETIME,
+    status VARCHAR(20) DEFAULT 'reserved',
+    total_amount DECIMAL(12,2),
+    payment_status VARCHAR(20) DEFAULT 'pending',
 
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -351,3 +367,87 @@ CREATE TABLE tbl_admin_users (
 
     INDEX idx_tenant_id (tenant_id)
 );
+
+-- Bảng thống kê tổng hợp theo tenant (rollup, cập nhật tăng dần khi dữ liệu thay đổi)
+-- Có thể dựng lại từ các bảng nguồn bằng scripts/reconcile_tenant_stats.py
+CREATE TABLE tbl_tenant_stats (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tenant_id INT NOT NULL UNIQUE,
+    total_rooms INT NOT NULL DEFAULT 0,
+    total_facilities INT NOT NULL DEFAULT 0,
+    total_services INT NOT NULL DEFAULT 0,
+    total_customers INT NOT NULL DEFAULT 0,
+    total_bookings INT NOT NULL DEFAULT 0,
+    pending_bookings INT NOT NULL DEFAULT 0,
+    confirmed_bookings INT NOT NULL DEFAULT 0,
+    cancelled_bookings INT NOT NULL DEFAULT 0,
+    total_vouchers INT NOT NULL DEFAULT 0,
+    active_vouchers INT NOT NULL DEFAULT 0,
+    total_promotions INT NOT NULL DEFAULT 0,
+    active_promotions INT NOT NULL DEFAULT 0,
+    rebuilt_at DATETIME DEFAULT NULL,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Striped usage counter (USAGE_COUNTER_STRIPES > 0): mỗi promotion/voucher chia thành nhiều slot,
+-- tổng các slot được gom về used_count bằng scripts/reconcile_usage_counters.py
+CREATE TABLE tbl_usage_counter_slots (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tenant_id INT NOT NULL,
+    counter_type VARCHAR(20) NOT NULL, -- promotion | voucher
+    counter_id INT NOT NULL,
+    slot INT NOT NULL,
+    quota INT, -- NULL = không giới hạn (max_usage NULL)
+    used INT NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_tenant_id (tenant_id),
+    UNIQUE KEY uq_usage_counter_slots_counter_slot (counter_type, counter_id, slot)
+);
+
+-- Chỉ mục metadata của file upload (ghi lúc upload, /upload/list truy vấn bảng này thay vì quét thư mục)
+CREATE TABLE tbl_uploaded_files (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    tenant_id INT, -- NULL = thư mục global (super admin)
+    folder VARCHAR(100) NOT NULL,
+    file_type VARCHAR(20) NOT NULL, -- image | video | document
+    filename VARCHAR(255) NOT NULL,
+    original_filename VARCHAR(255),
+    url VARCHAR(500) NOT NULL UNIQUE,
+    size INT NOT NULL DEFAULT 0,
+    sha256 VARCHAR(64),
+    width INT,
+    height INT,
+
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    created_by VARCHAR(50),
+    updated_by VARCHAR(50),
+    deleted TINYINT(1) DEFAULT 0,
+    deleted_at DATETIME DEFAULT NULL,
+    deleted_by VARCHAR(50) DEFAULT NULL,
+    INDEX idx_tenant_id (tenant_id),
+    INDEX idx_uploaded_files_tenant_deleted_folder_type (tenant_id, deleted, folder, file_type),
+    INDEX idx_uploaded_files_tenant_sha256 (tenant_id, sha256)
+);
+
+-- Composite indexes cho pattern truy vấn multi-tenant + soft delete
+-- (tenant_id = ? AND deleted = 0 [AND status = ? | ORDER BY/RANGE created_at])
+CREATE INDEX idx_booking_requests_customer_deleted_created ON tbl_booking_requests (customer_id, deleted, created_at);
+CREATE INDEX idx_booking_requests_tenant_deleted_created ON tbl_booking_requests (tenant_id, deleted, created_at);
+CREATE INDEX idx_booking_requests_tenant_deleted_status ON tbl_booking_requests (tenant_id, deleted, status);
+CREATE INDEX idx_customers_tenant_deleted_created ON tbl_customers (tenant_id, deleted, created_at);
+CREATE INDEX idx_facilities_tenant_deleted ON tbl_facilities (tenant_id, deleted);
+CREATE INDEX idx_games_tenant_deleted_status ON tbl_games (tenant_id, deleted, status);
+CREATE INDEX idx_promotions_tenant_deleted_status ON tbl_promotions (tenant_id, deleted, status);
+CREATE INDEX idx_rooms_tenant_deleted_type ON tbl_rooms (tenant_id, deleted, room_type);
+CREATE INDEX idx_services_tenant_deleted ON tbl_services (tenant_id, deleted);
+CREATE INDEX idx_vouchers_tenant_deleted_status ON tbl_vouchers (tenant_id, deleted, status);
+CREATE INDEX idx_customer_vouchers_tenant_deleted ON tbl_customer_vouchers (tenant_id, deleted);
+CREATE INDEX idx_room_stays_customer_deleted ON tbl_room_stays (customer_id, deleted);
+CREATE INDEX idx_room_stays_tenant_deleted_status ON tbl_room_stays (tenant_id, deleted, status);
+CREATE INDEX idx_service_bookings_tenant_deleted_status ON tbl_service_bookings (tenant_id, deleted, status);
+
+-- Overlap query tìm phòng trống: checkout > :start AND checkin < :end
+CREATE INDEX idx_booking_requests_tenant_deleted_checkout ON tbl_booking_requests (tenant_id, deleted, check_out_date, check_in_date);
+CREATE INDEX idx_room_stays_tenant_deleted_checkout ON tbl_room_stays (tenant_id, deleted, checkout_date, checkin_date);
@@ -2,12 +2,16 @@ from datetime import datetime, timedelta
 from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from jose import jwt
 from pydantic import BaseModel
 
 from app.core.config import settings
 from app.core.deps import get_db, get_current_admin_user
+from app.core.password_hashing import PasswordHasherBusy
+from app.db.session_async import get_async_db
 from app.crud.crud_admin_users import crud_admin_user
 from app.schemas.admin_users import AdminUserResponse, AdminUserCreate
 from app.models.models import TblTenants
@@ -50,17 +54,24 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 
 
 @router.post("/login", response_model=LoginResponse)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests
     Enhanced with tenant information
     """
-    user = crud_admin_user.authenticate(
-        db, username=form_data.username, password=form_data.password
-    )
+    try:
+        user = await crud_admin_user.authenticate_async(
+            db, username=form_data.username, password=form_data.password
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hệ thống đang bận, vui lòng thử lại sau",
+            headers={"Retry-After": "1"},
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,7 +88,8 @@ def login_for_access_token(
     # Get tenant information if user belongs to a tenant
     tenant_info = None
     if user.tenant_id:
-        tenant = db.query(TblTenants).filter(TblTenants.id == user.tenant_id).first()
+        result = await db.execute(select(TblTenants).where(TblTenants.id == user.tenant_id))
+        tenant = result.scalars().first()
         if tenant:
             tenant_info = {
                 "id": tenant.id,
@@ -92,7 +104,8 @@ def login_for_access_token(
             "sub": str(user.id),
             "tenant_id": user.tenant_id,
             "role": user.role,
-            "username": user.username
+            "username": user.username,
+            "ver": crud_admin_user.token_version(user)
         }, 
         expires_delta=access_token_expires
     )
@@ -187,7 +200,7 @@ def change_password(
         )
     
     # Cập nhật mật khẩu mới
-    crud_admin_user.update_password(db, user_id=current_user.id, new_password=new_password)
+    crud_admin_user.update_password(db, db_obj=user, new_password=new_password)
     
     return {"message": "Đổi mật khẩu thành công"}
     user = crud_admin_user.authenticate(
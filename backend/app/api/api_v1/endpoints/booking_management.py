@@ -5,7 +5,10 @@ from sqlalchemy import func, and_, or_
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 
+from app.core.availability import occupancy_calendar
 from app.core.deps import get_db, get_current_admin_user
+from app.crud.crud_booking_requests import booking_request
+from app.crud.crud_tenant_stats import tenant_stats
 from app.models.models import TblBookingRequests, TblAdminUsers, TblCustomers, TblRooms
 from app.schemas.booking_requests import BookingRequestUpdate
 
@@ -82,14 +85,15 @@ def get_booking_requests_advanced(
         # Get paginated results with order by creation date
         bookings = query.order_by(TblBookingRequests.created_at.desc()).offset(skip).limit(limit).all()
         
+        # Load customer/room/facility info cho cả trang (1 query mỗi loại)
+        relations = booking_request.load_relations(db, bookings)
+        
         # Enhance with additional info
         enhanced_bookings = []
         for booking in bookings:
-            # Get customer info
-            customer = db.query(TblCustomers).filter(TblCustomers.id == booking.customer_id).first()
-            
-            # Get room info
-            room = db.query(TblRooms).filter(TblRooms.id == booking.room_id).first()
+            customer = relations["customers"].get(booking.customer_id)
+            room = relations["rooms"].get(booking.room_id)
+            facility = relations["facilities"].get(booking.facility_id)
             
             booking_data = {
                 "id": booking.id,
@@ -111,7 +115,10 @@ def get_booking_requests_advanced(
                 "room": {
                     "name": room.room_name if room else "Unknown Room",
                     "type": room.room_type if room else "Standard"
-                }
+                },
+                "facility": {
+                    "name": facility.facility_name
+                } if facility else None
             }
             enhanced_bookings.append(booking_data)
         
@@ -160,8 +167,10 @@ def get_booking_detail(
             raise HTTPException(status_code=404, detail="Booking không tồn tại")
         
         # Get related information
-        customer = db.query(TblCustomers).filter(TblCustomers.id == booking.customer_id).first()
-        room = db.query(TblRooms).filter(TblRooms.id == booking.room_id).first()
+        relations = booking_request.load_relations(db, [booking])
+        customer = relations["customers"].get(booking.customer_id)
+        room = relations["rooms"].get(booking.room_id)
+        facility = relations["facilities"].get(booking.facility_id)
         
         # Calculate stay duration
         if booking.check_in_date and booking.check_out_date:
@@ -199,7 +208,11 @@ def get_booking_detail(
                 "price": float(room.price or 0) if room else 0,
                 "capacity_adults": room.capacity_adults if room else None,
                 "capacity_children": room.capacity_children if room else None
-            } if room else None
+            } if room else None,
+            "facility_info": {
+                "facility_name": facility.facility_name,
+                "type": facility.type
+            } if facility else None
         }
         
         return {
@@ -246,6 +259,7 @@ def update_booking_status(
         
         # Store old status for logging
         old_status = booking.status
+        stats_before = tenant_stats.snapshot(booking)
         
         # Update booking
         booking.status = status_update.status
@@ -253,9 +267,11 @@ def update_booking_status(
             booking.admin_notes = status_update.admin_notes
         booking.updated_at = datetime.now()
         booking.updated_by = current_user.username
+        tenant_stats.record(db, booking, before=stats_before)
         
         db.commit()
         db.refresh(booking)
+        occupancy_calendar.record(booking)
         
         # Add background task for notification - tạm thời comment out vì không có email field
         # if booking.customer_email:
@@ -439,13 +455,16 @@ def cancel_booking_with_reason(
         
         # Update booking
         old_status = booking.status
+        stats_before = tenant_stats.snapshot(booking)
         booking.status = "cancelled"
         booking.admin_notes = f"Hủy bởi {current_user.username}. Lý do: {cancellation_reason}"
         booking.updated_at = datetime.now()
         booking.updated_by = current_user.username
+        tenant_stats.record(db, booking, before=stats_before)
         
         db.commit()
         db.refresh(booking)
+        occupancy_calendar.record(booking)
         
         return {
             "success": True,
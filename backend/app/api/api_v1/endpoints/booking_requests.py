@@ -1,8 +1,9 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.core.deps import get_db, get_current_admin_user, verify_tenant_permission
+from app.core.pagination import PageParams, paginate
 from app.crud.crud_booking_requests import booking_request
 from app.schemas.booking_requests import BookingRequestCreate, BookingRequestRead, BookingRequestUpdate, BookingRequestCreateRequest, BookingRequestUpdateRequest
 from app.models.models import TblAdminUsers
@@ -15,14 +16,14 @@ class StatusUpdate(BaseModel):
 @router.get("/booking-requests", response_model=List[BookingRequestRead])
 def read_booking_requests(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
     """Get all booking requests for a tenant"""
     verify_tenant_permission(tenant_id, current_user)
-    return booking_request.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    return paginate(booking_request, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/booking-requests", response_model=BookingRequestRead)
 def create_booking_request(
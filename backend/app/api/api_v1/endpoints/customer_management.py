@@ -6,6 +6,7 @@ from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.core.deps import get_db, get_current_admin_user
+from app.crud.crud_customers import customer as crud_customer
 from app.models.models import TblCustomers, TblAdminUsers, TblBookingRequests, TblCustomerVouchers, TblVouchers, TblPromotions
 from app.schemas.customers import CustomerUpdate
 
@@ -22,119 +23,55 @@ def get_customers_advanced(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     search_query: Optional[str] = Query(None),
-    loyalty_level: Optional[str] = Query(None),
-    sort_by: str = Query("created_at", regex="^(created_at|total_bookings|loyalty_points|last_booking)$"),
+    sort_by: str = Query("created_at", regex="^(created_at|total_bookings|last_booking|vouchers_count|total_spent)$"),
     sort_order: str = Query("desc", regex="^(asc|desc)$"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Lấy danh sách customers với tính năng tìm kiếm và sắp xếp nâng cao
+    (thống kê mỗi customer được tính bằng subquery gộp cho cả trang)
     """
     try:
-        # Base query with tenant filtering
-        query = db.query(TblCustomers).filter(
-            and_(
-                TblCustomers.tenant_id == current_user.tenant_id,
-                TblCustomers.deleted == 0
-            )
+        rows, total_count = crud_customer.get_multi_with_stats(
+            db,
+            tenant_id=current_user.tenant_id,
+            search_query=search_query,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            skip=skip,
+            limit=limit
         )
         
-        # Apply search filter
-        if search_query:
-            search_filter = or_(
-                TblCustomers.full_name.ilike(f"%{search_query}%"),
-                TblCustomers.email.ilike(f"%{search_query}%"),
-                TblCustomers.phone.ilike(f"%{search_query}%")
-            )
-            query = query.filter(search_filter)
-        
-        # Apply loyalty level filter
-        if loyalty_level:
-            query = query.filter(TblCustomers.loyalty_level == loyalty_level)
-        
-        # Apply sorting
-        if sort_by == "created_at":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.created_at.desc())
-            else:
-                query = query.order_by(TblCustomers.created_at.asc())
-        elif sort_by == "total_bookings":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.total_bookings.desc())
-            else:
-                query = query.order_by(TblCustomers.total_bookings.asc())
-        elif sort_by == "loyalty_points":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.loyalty_points.desc())
-            else:
-                query = query.order_by(TblCustomers.loyalty_points.asc())
-        elif sort_by == "last_booking":
-            if sort_order == "desc":
-                query = query.order_by(TblCustomers.last_booking_date.desc().nulls_last())
-            else:
-                query = query.order_by(TblCustomers.last_booking_date.asc().nulls_first())
-        
-        # Get total count
-        total_count = query.count()
-        
-        # Get paginated results
-        customers = query.offset(skip).limit(limit).all()
+        # Booking gần nhất của các customers trong trang (1 query)
+        recent_bookings = crud_customer.get_latest_bookings(
+            db,
+            tenant_id=current_user.tenant_id,
+            customer_ids=[row[0].id for row in rows]
+        )
         
-        # Enhance with additional statistics
         enhanced_customers = []
-        for customer in customers:
-            # Get recent booking info
-            recent_booking = db.query(TblBookingRequests).filter(
-                and_(
-                    TblBookingRequests.customer_id == customer.id,
-                    TblBookingRequests.tenant_id == current_user.tenant_id,
-                    TblBookingRequests.deleted == 0
-                )
-            ).order_by(TblBookingRequests.created_at.desc()).first()
-            
-            # Get vouchers count
-            vouchers_count = db.query(func.count(TblCustomerVouchers.id)).filter(
-                and_(
-                    TblCustomerVouchers.customer_id == customer.id,
-                    TblCustomerVouchers.deleted == 0
-                )
-            ).scalar() or 0
-            
-            # Calculate customer value metrics
-            total_spent = db.query(func.sum(TblBookingRequests.total_amount)).filter(
-                and_(
-                    TblBookingRequests.customer_id == customer.id,
-                    TblBookingRequests.tenant_id == current_user.tenant_id,
-                    TblBookingRequests.status.in_(["confirmed", "completed"]),
-                    TblBookingRequests.deleted == 0
-                )
-            ).scalar() or 0
+        for customer_obj, total_bookings, last_booking, vouchers_count, total_spent in rows:
+            recent_booking = recent_bookings.get(customer_obj.id)
             
             customer_data = {
-                "id": customer.id,
-                "full_name": customer.full_name,
-                "email": customer.email,
-                "phone": customer.phone,
-                "date_of_birth": customer.date_of_birth.isoformat() if customer.date_of_birth else None,
-                "gender": customer.gender,
-                "address": customer.address,
-                "city": customer.city,
-                "country": customer.country,
-                "loyalty_level": customer.loyalty_level,
-                "loyalty_points": customer.loyalty_points,
-                "total_bookings": customer.total_bookings,
-                "last_booking_date": customer.last_booking_date.isoformat() if customer.last_booking_date else None,
-                "created_at": customer.created_at.isoformat(),
-                "updated_at": customer.updated_at.isoformat() if customer.updated_at else None,
+                "id": customer_obj.id,
+                "full_name": customer_obj.name,
+                "email": customer_obj.email,
+                "phone": customer_obj.phone,
+                "zalo_user_id": customer_obj.zalo_user_id,
+                "total_bookings": total_bookings,
+                "last_booking_date": last_booking.isoformat() if last_booking else None,
+                "created_at": customer_obj.created_at.isoformat(),
+                "updated_at": customer_obj.updated_at.isoformat() if customer_obj.updated_at else None,
                 "statistics": {
-                    "total_spent": float(total_spent),
+                    "total_spent": float(total_spent or 0),
                     "vouchers_count": vouchers_count,
-                    "avg_booking_value": float(total_spent) / max(customer.total_bookings, 1),
+                    "avg_booking_value": float(total_spent or 0) / max(total_bookings, 1),
                     "recent_booking": {
                         "id": recent_booking.id,
-                        "check_in_date": recent_booking.check_in_date.isoformat() if recent_booking and recent_booking.check_in_date else None,
-                        "status": recent_booking.status if recent_booking else None
+                        "check_in_date": recent_booking.check_in_date.isoformat() if recent_booking.check_in_date else None,
+                        "status": recent_booking.status
                     } if recent_booking else None
                 }
             }
@@ -152,7 +89,6 @@ def get_customers_advanced(
                 },
                 "filters_applied": {
                     "search_query": search_query,
-                    "loyalty_level": loyalty_level,
                     "sort_by": sort_by,
                     "sort_order": sort_order
                 }
@@ -1,21 +1,25 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.deps import get_db
+from app.db.session_async import get_async_db
+from app.core.pagination import PageParams, paginate_async
 from app.crud.crud_customer_vouchers import customer_voucher
 from app.schemas.customer_vouchers import CustomerVoucherCreate, CustomerVoucherRead, CustomerVoucherUpdate
 
 router = APIRouter()
 
 @router.get("/customer-vouchers", response_model=List[CustomerVoucherRead])
-def read_customer_vouchers(
+async def read_customer_vouchers(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all customer vouchers for a tenant"""
-    return customer_voucher.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    return await paginate_async(customer_voucher, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/customer-vouchers", response_model=CustomerVoucherRead)
 def create_customer_voucher(
@@ -25,17 +29,22 @@ def create_customer_voucher(
     db: Session = Depends(get_db)
 ):
     """Create new customer voucher"""
-    return customer_voucher.create(db=db, obj_in=obj_in, tenant_id=tenant_id)
+    try:
+        return customer_voucher.create(db=db, obj_in=obj_in, tenant_id=tenant_id)
+    except IntegrityError:
+        # uq_customer_vouchers_live_claim: customer đã có claim còn hiệu lực cho promotion này
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Bạn đã lưu ưu đãi này rồi")
 
 @router.get("/customer-vouchers/{item_id}", response_model=CustomerVoucherRead)
-def read_customer_voucher(
+async def read_customer_voucher(
     *,
     item_id: int,
     tenant_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get customer voucher by ID"""
-    obj = customer_voucher.get(db=db, id=item_id, tenant_id=tenant_id)
+    obj = await customer_voucher.get_async(db, id=item_id, tenant_id=tenant_id)
     if not obj:
         raise HTTPException(status_code=404, detail="customer_voucher not found")
     return obj
@@ -52,7 +61,11 @@ def update_customer_voucher(
     obj = customer_voucher.get(db=db, id=item_id, tenant_id=tenant_id)
     if not obj:
         raise HTTPException(status_code=404, detail="customer_voucher not found")
-    return customer_voucher.update(db=db, db_obj=obj, obj_in=obj_in)
+    try:
+        return customer_voucher.update(db=db, db_obj=obj, obj_in=obj_in)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Bạn đã lưu ưu đãi này rồi")
 
 @router.delete("/customer-vouchers/{item_id}")
 def delete_customer_voucher(
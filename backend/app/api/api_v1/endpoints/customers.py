@@ -1,8 +1,15 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_admin_user, verify_tenant_permission
+from app.core.pagination import PageParams, paginate
+from app.db.session_async import get_async_db
 from app.crud.crud_customers import customer
+from app.crud.crud_customer_vouchers import CLAIM_ALREADY_CLAIMED, CLAIM_LIMIT_REACHED, customer_voucher
+from app.crud.crud_promotions import promotion as crud_promotion
+from app.crud.crud_usage_counters import COUNTER_PROMOTION, usage_counters
 from app.schemas.customers import CustomerCreate, CustomerRead, CustomerUpdate, CustomerCreateRequest, CustomerUpdateRequest
 from app.models.models import TblAdminUsers, TblCustomerVouchers, TblVouchers, TblPromotions
 from pydantic import BaseModel
@@ -36,14 +43,14 @@ class MyVoucherRead(BaseModel):
 @router.get("/customers", response_model=List[CustomerRead])
 def read_customers(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
     """Get all customers for a tenant"""
     verify_tenant_permission(tenant_id, current_user)
-    return customer.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    return paginate(customer, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/customers", response_model=CustomerRead)
 def create_customer(
@@ -107,36 +114,37 @@ def delete_customer(
 
 
 @router.get("/customers/{item_id}/vouchers", response_model=List[MyVoucherRead])
-def get_customer_vouchers(
+async def get_customer_vouchers(
     *,
     item_id: int,
     tenant_id: int,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy danh sách voucher của customer (My Promotions trên Mini App).
     Không yêu cầu auth — customer tự lấy voucher của mình qua zalo_user_id.
     """
     # Kiểm tra customer tồn tại
-    cust = customer.get(db=db, id=item_id, tenant_id=tenant_id)
+    cust = await customer.get_async(db, id=item_id, tenant_id=tenant_id)
     if not cust:
         raise HTTPException(status_code=404, detail="Customer not found")
 
     # Join customer_vouchers → promotions trực tiếp
-    rows = (
-        db.query(TblCustomerVouchers, TblPromotions)
+    result = await db.execute(
+        select(TblCustomerVouchers, TblPromotions)
         .outerjoin(TblPromotions, TblCustomerVouchers.promotion_id == TblPromotions.id)
-        .filter(
+        .where(
             TblCustomerVouchers.customer_id == item_id,
             TblCustomerVouchers.tenant_id == tenant_id,
             TblCustomerVouchers.deleted == 0
         )
+        .order_by(TblCustomerVouchers.id)
         .offset(skip)
         .limit(limit)
-        .all()
     )
+    rows = result.all()
 
     result = []
     for cv, p in rows:
@@ -180,12 +188,12 @@ def claim_promotion(
     if not cust:
         raise HTTPException(status_code=404, detail="Customer not found")
 
-    # Kiểm tra promotion tồn tại và khóa bản ghi để tránh over-claim khi nhiều request đồng thời
+    # Kiểm tra promotion tồn tại (đọc thường, không khóa: lượt nhận được trừ nguyên tử khi claim)
     p = db.query(TblPromotions).filter(
         TblPromotions.id == promotion_id,
         TblPromotions.tenant_id == tenant_id,
         TblPromotions.deleted == 0
-    ).with_for_update().first()
+    ).first()
     if not p:
         raise HTTPException(status_code=404, detail="Promotion not found")
     if p.status != 'active':
@@ -194,36 +202,25 @@ def claim_promotion(
         raise HTTPException(status_code=400, detail="Ưu đãi chưa đến thời gian áp dụng")
     if p.end_date and today > p.end_date:
         raise HTTPException(status_code=400, detail="Ưu đãi đã hết hạn")
-    if p.max_usage is not None and (p.used_count or 0) >= p.max_usage:
+    if p.max_usage is not None and usage_counters.used_count(db, COUNTER_PROMOTION, p) >= p.max_usage:
         raise HTTPException(status_code=400, detail="Ưu đãi đã đạt giới hạn lượt nhận")
+    max_usage = p.max_usage
 
-    # Kiểm tra đã claim chưa
-    existing = db.query(TblCustomerVouchers).filter(
-        TblCustomerVouchers.customer_id == item_id,
-        TblCustomerVouchers.promotion_id == promotion_id,
-        TblCustomerVouchers.deleted == 0
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Bạn đã lưu ưu đãi này rồi")
-
-    # Tạo record + tăng used_count
-    cv = TblCustomerVouchers(
-        tenant_id=tenant_id,
-        customer_id=item_id,
-        promotion_id=promotion_id,
-        status='assigned',
-        is_used=False,
+    # Tạo record + tăng used_count có điều kiện; unique constraint chặn claim trùng
+    result, cv, used_count = customer_voucher.claim_promotion(
+        db, tenant_id=tenant_id, customer_id=item_id, promotion_id=promotion_id
     )
-    db.add(cv)
-
-    p.used_count = (p.used_count or 0) + 1
-    db.add(p)
+    if result == CLAIM_LIMIT_REACHED:
+        raise HTTPException(status_code=400, detail="Ưu đãi đã đạt giới hạn lượt nhận")
+    if result == CLAIM_ALREADY_CLAIMED:
+        raise HTTPException(status_code=400, detail="Bạn đã lưu ưu đãi này rồi")
 
-    db.commit()
-    db.refresh(cv)
+    if not usage_counters.enabled:
+        crud_promotion.invalidate_cache(tenant_id)  # used_count thay đổi
+    # Striped counter: used_count trên row được gom định kỳ, lúc đó mới invalidate cache
     return {
         "message": "Lưu ưu đãi thành công",
         "customer_voucher_id": cv.id,
-        "promotion_used_count": p.used_count,
-        "promotion_max_usage": p.max_usage,
+        "promotion_used_count": used_count,
+        "promotion_max_usage": max_usage,
     }
@@ -1,14 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
-from typing import Dict, Any, Optional, List
+from sqlalchemy import func, and_, desc
+from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 from app.core.deps import get_db, get_current_admin_user
-from app.models.models import (
-    TblTenants, TblRooms, TblFacilities, TblBookingRequests,
-    TblCustomers, TblServices, TblAdminUsers, TblTestItems, 
-    TblRoomStays, TblVouchers, TblPromotions
-)
+from app.crud.crud_booking_requests import booking_request
+from app.crud.crud_dashboard import dashboard
+from app.crud.crud_tenant_stats import tenant_stats
+from app.models.models import TblTenants, TblBookingRequests, TblCustomers, TblAdminUsers
 
 router = APIRouter()
 
@@ -35,95 +34,41 @@ def get_hotel_comprehensive_dashboard(
         # Thiết lập khoảng thời gian
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
+        previous_start = start_date - timedelta(days=days)
         
-        room_filter = [TblRooms.deleted == 0]
-        if tenant_id:
-            room_filter.append(TblRooms.tenant_id == tenant_id)
-            
-        total_rooms = db.query(func.count(TblRooms.id)).filter(and_(*room_filter)).scalar() or 0
-        
-        # Thống kê theo loại phòng
-        room_types = db.query(
-            TblRooms.room_type,
-            func.count(TblRooms.id).label('count')
-        ).filter(and_(*room_filter)).group_by(TblRooms.room_type).all()
+        # Thống kê theo loại phòng (tổng số phòng = tổng các nhóm)
+        room_types = dashboard.get_room_type_counts(db, tenant_id=tenant_id)
+        total_rooms = sum(rt["count"] for rt in room_types)
         
         # === BOOKING STATS ===
-        booking_filter = [TblBookingRequests.deleted == 0]
-        if tenant_id:
-            booking_filter.append(TblBookingRequests.tenant_id == tenant_id)
-        
-        # Filter theo thời gian cho các số liệu hiện tại
-        current_period_filter = booking_filter + [
-            TblBookingRequests.created_at >= start_date,
-            TblBookingRequests.created_at <= end_date
-        ]
-            
-        # Thống kê booking tổng quan (trong khoảng thời gian)
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(and_(*current_period_filter)).scalar() or 0
-        
-        pending_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.status == 'pending', *current_period_filter)
-        ).scalar() or 0
-        
-        confirmed_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.status == 'confirmed', *current_period_filter)
-        ).scalar() or 0
-        
-        cancelled_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.status == 'cancelled', *current_period_filter)
-        ).scalar() or 0
-        
-        # Booking trong 30 ngày qua
-        date_filter = datetime.now() - timedelta(days=days)
-        recent_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.created_at >= date_filter, *booking_filter)
-        ).scalar() or 0
-        
-        # Booking theo từng ngày trong 7 ngày qua (cho chart)
-        daily_bookings = []
-        for i in range(7):
-            day_start = datetime.now() - timedelta(days=i)
-            day_end = day_start + timedelta(days=1)
-            count = db.query(func.count(TblBookingRequests.id)).filter(
-                and_(
-                    TblBookingRequests.created_at >= day_start,
-                    TblBookingRequests.created_at < day_end,
-                    *booking_filter
-                )
-            ).scalar() or 0
-            daily_bookings.append({
-                "date": day_start.strftime("%m/%d"),
-                "bookings": count
-            })
-        daily_bookings.reverse()  # Sắp xếp từ cũ đến mới
+        # Toàn bộ số liệu booking trong period hiện tại + period trước trong một câu lệnh
+        booking_summary = dashboard.get_booking_summary(
+            db,
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            previous_start=previous_start
+        )
+        total_bookings = booking_summary["total"]
+        pending_bookings = booking_summary["pending"]
+        confirmed_bookings = booking_summary["confirmed"]
+        cancelled_bookings = booking_summary["cancelled"]
+        recent_bookings = booking_summary["recent"]
+        
+        # Booking theo từng ngày trong 7 ngày qua (cho chart) - GROUP BY DATE(created_at)
+        daily_bookings = dashboard.get_daily_bookings(db, tenant_id=tenant_id, days=7)
         
         # === CUSTOMER STATS ===
-        customer_filter = [TblCustomers.deleted == 0]
-        if tenant_id:
-            customer_filter.append(TblCustomers.tenant_id == tenant_id)
-            
-        total_customers = db.query(func.count(TblCustomers.id)).filter(and_(*customer_filter)).scalar() or 0
-        
-        # Khách hàng mới trong period hiện tại
-        new_customers_current = db.query(func.count(TblCustomers.id)).filter(
-            and_(
-                TblCustomers.created_at >= start_date,
-                TblCustomers.created_at <= end_date,
-                *customer_filter
-            )
-        ).scalar() or 0
-        
-        # Khách hàng trong period trước đó (để tính growth)
-        previous_start = start_date - timedelta(days=days)
-        previous_end = start_date
-        previous_customers = db.query(func.count(TblCustomers.id)).filter(
-            and_(
-                TblCustomers.created_at >= previous_start,
-                TblCustomers.created_at < previous_end,
-                *customer_filter
-            )
-        ).scalar() or 0
+        customer_summary = dashboard.get_customer_summary(
+            db,
+            tenant_id=tenant_id,
+            start_date=start_date,
+            end_date=end_date,
+            previous_start=previous_start
+        )
+        total_customers = customer_summary["total"]
+        new_customers_current = customer_summary["new_current"]
+        previous_customers = customer_summary["new_previous"]
         
         # Tính customer growth rate
         if previous_customers > 0:
@@ -131,46 +76,16 @@ def get_hotel_comprehensive_dashboard(
         else:
             customer_growth_rate = 100.0 if new_customers_current > 0 else 0.0
         
-        # === FACILITIES STATS ===
-        facility_filter = [TblFacilities.deleted == 0]
-        if tenant_id:
-            facility_filter.append(TblFacilities.tenant_id == tenant_id)
-            
-        total_facilities = db.query(func.count(TblFacilities.id)).filter(and_(*facility_filter)).scalar() or 0
+        # === FACILITIES & PROMOTIONS STATS ===
+        catalog_summary = dashboard.get_catalog_summary(db, tenant_id=tenant_id)
+        total_facilities = catalog_summary["facilities"]
         active_facilities = total_facilities  # All non-deleted facilities are considered active
-        
-        # === PROMOTIONS STATS ===
-        promotion_filter = [TblPromotions.deleted == 0]
-        if tenant_id:
-            promotion_filter.append(TblPromotions.tenant_id == tenant_id)
-            
-        total_promotions = db.query(func.count(TblPromotions.id)).filter(and_(*promotion_filter)).scalar() or 0
-        active_promotions = db.query(func.count(TblPromotions.id)).filter(
-            and_(TblPromotions.status == 'active', *promotion_filter)
-        ).scalar() or 0
+        total_promotions = catalog_summary["promotions"]
+        active_promotions = catalog_summary["active_promotions"]
         
         # === RECENT ACTIVITIES ===
         # 5 booking gần nhất
-        recent_bookings_query = db.query(TblBookingRequests).filter(and_(*booking_filter)).order_by(
-            desc(TblBookingRequests.created_at)
-        ).limit(5)
-        
-        recent_bookings_list = []
-        for booking in recent_bookings_query.all():
-            customer = db.query(TblCustomers).filter(TblCustomers.id == booking.customer_id).first()
-            room = db.query(TblRooms).filter(TblRooms.id == booking.room_id).first()
-            
-            recent_bookings_list.append({
-                "id": booking.id,
-                "customer_name": customer.name if customer else "Unknown",
-                "customer_phone": customer.phone if customer else "",
-                "room_name": room.room_name if room else "Unknown Room", 
-                "room_type": room.room_type if room else "",
-                "check_in_date": booking.check_in_date.isoformat() if booking.check_in_date else None,
-                "check_out_date": booking.check_out_date.isoformat() if booking.check_out_date else None,
-                "status": booking.status,
-                "created_at": booking.created_at.isoformat() if booking.created_at else None
-            })
+        recent_bookings_list = dashboard.get_recent_bookings(db, tenant_id=tenant_id, limit=5)
         
         # === PERFORMANCE METRICS ===
         # 1. Tỷ lệ lấp đầy (Occupancy Rate) - dựa trên số booking confirmed vs total rooms
@@ -179,20 +94,8 @@ def get_hotel_comprehensive_dashboard(
         # 2. Tỷ lệ conversion (confirmed / total bookings)
         conversion_rate = (confirmed_bookings / max(total_bookings, 1)) * 100 if total_bookings > 0 else 0
         
-        # 3. Revenue Growth - so sánh với tháng trước
-        # Lấy data tháng trước (30 ngày trước đó)
-        previous_month_start = end_date - timedelta(days=days*2)
-        previous_month_end = end_date - timedelta(days=days)
-        
-        previous_month_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.deleted == 0,
-                TblBookingRequests.status == 'confirmed',
-                TblBookingRequests.tenant_id == tenant_id if tenant_id else True,
-                TblBookingRequests.created_at >= previous_month_start,
-                TblBookingRequests.created_at < previous_month_end
-            )
-        ).scalar() or 0
+        # 3. Revenue Growth - so sánh với period trước
+        previous_month_bookings = booking_summary["previous_confirmed"]
         
         # Tính revenue hiện tại và tháng trước (giả sử mỗi booking = 1.5M VND)
         current_revenue = confirmed_bookings * 1500000
@@ -246,7 +149,7 @@ def get_hotel_comprehensive_dashboard(
                 },
                 "charts": {
                     "daily_bookings": daily_bookings,
-                    "room_types": [{"type": rt.room_type, "count": rt.count} for rt in room_types]
+                    "room_types": room_types
                 },
                 "recent_activities": {
                     "bookings": recent_bookings_list
@@ -283,37 +186,13 @@ def get_hotel_dashboard_stats(
                 raise HTTPException(status_code=400, detail="Hotel admin phải thuộc về một tenant")
             tenant_id = current_user.tenant_id
         
-        # Filter base query
-        base_filter = [TblRooms.deleted == 0]
-        if tenant_id:
-            base_filter.append(TblRooms.tenant_id == tenant_id)
-        
-        # Thống kê phòng
-        total_rooms = db.query(func.count(TblRooms.id)).filter(and_(*base_filter)).scalar() or 0
-        
-        # Thống kê facilities
-        facility_filter = [TblFacilities.deleted == 0]
-        if tenant_id:
-            facility_filter.append(TblFacilities.tenant_id == tenant_id)
-        total_facilities = db.query(func.count(TblFacilities.id)).filter(and_(*facility_filter)).scalar() or 0
-        
-        # Thống kê booking requests
-        booking_filter = [TblBookingRequests.deleted == 0]
-        if tenant_id:
-            booking_filter.append(TblBookingRequests.tenant_id == tenant_id)
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(and_(*booking_filter)).scalar() or 0
-        
-        # Thống kê customers
-        customer_filter = [TblCustomers.deleted == 0]
-        if tenant_id:
-            customer_filter.append(TblCustomers.tenant_id == tenant_id)
-        total_customers = db.query(func.count(TblCustomers.id)).filter(and_(*customer_filter)).scalar() or 0
-        
-        # Thống kê promotions đang active
-        promotion_filter = [TblPromotions.deleted == 0, TblPromotions.status == 'active']
-        if tenant_id:
-            promotion_filter.append(TblPromotions.tenant_id == tenant_id)
-        active_promotions = db.query(func.count(TblPromotions.id)).filter(and_(*promotion_filter)).scalar() or 0
+        # Đọc từ bảng thống kê tổng hợp (tenant hoặc toàn hệ thống)
+        stats = tenant_stats.get_for(db, tenant_id=tenant_id)
+        total_rooms = stats["total_rooms"]
+        total_facilities = stats["total_facilities"]
+        total_bookings = stats["total_bookings"]
+        total_customers = stats["total_customers"]
+        active_promotions = stats["active_promotions"]
         
         # Tính doanh thu tháng (giả lập - có thể tích hợp từ booking system thực tế)
         # Hiện tại return mock data
@@ -356,20 +235,13 @@ def get_super_admin_dashboard_stats(
             and_(TblTenants.status == 'active', TblTenants.deleted == 0)
         ).scalar() or 0
         
-        # Thống kê tổng phòng trong hệ thống
-        total_rooms = db.query(func.count(TblRooms.id)).filter(TblRooms.deleted == 0).scalar() or 0
-        
-        # Thống kê tổng facilities
-        total_facilities = db.query(func.count(TblFacilities.id)).filter(TblFacilities.deleted == 0).scalar() or 0
-        
-        # Thống kê booking requests
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(TblBookingRequests.deleted == 0).scalar() or 0
-        pending_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.status == 'pending', TblBookingRequests.deleted == 0)
-        ).scalar() or 0
-        
-        # Thống kê customers
-        total_customers = db.query(func.count(TblCustomers.id)).filter(TblCustomers.deleted == 0).scalar() or 0
+        # Thống kê phòng, facilities, bookings, customers từ bảng thống kê tổng hợp
+        totals = tenant_stats.get_totals(db)
+        total_rooms = totals["total_rooms"]
+        total_facilities = totals["total_facilities"]
+        total_bookings = totals["total_bookings"]
+        pending_bookings = totals["pending_bookings"]
+        total_customers = totals["total_customers"]
         
         # Thống kê admin users
         total_admins = db.query(func.count(TblAdminUsers.id)).scalar() or 0
@@ -420,61 +292,18 @@ def get_tenant_dashboard_stats(
     try:
         tenant_id = current_user.tenant_id
         
-        # Thống kê rooms của tenant
-        total_rooms = db.query(func.count(TblRooms.id)).filter(
-            and_(TblRooms.tenant_id == tenant_id, TblRooms.deleted == 0)
-        ).scalar() or 0
-        
-        # Thống kê facilities của tenant  
-        total_facilities = db.query(func.count(TblFacilities.id)).filter(
-            and_(TblFacilities.tenant_id == tenant_id, TblFacilities.deleted == 0)
-        ).scalar() or 0
-        
-        # Thống kê services của tenant
-        total_services = db.query(func.count(TblServices.id)).filter(
-            and_(TblServices.tenant_id == tenant_id, TblServices.deleted == 0)
-        ).scalar() or 0
-        
-        # Thống kê booking requests của tenant
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.tenant_id == tenant_id, TblBookingRequests.deleted == 0)
-        ).scalar() or 0
-        pending_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.tenant_id == tenant_id,
-                TblBookingRequests.status == 'pending',
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        confirmed_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.tenant_id == tenant_id,
-                TblBookingRequests.status == 'confirmed', 
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        
-        # Thống kê customers của tenant
-        total_customers = db.query(func.count(TblCustomers.id)).filter(
-            and_(TblCustomers.tenant_id == tenant_id, TblCustomers.deleted == 0)
-        ).scalar() or 0
-        
-        # Thống kê vouchers của tenant
-        total_vouchers = db.query(func.count(TblVouchers.id)).filter(
-            and_(TblVouchers.tenant_id == tenant_id, TblVouchers.deleted == 0)
-        ).scalar() or 0
-        active_vouchers = db.query(func.count(TblVouchers.id)).filter(
-            and_(
-                TblVouchers.tenant_id == tenant_id,
-                TblVouchers.status == 'active',
-                TblVouchers.deleted == 0
-            )
-        ).scalar() or 0
-        
-        # Thống kê promotions của tenant
-        total_promotions = db.query(func.count(TblPromotions.id)).filter(
-            and_(TblPromotions.tenant_id == tenant_id, TblPromotions.deleted == 0)
-        ).scalar() or 0
+        # Đọc counters từ bảng thống kê tổng hợp của tenant
+        stats = tenant_stats.get(db, tenant_id=tenant_id)
+        total_rooms = stats["total_rooms"]
+        total_facilities = stats["total_facilities"]
+        total_services = stats["total_services"]
+        total_bookings = stats["total_bookings"]
+        pending_bookings = stats["pending_bookings"]
+        confirmed_bookings = stats["confirmed_bookings"]
+        total_customers = stats["total_customers"]
+        total_vouchers = stats["total_vouchers"]
+        active_vouchers = stats["active_vouchers"]
+        total_promotions = stats["total_promotions"]
         
         # Thống kê theo thời gian (30 ngày qua)
         month_ago = datetime.now() - timedelta(days=30)
@@ -650,47 +479,26 @@ def get_dashboard_reports(
         if current_user.role != 'super_admin' and current_user.tenant_id != tenant_id:
             raise HTTPException(status_code=403, detail="Không đủ quyền truy cập tenant này")
         
-        # Get basic stats for the tenant
-        total_rooms = db.query(func.count(TblRooms.id)).filter(
-            and_(TblRooms.tenant_id == tenant_id, TblRooms.deleted == 0)
-        ).scalar() or 0
-        
-        # Booking stats
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.tenant_id == tenant_id, TblBookingRequests.deleted == 0)
-        ).scalar() or 0
-        
-        pending_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.tenant_id == tenant_id,
-                TblBookingRequests.status == 'pending',
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        
-        confirmed_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(
-                TblBookingRequests.tenant_id == tenant_id,
-                TblBookingRequests.status == 'confirmed',
-                TblBookingRequests.deleted == 0
-            )
-        ).scalar() or 0
-        
-        # Customer stats
-        active_customers = db.query(func.count(TblCustomers.id)).filter(
-            and_(TblCustomers.tenant_id == tenant_id, TblCustomers.deleted == 0)
-        ).scalar() or 0
+        # Get basic stats for the tenant from the stats rollup
+        stats = tenant_stats.get(db, tenant_id=tenant_id)
+        total_rooms = stats["total_rooms"]
+        total_bookings = stats["total_bookings"]
+        pending_bookings = stats["pending_bookings"]
+        confirmed_bookings = stats["confirmed_bookings"]
+        active_customers = stats["total_customers"]
         
         # Recent bookings for dashboard
         recent_bookings_query = db.query(TblBookingRequests).filter(
             and_(TblBookingRequests.tenant_id == tenant_id, TblBookingRequests.deleted == 0)
         ).order_by(TblBookingRequests.created_at.desc()).limit(5)
         
+        recent_bookings_list = recent_bookings_query.all()
+        relations = booking_request.load_relations(db, recent_bookings_list, facilities=False)
+        
         recent_bookings = []
-        for booking in recent_bookings_query.all():
-            # Get customer and room info
-            customer = db.query(TblCustomers).filter(TblCustomers.id == booking.customer_id).first()
-            room = db.query(TblRooms).filter(TblRooms.id == booking.room_id).first()
+        for booking in recent_bookings_list:
+            customer = relations["customers"].get(booking.customer_id)
+            room = relations["rooms"].get(booking.room_id)
             
             recent_bookings.append({
                 "id": booking.id,
@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Tuple
+import hashlib
+import logging
 import os
 import uuid
 from datetime import datetime
 import shutil
 from pathlib import Path
 
-from app.core.deps import get_db, get_current_admin_user
+import aiofiles
+import aiofiles.os
+
+from app.core.deps import get_current_admin_user
 from app.core.config import settings
+from app.core.image_variants import image_processor, variant_paths, variant_urls
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.crud.crud_uploaded_files import uploaded_file as crud_uploaded_file
+from app.db.session_async import get_async_db
 from app.models.models import TblAdminUsers
+from app.schemas.uploaded_files import UploadedFileCreate
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {
@@ -22,7 +33,8 @@ ALLOWED_EXTENSIONS = {
 }
 
 # Maximum file size (in bytes)
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_FILE_SIZE = settings.MAX_FILE_SIZE  # 10MB
+MAX_VIDEO_SIZE = settings.MAX_VIDEO_SIZE  # 50MB
 
 def allowed_file(filename: str, file_type: str = 'image') -> bool:
     """Check if the uploaded file has allowed extension"""
@@ -39,12 +51,77 @@ def generate_unique_filename(original_filename: str) -> str:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     return f"{timestamp}_{unique_id}{file_extension}"
 
+class FileTooLarge(Exception):
+    """Raised by save_upload when the stream exceeds max_size"""
+
+
+def tenant_upload_dir(current_user: TblAdminUsers, folder: str, file_type: str) -> Tuple[str, Path]:
+    """(url path relative to /uploads, directory on disk) for a tenant's folder"""
+    tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
+    relative = f"{tenant_folder}/{folder}/{file_type}s"
+    return relative, Path(settings.UPLOAD_DIR) / relative
+
+
+async def save_upload(file: UploadFile, upload_dir: Path, max_size: int) -> Tuple[str, int, str]:
+    """
+    Stream an upload to upload_dir in UPLOAD_CHUNK_SIZE chunks, enforcing
+    max_size while streaming. Written to a .part file and renamed when
+    complete. Returns (unique filename, size, sha256 hex).
+    """
+    await aiofiles.os.makedirs(upload_dir, exist_ok=True)
+    unique_filename = generate_unique_filename(file.filename)
+    file_path = upload_dir / unique_filename
+    part_path = upload_dir / f"{unique_filename}.part"
+
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(part_path, "wb") as buffer:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLarge()
+                digest.update(chunk)
+                await buffer.write(chunk)
+        await aiofiles.os.rename(part_path, file_path)
+    except BaseException:
+        # Không để lại file dở dang khi quá dung lượng hoặc lỗi ghi
+        try:
+            await aiofiles.os.remove(part_path)
+        except OSError:
+            pass
+        raise
+
+    return unique_filename, size, digest.hexdigest()
+
+
+async def index_upload(db: AsyncSession, current_user: TblAdminUsers, **fields) -> None:
+    """
+    Record an upload in tbl_uploaded_files. The file is already on disk, so
+    an indexing error is logged instead of failing the upload
+    (scripts/reconcile_uploaded_files.py re-indexes it).
+    """
+    try:
+        await crud_uploaded_file.create_async(
+            db,
+            obj_in=UploadedFileCreate(**fields),
+            tenant_id=current_user.tenant_id,
+            created_by=current_user.username
+        )
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Index upload failed for {fields.get('url')}: {str(e)}")
+
+
 @router.post("/upload/image")
 async def upload_image(
     file: UploadFile = File(...),
     folder: str = Form("general"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload image file
@@ -55,26 +132,26 @@ async def upload_image(
         if not allowed_file(file.filename, 'image'):
             raise HTTPException(status_code=400, detail="File type not allowed. Only images are accepted.")
         
-        # Check file size
-        contents = await file.read()
-        if len(contents) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
+        # Stream file to disk (size checked while streaming)
+        relative_dir, upload_dir = tenant_upload_dir(current_user, folder, "image")
+        try:
+            unique_filename, size, sha256 = await save_upload(file, upload_dir, MAX_FILE_SIZE)
+        except FileTooLarge:
+            raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB.")
         
-        # Create directory structure
-        tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-        upload_dir = Path(settings.UPLOAD_DIR) / tenant_folder / folder / "images"
-        upload_dir.mkdir(parents=True, exist_ok=True)
+        # Return file URL
+        file_url = f"/uploads/{relative_dir}/{unique_filename}"
         
-        # Generate unique filename
-        unique_filename = generate_unique_filename(file.filename)
-        file_path = upload_dir / unique_filename
+        # Resize/transcode variants (process pool); ảnh gốc vẫn dùng được nếu lỗi
+        processed = await image_processor.process(upload_dir / unique_filename)
         
-        # Save file
-        with open(file_path, "wb") as buffer:
-            buffer.write(contents)
-        
-        # Return file URL
-        file_url = f"/uploads/{tenant_folder}/{folder}/images/{unique_filename}"
+        await index_upload(
+            db, current_user,
+            folder=folder, file_type="image", filename=unique_filename, original_filename=file.filename,
+            url=file_url, size=size, sha256=sha256,
+            width=processed["width"] if processed else None,
+            height=processed["height"] if processed else None
+        )
         
         return {
             "success": True,
@@ -83,12 +160,18 @@ async def upload_image(
                 "filename": unique_filename,
                 "original_filename": file.filename,
                 "url": file_url,
-                "size": len(contents),
+                "size": size,
+                "sha256": sha256,
+                "width": processed["width"] if processed else None,
+                "height": processed["height"] if processed else None,
+                "variants": variant_urls(file_url) if processed else None,
                 "uploaded_by": current_user.username,
                 "uploaded_at": datetime.now().isoformat()
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -97,7 +180,7 @@ async def upload_video(
     file: UploadFile = File(...),
     folder: str = Form("general"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload video file
@@ -107,26 +190,21 @@ async def upload_video(
         if not allowed_file(file.filename, 'video'):
             raise HTTPException(status_code=400, detail="File type not allowed. Only videos are accepted.")
         
-        # Check file size (larger limit for videos - 50MB)
-        contents = await file.read()
-        if len(contents) > 50 * 1024 * 1024:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 50MB.")
-        
-        # Create directory structure
-        tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-        upload_dir = Path(settings.UPLOAD_DIR) / tenant_folder / folder / "videos"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Generate unique filename
-        unique_filename = generate_unique_filename(file.filename)
-        file_path = upload_dir / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            buffer.write(contents)
+        # Stream file to disk (larger limit for videos - 50MB)
+        relative_dir, upload_dir = tenant_upload_dir(current_user, folder, "video")
+        try:
+            unique_filename, size, sha256 = await save_upload(file, upload_dir, MAX_VIDEO_SIZE)
+        except FileTooLarge:
+            raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MAX_VIDEO_SIZE // (1024 * 1024)}MB.")
         
         # Return file URL
-        file_url = f"/uploads/{tenant_folder}/{folder}/videos/{unique_filename}"
+        file_url = f"/uploads/{relative_dir}/{unique_filename}"
+        
+        await index_upload(
+            db, current_user,
+            folder=folder, file_type="video", filename=unique_filename, original_filename=file.filename,
+            url=file_url, size=size, sha256=sha256
+        )
         
         return {
             "success": True,
@@ -135,12 +213,15 @@ async def upload_video(
                 "filename": unique_filename,
                 "original_filename": file.filename,
                 "url": file_url,
-                "size": len(contents),
+                "size": size,
+                "sha256": sha256,
                 "uploaded_by": current_user.username,
                 "uploaded_at": datetime.now().isoformat()
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -150,14 +231,14 @@ async def upload_multiple_files(
     folder: str = Form("general"),
     file_type: str = Form("image"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Upload multiple files at once
     """
     try:
-        if len(files) > 10:
-            raise HTTPException(status_code=400, detail="Maximum 10 files allowed per upload.")
+        if len(files) > settings.MAX_UPLOAD_FILES:
+            raise HTTPException(status_code=400, detail=f"Maximum {settings.MAX_UPLOAD_FILES} files allowed per upload.")
         
         uploaded_files = []
         errors = []
@@ -169,33 +250,32 @@ async def upload_multiple_files(
                     errors.append(f"{file.filename}: File type not allowed")
                     continue
                 
-                # Check file size
-                contents = await file.read()
-                max_size = 50 * 1024 * 1024 if file_type == 'video' else MAX_FILE_SIZE
-                if len(contents) > max_size:
+                # Stream file to disk (size checked while streaming)
+                max_size = MAX_VIDEO_SIZE if file_type == 'video' else MAX_FILE_SIZE
+                relative_dir, upload_dir = tenant_upload_dir(current_user, folder, file_type)
+                try:
+                    unique_filename, size, sha256 = await save_upload(file, upload_dir, max_size)
+                except FileTooLarge:
                     errors.append(f"{file.filename}: File too large")
                     continue
                 
-                # Create directory structure
-                tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-                upload_dir = Path(f"uploads/{tenant_folder}/{folder}/{file_type}s")
-                upload_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Generate unique filename
-                unique_filename = generate_unique_filename(file.filename)
-                file_path = upload_dir / unique_filename
-                
-                # Save file
-                with open(file_path, "wb") as buffer:
-                    buffer.write(contents)
-                
                 # Add to successful uploads
-                file_url = f"/uploads/{tenant_folder}/{folder}/{file_type}s/{unique_filename}"
+                file_url = f"/uploads/{relative_dir}/{unique_filename}"
+                processed = await image_processor.process(upload_dir / unique_filename) if file_type == 'image' else None
+                await index_upload(
+                    db, current_user,
+                    folder=folder, file_type=file_type, filename=unique_filename, original_filename=file.filename,
+                    url=file_url, size=size, sha256=sha256,
+                    width=processed["width"] if processed else None,
+                    height=processed["height"] if processed else None
+                )
                 uploaded_files.append({
                     "filename": unique_filename,
                     "original_filename": file.filename,
                     "url": file_url,
-                    "size": len(contents)
+                    "size": size,
+                    "sha256": sha256,
+                    "variants": variant_urls(file_url) if processed else None
                 })
                 
             except Exception as e:
@@ -212,6 +292,8 @@ async def upload_multiple_files(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Multiple upload failed: {str(e)}")
 
@@ -219,17 +301,20 @@ async def upload_multiple_files(
 async def delete_file(
     file_url: str,
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete uploaded file
     """
     try:
         # Extract file path from URL
+        upload_root = Path(settings.UPLOAD_DIR).resolve()
         if file_url.startswith("/uploads/"):
-            file_path = Path(file_url[1:])  # Remove leading slash
+            file_path = (upload_root / file_url[len("/uploads/"):]).resolve()
         else:
             raise HTTPException(status_code=400, detail="Invalid file URL")
+        if upload_root not in file_path.parents:
+            raise HTTPException(status_code=400, detail="Invalid file URL")
         
         # Check if file exists
         if not file_path.exists():
@@ -241,8 +326,14 @@ async def delete_file(
             if expected_tenant_folder not in str(file_path):
                 raise HTTPException(status_code=403, detail="No permission to delete this file")
         
-        # Delete file
+        # Delete file (and its resized variants)
         file_path.unlink()
+        for variant_path in variant_paths(str(file_path)):
+            try:
+                os.remove(variant_path)
+            except FileNotFoundError:
+                pass
+        await crud_uploaded_file.remove_by_url_async(db, url=file_url, deleted_by=current_user.username)
         
         return {
             "success": True,
@@ -254,58 +345,73 @@ async def delete_file(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Delete failed: {str(e)}")
 
 @router.get("/upload/list")
 async def list_uploaded_files(
-    folder: str = "general",
-    file_type: str = "image",
+    response: Response,
+    folder: Optional[str] = "general",
+    file_type: Optional[str] = "image",
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = Query(None, description="Cursor của trang trước (next_cursor)"),
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List uploaded files in a folder
+    List uploaded files in a folder (newest first, from the tbl_uploaded_files index).
+    Empty folder / file_type lists every folder / type.
     """
     try:
-        tenant_folder = f"tenant_{current_user.tenant_id}" if current_user.tenant_id else "global"
-        upload_dir = Path(f"uploads/{tenant_folder}/{folder}/{file_type}s")
+        try:
+            items, total, next_cursor = await crud_uploaded_file.list_files_async(
+                db,
+                tenant_id=current_user.tenant_id,
+                folder=folder,
+                file_type=file_type,
+                skip=skip,
+                limit=limit,
+                after=after
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        if not upload_dir.exists():
-            return {
-                "success": True,
-                "message": "No files found",
-                "data": {
-                    "files": [],
-                    "total": 0
-                }
-            }
-        
-        files = []
-        for file_path in upload_dir.iterdir():
-            if file_path.is_file():
-                stat = file_path.stat()
-                files.append({
-                    "filename": file_path.name,
-                    "url": f"/uploads/{tenant_folder}/{folder}/{file_type}s/{file_path.name}",
-                    "size": stat.st_size,
-                    "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                    "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat()
-                })
+        if next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
         
-        # Sort by creation time (newest first)
-        files.sort(key=lambda x: x['created_at'], reverse=True)
+        files = [
+            {
+                "filename": item.filename,
+                "original_filename": item.original_filename,
+                "url": item.url,
+                "file_type": item.file_type,
+                "folder": item.folder,
+                "size": item.size,
+                "sha256": item.sha256,
+                "width": item.width,
+                "height": item.height,
+                "created_at": item.created_at.isoformat(),
+                "modified_at": item.updated_at.isoformat()
+            }
+            for item in items
+        ]
         
         return {
             "success": True,
-            "message": "Files retrieved successfully",
+            "message": "Files retrieved successfully" if files else "No files found",
             "data": {
                 "files": files,
-                "total": len(files),
+                "total": total,
+                "next_cursor": next_cursor,
                 "folder": folder,
                 "file_type": file_type
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"List files failed: {str(e)}")
@@ -1,7 +1,9 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_admin_user, verify_tenant_permission
+from app.core.conditional import check_not_modified, list_etag, record_etag
+from app.core.pagination import PageParams, paginate
 from app.crud.crud_games import game
 from app.schemas.games import GameCreate, GameRead, GameUpdate, GameCreateRequest, GameUpdateRequest
 from app.models.models import TblAdminUsers
@@ -11,14 +13,23 @@ router = APIRouter()
 @router.get("/games", response_model=List[GameRead])
 def read_games(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
     """Get all games for a tenant"""
     verify_tenant_permission(tenant_id, current_user)
-    return game.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    count, last_modified = game.get_validators(db, tenant_id=tenant_id)
+    not_modified = check_not_modified(
+        request,
+        response,
+        etag=list_etag(game, tenant_id, count, last_modified, page)
+    )
+    if not_modified:
+        return not_modified
+    return paginate(game, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/games", response_model=GameRead)
 def create_game(
@@ -44,6 +55,8 @@ def read_game(
     *,
     item_id: int,
     tenant_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
@@ -52,6 +65,14 @@ def read_game(
     obj = game.get(db=db, id=item_id, tenant_id=tenant_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Game not found")
+    not_modified = check_not_modified(
+        request,
+        response,
+        etag=record_etag(game, tenant_id, obj),
+        last_modified=obj.updated_at
+    )
+    if not_modified:
+        return not_modified
     return obj
 
 @router.put("/games/{item_id}", response_model=GameRead)
@@ -1,18 +1,26 @@
 from typing import Any, Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
+from app.core.conditional import check_not_modified, record_etag
 from app.core.deps import get_db, get_current_admin_user
+from app.core.image_variants import variant_urls, variant_urls_list
+from app.core.zalo_credentials import zalo_credentials
+from app.crud.crud_hotel_brands import hotel_brand as crud_hotel_brand
+from app.db.session_async import get_async_db
 from app.models.models import TblHotelBrands, TblAdminUsers
 from datetime import datetime
 
 router = APIRouter()
 
 @router.get("/current")
-def get_current_hotel_brand(
+async def get_current_hotel_brand(
+    request: Request,
+    response: Response,
     current_user: TblAdminUsers = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lấy thông tin thương hiệu khách sạn hiện tại của tenant
@@ -35,13 +43,8 @@ def get_current_hotel_brand(
                 "message": "Super admin không thuộc tenant nào"
             }
 
-        # Tìm hotel brand của tenant
-        hotel_brand = db.query(TblHotelBrands).filter(
-            and_(
-                TblHotelBrands.tenant_id == tenant_id,
-                TblHotelBrands.deleted == 0
-            )
-        ).first()
+        # Tìm hotel brand của tenant (read-through cache)
+        hotel_brand = await crud_hotel_brand.get_by_tenant_async(db, tenant_id=tenant_id)
 
         if not hotel_brand:
             # Tạo brand mặc định nếu chưa có
@@ -56,13 +59,28 @@ def get_current_hotel_brand(
                 updated_by=current_user.username
             )
             db.add(default_brand)
-            db.commit()
-            db.refresh(default_brand)
+            await db.commit()
+            await db.refresh(default_brand)
+            crud_hotel_brand.invalidate_cache(tenant_id)
+            zalo_credentials.invalidate(tenant_id)
             hotel_brand = default_brand
 
+        not_modified = check_not_modified(
+            request,
+            response,
+            etag=record_etag(crud_hotel_brand, tenant_id, hotel_brand),
+            last_modified=hotel_brand.updated_at
+        )
+        if not_modified:
+            return not_modified
+
         return {
             "success": True,
             "data": hotel_brand,
+            "variants": {
+                "logo_url": variant_urls(hotel_brand.logo_url),
+                "banner_images": variant_urls_list(hotel_brand.banner_images)
+            },
             "message": "Lấy thông tin thương hiệu thành công"
         }
 
@@ -115,6 +133,8 @@ def create_hotel_brand(
         db.add(new_brand)
         db.commit()
         db.refresh(new_brand)
+        crud_hotel_brand.invalidate_cache(tenant_id)
+        zalo_credentials.invalidate(tenant_id)
 
         return {
             "success": True,
@@ -156,6 +176,7 @@ def update_hotel_brand(
             raise HTTPException(status_code=403, detail="Không có quyền cập nhật thương hiệu này")
 
         # Cập nhật thông tin
+        old_tenant_id = brand.tenant_id
         update_data = dict(brand_data)
             
         for field, value in update_data.items():
@@ -167,6 +188,13 @@ def update_hotel_brand(
         
         db.commit()
         db.refresh(brand)
+        crud_hotel_brand.invalidate_cache(brand.tenant_id)
+        # zalo_app_id / zalo_secret_key có thể đã đổi (tenant_id cũng có thể đổi)
+        zalo_credentials.invalidate(brand.tenant_id)
+        if old_tenant_id != brand.tenant_id:
+            # Tenant cũ không còn brand này: bỏ cả bản cache của tenant cũ
+            crud_hotel_brand.invalidate_cache(old_tenant_id)
+            zalo_credentials.invalidate(old_tenant_id)
 
         return {
             "success": True,
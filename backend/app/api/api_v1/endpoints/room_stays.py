@@ -1,7 +1,8 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.core.deps import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud.crud_room_stays import room_stay
 from app.schemas.room_stays import RoomStayCreate, RoomStayRead, RoomStayUpdate
 
@@ -10,12 +11,12 @@ router = APIRouter()
 @router.get("/room-stays", response_model=List[RoomStayRead])
 def read_room_stays(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db)
 ):
     """Get all room stays for a tenant"""
-    return room_stay.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    return paginate(room_stay, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/room-stays", response_model=RoomStayRead)
 def create_room_stay(
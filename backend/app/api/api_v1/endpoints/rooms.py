@@ -1,24 +1,39 @@
+from datetime import date
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.core.deps import get_db, get_current_admin_user, get_tenant_admin, verify_tenant_permission
+from app.db.session_async import get_async_db
+from app.core.conditional import check_not_modified, list_etag, record_etag
+from app.core.pagination import PageParams, paginate_async
 from app.crud.crud_rooms import room
-from app.schemas.rooms import RoomCreate, RoomRead, RoomUpdate, RoomCreateRequest
+from app.schemas.rooms import RoomAvailabilityRead, RoomCreate, RoomRead, RoomUpdate, RoomCreateRequest
 from app.models.models import TblAdminUsers
 
 router = APIRouter()
 
 @router.get("/rooms", response_model=List[RoomRead])
-def read_rooms(
+async def read_rooms(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: TblAdminUsers = Depends(get_tenant_admin)
 ):
     """Get all rooms for a tenant"""
     verify_tenant_permission(tenant_id, current_user)
-    return room.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    count, last_modified = await room.get_validators_async(db, tenant_id=tenant_id)
+    not_modified = check_not_modified(
+        request,
+        response,
+        etag=list_etag(room, tenant_id, count, last_modified, page)
+    )
+    if not_modified:
+        return not_modified
+    return await paginate_async(room, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/rooms", response_model=RoomRead)
 def create_room(
@@ -38,17 +53,55 @@ def create_room(
     
     return room.create(db=db, obj_in=room_create, tenant_id=tenant_id)
 
+# Khai báo trước /rooms/{item_id} để "availability" không bị hiểu là item_id
+@router.get("/rooms/availability", response_model=RoomAvailabilityRead)
+async def read_room_availability(
+    *,
+    tenant_id: int,
+    check_in: date,
+    check_out: date,
+    adults: int = Query(1, ge=0),
+    children: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Rooms free for every night of [check_in, check_out) and nightly counts by room type"""
+    if check_out <= check_in:
+        raise HTTPException(status_code=400, detail="check_out must be after check_in")
+    if (check_out - check_in).days > settings.AVAILABILITY_MAX_NIGHTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range is limited to {settings.AVAILABILITY_MAX_NIGHTS} nights"
+        )
+    return await room.get_availability_async(
+        db,
+        tenant_id=tenant_id,
+        check_in=check_in,
+        check_out=check_out,
+        adults=adults,
+        children=children
+    )
+
 @router.get("/rooms/{item_id}", response_model=RoomRead)
-def read_room(
+async def read_room(
     *,
     item_id: int,
     tenant_id: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get room by ID"""
-    obj = room.get(db=db, id=item_id, tenant_id=tenant_id)
+    obj = await room.get_async(db, id=item_id, tenant_id=tenant_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Room not found")
+    not_modified = check_not_modified(
+        request,
+        response,
+        etag=record_etag(room, tenant_id, obj),
+        last_modified=obj.updated_at
+    )
+    if not_modified:
+        return not_modified
     return obj
 
 @router.put("/rooms/{item_id}", response_model=RoomRead)
@@ -1,7 +1,8 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.core.deps import get_db
+from app.core.pagination import PageParams, paginate
 from app.crud.crud_service_bookings import service_booking
 from app.schemas.service_bookings import ServiceBookingCreate, ServiceBookingRead, ServiceBookingUpdate
 
@@ -10,12 +11,12 @@ router = APIRouter()
 @router.get("/service-bookings", response_model=List[ServiceBookingRead])
 def read_service_bookings(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db)
 ):
     """Get all service bookings for a tenant"""
-    return service_booking.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    return paginate(service_booking, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/service-bookings", response_model=ServiceBookingRead)
 def create_servicebooking(
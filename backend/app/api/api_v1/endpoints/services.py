@@ -1,7 +1,11 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_admin_user, verify_tenant_permission
+from app.db.session_async import get_async_db
+from app.core.conditional import check_not_modified, list_etag, record_etag
+from app.core.pagination import PageParams, paginate_async
 from app.crud.crud_services import service
 from app.schemas.services import ServiceCreate, ServiceRead, ServiceUpdate, ServiceCreateRequest, ServiceUpdateRequest
 from app.models.models import TblAdminUsers
@@ -9,16 +13,25 @@ from app.models.models import TblAdminUsers
 router = APIRouter()
 
 @router.get("/services", response_model=List[ServiceRead])
-def read_services(
+async def read_services(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
     """Get all services for a tenant"""
     verify_tenant_permission(tenant_id, current_user)
-    return service.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    count, last_modified = await service.get_validators_async(db, tenant_id=tenant_id)
+    not_modified = check_not_modified(
+        request,
+        response,
+        etag=list_etag(service, tenant_id, count, last_modified, page)
+    )
+    if not_modified:
+        return not_modified
+    return await paginate_async(service, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/services", response_model=ServiceRead)
 def create_service(
@@ -40,18 +53,28 @@ def create_service(
     return service.create(db=db, obj_in=service_create, tenant_id=tenant_id)
 
 @router.get("/services/{item_id}", response_model=ServiceRead)
-def read_service(
+async def read_service(
     *,
     item_id: int,
     tenant_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
     """Get service by ID"""
     verify_tenant_permission(tenant_id, current_user)
-    obj = service.get(db=db, id=item_id, tenant_id=tenant_id)
+    obj = await service.get_async(db, id=item_id, tenant_id=tenant_id)
     if not obj:
         raise HTTPException(status_code=404, detail="Service not found")
+    not_modified = check_not_modified(
+        request,
+        response,
+        etag=record_etag(service, tenant_id, obj),
+        last_modified=obj.updated_at
+    )
+    if not_modified:
+        return not_modified
     return obj
     if not obj:
         raise HTTPException(status_code=404, detail="Service not found")
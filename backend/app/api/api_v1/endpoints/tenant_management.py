@@ -5,7 +5,9 @@ from sqlalchemy import func, and_
 from datetime import datetime, timedelta
 
 from app.core.deps import get_db, get_current_admin_user
+from app.crud.crud_admin_users import crud_admin_user
 from app.crud.crud_tenants import tenant
+from app.crud.crud_tenant_stats import tenant_stats
 from app.schemas.tenants import TenantCreate, TenantRead, TenantUpdate
 from app.models.models import (
     TblTenants, TblAdminUsers, TblRooms, TblFacilities, 
@@ -77,30 +79,8 @@ def get_tenant_statistics(db: Session, tenant_id: int) -> Dict[str, Any]:
             TblAdminUsers.tenant_id == tenant_id
         ).scalar() or 0
         
-        # Count rooms
-        rooms_count = db.query(func.count(TblRooms.id)).filter(
-            and_(TblRooms.tenant_id == tenant_id, TblRooms.deleted == 0)
-        ).scalar() or 0
-        
-        # Count facilities
-        facilities_count = db.query(func.count(TblFacilities.id)).filter(
-            and_(TblFacilities.tenant_id == tenant_id, TblFacilities.deleted == 0)
-        ).scalar() or 0
-        
-        # Count services
-        services_count = db.query(func.count(TblServices.id)).filter(
-            and_(TblServices.tenant_id == tenant_id, TblServices.deleted == 0)
-        ).scalar() or 0
-        
-        # Count customers
-        customers_count = db.query(func.count(TblCustomers.id)).filter(
-            and_(TblCustomers.tenant_id == tenant_id, TblCustomers.deleted == 0)
-        ).scalar() or 0
-        
-        # Count bookings
-        total_bookings = db.query(func.count(TblBookingRequests.id)).filter(
-            and_(TblBookingRequests.tenant_id == tenant_id, TblBookingRequests.deleted == 0)
-        ).scalar() or 0
+        # Counters từ bảng thống kê tổng hợp
+        stats = tenant_stats.get(db, tenant_id=tenant_id)
         
         # Count recent bookings (last 30 days)
         thirty_days_ago = datetime.now() - timedelta(days=30)
@@ -114,11 +94,11 @@ def get_tenant_statistics(db: Session, tenant_id: int) -> Dict[str, Any]:
         
         return {
             "admin_users": admin_users_count,
-            "rooms": rooms_count,
-            "facilities": facilities_count,
-            "services": services_count,
-            "customers": customers_count,
-            "total_bookings": total_bookings,
+            "rooms": stats["total_rooms"],
+            "facilities": stats["total_facilities"],
+            "services": stats["total_services"],
+            "customers": stats["total_customers"],
+            "total_bookings": stats["total_bookings"],
             "recent_bookings_30d": recent_bookings
         }
         
@@ -267,10 +247,14 @@ def delete_tenant_advanced(
             raise HTTPException(status_code=500, detail="Lỗi khi xóa tenant")
         
         # Deactivate all admin users of this tenant
+        user_ids = [row.id for row in db.query(TblAdminUsers.id).filter(TblAdminUsers.tenant_id == tenant_id)]
         db.query(TblAdminUsers).filter(TblAdminUsers.tenant_id == tenant_id).update({
             "status": "inactive"
         })
         db.commit()
+        # Bỏ principal đã cache để các user bị khóa không còn đăng nhập được bằng token cũ
+        for user_id in user_ids:
+            crud_admin_user.invalidate_principal(user_id)
         
         return {
             "success": True,
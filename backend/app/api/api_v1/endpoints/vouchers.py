@@ -1,7 +1,8 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_admin_user, verify_tenant_permission
+from app.core.pagination import PageParams, paginate
 from app.crud.crud_vouchers import voucher
 from app.schemas.vouchers import VoucherCreate, VoucherRead, VoucherUpdate, VoucherCreateRequest, VoucherUpdateRequest
 from app.models.models import TblAdminUsers
@@ -11,14 +12,14 @@ router = APIRouter()
 @router.get("/vouchers", response_model=List[VoucherRead])
 def read_vouchers(
     tenant_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: TblAdminUsers = Depends(get_current_admin_user)
 ):
     """Get all vouchers for a tenant"""
     verify_tenant_permission(tenant_id, current_user)
-    return voucher.get_multi(db=db, tenant_id=tenant_id, skip=skip, limit=limit)
+    return paginate(voucher, db, tenant_id=tenant_id, page=page, response=response)
 
 @router.post("/vouchers", response_model=VoucherRead)
 def create_voucher(
@@ -1,15 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
 import httpx
 import os
 import logging
 
-from sqlalchemy.orm import Session
-
 from app.schemas.zalo import ZaloPhoneRequest, ZaloPhoneResponse
 from app.core.config import settings
-from app.db.session_local import get_db
-from app.models.models import TblHotelBrands
+from app.core.http_client import upstream_http
+from app.core.zalo_credentials import zalo_credentials
 
 router = APIRouter()
 
@@ -49,15 +47,16 @@ async def debug_zalo_phone(request: ZaloPhoneRequest):
             logger.error("ZALO_SECRET_KEY is not configured")
             return ZaloPhoneResponse(number="ERROR: No secret key")
         
-        # Test httpx client
-        async with httpx.AsyncClient() as client:
-            logger.info("Testing httpx client with simple request...")
-            try:
-                test_response = await client.get("https://httpbin.org/get", timeout=5.0)
-                logger.info(f"Test request successful: {test_response.status_code}")
-            except Exception as e:
-                logger.error(f"Test request failed: {e}")
-                return ZaloPhoneResponse(number="ERROR: HTTP client failed")
+        # Test shared httpx client
+        logger.info("Testing httpx client with simple request...")
+        try:
+            test_response = await upstream_http.get(
+                "https://httpbin.org/get", endpoint="httpbin_debug", timeout=5.0, retries=0
+            )
+            logger.info(f"Test request successful: {test_response.status_code}")
+        except Exception as e:
+            logger.error(f"Test request failed: {e}")
+            return ZaloPhoneResponse(number="ERROR: HTTP client failed")
         
         logger.info("=== DEBUG ZALO PHONE END ===")
         return ZaloPhoneResponse(number="DEBUG SUCCESS")
@@ -69,28 +68,28 @@ async def debug_zalo_phone(request: ZaloPhoneRequest):
 @router.post("/test-connection")
 async def test_zalo_connection():
     """Test basic connection to Zalo API without authentication"""
+    url = settings.ZALO_OPENAPI_BASE_URL
     try:
-        async with httpx.AsyncClient() as client:
-            # Test basic connectivity to Zalo domain
-            try:
-                response = await client.get("https://openapi.zalo.me", timeout=3.0)
-                return {
-                    "status": "success",
-                    "message": f"Can connect to Zalo API: {response.status_code}",
-                    "url": "https://openapi.zalo.me"
-                }
-            except httpx.TimeoutException:
-                return {
-                    "status": "timeout",
-                    "message": "Timeout connecting to Zalo API",
-                    "url": "https://openapi.zalo.me"
-                }
-            except Exception as e:
-                return {
-                    "status": "error", 
-                    "message": f"Connection error: {str(e)}",
-                    "url": "https://openapi.zalo.me"
-                }
+        # Test basic connectivity to Zalo domain
+        try:
+            response = await upstream_http.get(url, endpoint="zalo_openapi_ping", timeout=3.0, retries=0)
+            return {
+                "status": "success",
+                "message": f"Can connect to Zalo API: {response.status_code}",
+                "url": url
+            }
+        except httpx.TimeoutException:
+            return {
+                "status": "timeout",
+                "message": "Timeout connecting to Zalo API",
+                "url": url
+            }
+        except Exception as e:
+            return {
+                "status": "error", 
+                "message": f"Connection error: {str(e)}",
+                "url": url
+            }
     except Exception as e:
         return {
             "status": "fatal_error",
@@ -98,25 +97,19 @@ async def test_zalo_connection():
         }
 
 @router.post("/phone", response_model=ZaloPhoneResponse)
-async def resolve_zalo_phone(request: ZaloPhoneRequest, db: Session = Depends(get_db)):
+async def resolve_zalo_phone(request: ZaloPhoneRequest):
     """
     Resolve Zalo Mini App phone number using Zalo Open API
     Reference: https://miniapp.zaloplatforms.com/documents/api/getPhoneNumber/
     """
     try:
-        # Lấy secret_key từ DB theo tenant_id
-        hotel_brand = db.query(TblHotelBrands).filter(
-            TblHotelBrands.tenant_id == request.tenant_id,
-            TblHotelBrands.deleted == 0
-        ).first()
+        # Lấy secret_key theo tenant_id (cache trong process, fallback về env nếu DB chưa có)
+        credentials = await zalo_credentials.resolve(request.tenant_id)
 
-        if not hotel_brand:
+        if not credentials:
             raise HTTPException(status_code=404, detail=f"Tenant {request.tenant_id} not found")
 
-        secret_key = hotel_brand.zalo_secret_key
-        if not secret_key:
-            # Fallback về env nếu DB chưa có (giai đoạn migrate)
-            secret_key = settings.ZALO_SECRET_KEY or os.getenv("ZALO_SECRET_KEY")
+        secret_key = credentials["secret_key"]
         if not secret_key:
             raise HTTPException(status_code=500, detail="Zalo secret key chưa được cấu hình cho tenant này")
 
@@ -125,70 +118,74 @@ async def resolve_zalo_phone(request: ZaloPhoneRequest, db: Session = Depends(ge
         # Call Zalo Open API for phone number
         # According to the actual implementation, Zalo uses headers, not form-data
         # Endpoint: https://graph.zalo.me/v2.0/me/info (not /phone)
-        async with httpx.AsyncClient() as client:
-            try:
-                logger.info(f"Calling Zalo API: https://graph.zalo.me/v2.0/me/info")
-                response = await client.get(
-                    "https://graph.zalo.me/v2.0/me/info",
-                    headers={
-                        "access_token": request.access_token,
-                        "code": request.token,  # This is the token returned by getPhoneNumber() in Mini App
-                        "secret_key": secret_key
-                    },
-                    timeout=8.0
-                )
-                logger.info(f"Zalo API response received: status={response.status_code}")
-                
-            except httpx.TimeoutException as e:
-                logger.error(f"Zalo API timeout: {e}")
-                raise HTTPException(status_code=408, detail="Zalo API timeout - token may be expired (2 minutes)")
-            except httpx.RequestError as e:
-                logger.error(f"Zalo API request error: {e}")
-                raise HTTPException(status_code=502, detail="Zalo API connection error")
-            
-            logger.info(f"Zalo API response status: {response.status_code}")
-            
-            if response.status_code != 200:
-                response_text = response.text
-                logger.error(f"Zalo API returned status {response.status_code}: {response_text}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Zalo API error: HTTP {response.status_code} - {response_text}"
-                )
-            
-            # Parse response
-            try:
-                response_data = response.json()
-                logger.info(f"Zalo API response: {response_data}")
-            except Exception as e:
-                logger.error(f"Failed to parse Zalo API response: {e}")
-                raise HTTPException(status_code=400, detail="Invalid response from Zalo API")
-            
-            # Check for error in response
-            error_code = response_data.get("error", 0)
-            if error_code != 0:
-                error_message = response_data.get("message", "Unknown error from Zalo API")
-                logger.error(f"Zalo API returned error {error_code}: {error_message}")
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Zalo API error {error_code}: {error_message}"
-                )
-            
-            # Extract phone number - check both possible response formats
-            phone_data = response_data.get("data", {})
-            phone_number = phone_data.get("number") or phone_data.get("phone")
-            
-            # Also check direct fields in case of different response structure
-            if not phone_number:
-                phone_number = response_data.get("number") or response_data.get("phone")
-            
-            if not phone_number:
-                logger.error(f"Phone number not found in Zalo API response: {response_data}")
-                raise HTTPException(status_code=400, detail="Phone number not found in response")
-            
-            logger.info(f"Successfully resolved phone number: {phone_number}")
-            return ZaloPhoneResponse(number=phone_number)
+        # Shared pooled client. Code chỉ dùng được một lần và hết hạn sau 2 phút: timeout 8s,
+        # chỉ retry khi request chưa tới Zalo (lỗi kết nối), không gửi lại code đã gửi
+        url = f"{settings.ZALO_GRAPH_BASE_URL}/v2.0/me/info"
+        try:
+            logger.info(f"Calling Zalo API: {url}")
+            response = await upstream_http.get(
+                url,
+                endpoint="zalo_me_info",
+                timeout=8.0,
+                retry_on_timeout=False,
+                headers={
+                    "access_token": request.access_token,
+                    "code": request.token,  # This is the token returned by getPhoneNumber() in Mini App
+                    "secret_key": secret_key
+                }
+            )
+            logger.info(f"Zalo API response received: status={response.status_code}")
             
+        except httpx.TimeoutException as e:
+            logger.error(f"Zalo API timeout: {e}")
+            raise HTTPException(status_code=408, detail="Zalo API timeout - token may be expired (2 minutes)")
+        except httpx.RequestError as e:
+            logger.error(f"Zalo API request error: {e}")
+            raise HTTPException(status_code=502, detail="Zalo API connection error")
+        
+        logger.info(f"Zalo API response status: {response.status_code}")
+        
+        if response.status_code != 200:
+            response_text = response.text
+            logger.error(f"Zalo API returned status {response.status_code}: {response_text}")
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Zalo API error: HTTP {response.status_code} - {response_text}"
+            )
+        
+        # Parse response
+        try:
+            response_data = response.json()
+            logger.info(f"Zalo API response: {response_data}")
+        except Exception as e:
+            logger.error(f"Failed to parse Zalo API response: {e}")
+            raise HTTPException(status_code=400, detail="Invalid response from Zalo API")
+        
+        # Check for error in response
+        error_code = response_data.get("error", 0)
+        if error_code != 0:
+            error_message = response_data.get("message", "Unknown error from Zalo API")
+            logger.error(f"Zalo API returned error {error_code}: {error_message}")
+            raise HTTPException(
+                status_code=400, 
+                detail=f"Zalo API error {error_code}: {error_message}"
+            )
+        
+        # Extract phone number - check both possible response formats
+        phone_data = response_data.get("data", {})
+        phone_number = phone_data.get("number") or phone_data.get("phone")
+        
+        # Also check direct fields in case of different response structure
+        if not phone_number:
+            phone_number = response_data.get("number") or response_data.get("phone")
+        
+        if not phone_number:
+            logger.error(f"Phone number not found in Zalo API response: {response_data}")
+            raise HTTPException(status_code=400, detail="Phone number not found in response")
+        
+        logger.info(f"Successfully resolved phone number: {phone_number}")
+        return ZaloPhoneResponse(number=phone_number)
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,299 @@
+"""
+Room occupancy for the availability search (/rooms/availability).
+
+A room is occupied on night D when a live room stay or a confirmed booking
+request for it has check-in <= D < check-out (by date; a same-day stay
+still takes its check-in night). Rows are found with an overlap query on
+the (tenant_id, deleted, checkout_date, checkin_date) indexes: the range on
+the check-out column only scans stays that end after the searched check-in,
+so past stays don't slow the search down however many there are.
+
+OccupancyCalendar keeps, per tenant, a day bitmap per room (bit i = night
+window_start + i) covering AVAILABILITY_CALENDAR_DAYS from the day it was
+built. A search inside that window is a few shifts and masks per room, no
+query. The CRUD write paths of room stays and booking requests call
+record() after commit, which updates the affected rooms in place; calendars
+are rebuilt after AVAILABILITY_CALENDAR_TTL seconds so writes made by other
+worker processes are picked up. Searches outside the window use the overlap
+query directly.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session_async import AsyncSessionLocal
+from app.models.models import TblBookingRequests, TblRoomStays
+
+# Stay không còn giữ phòng
+STAY_RELEASED_STATUSES = ("cancelled", "checked_out", "no_show")
+# Booking request chỉ giữ phòng khi đã được xác nhận
+BOOKING_BLOCKING_STATUSES = ("confirmed", "completed")
+
+# (loại bản ghi, id) -> khoảng đêm bị chiếm
+IntervalKey = Tuple[str, int]
+
+
+def _as_date(value: Any) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def stay_nights(check_in: Any, check_out: Any) -> Tuple[date, date]:
+    """[first night, end) of a stay; a same-day stay still takes its check-in night"""
+    start = _as_date(check_in)
+    end = max(_as_date(check_out), start + timedelta(days=1))
+    return start, end
+
+
+def blocking_interval(obj: Any) -> Optional[Tuple[IntervalKey, int, date, date]]:
+    """(key, room_id, first night, end) when obj currently holds its room, else None"""
+    if isinstance(obj, TblRoomStays):
+        if obj.deleted or obj.status in STAY_RELEASED_STATUSES or not obj.room_id:
+            return None
+        if obj.checkin_date is None or obj.checkout_date is None:
+            return None
+        start, end = stay_nights(obj.checkin_date, obj.checkout_date)
+        return ("stay", obj.id), obj.room_id, start, end
+    if isinstance(obj, TblBookingRequests):
+        if obj.deleted or obj.status not in BOOKING_BLOCKING_STATUSES or not obj.room_id:
+            return None
+        if obj.check_in_date is None or obj.check_out_date is None:
+            return None
+        start, end = stay_nights(obj.check_in_date, obj.check_out_date)
+        return ("booking", obj.id), obj.room_id, start, end
+    return None
+
+
+async def load_intervals(
+    db: AsyncSession,
+    *,
+    tenant_id: int,
+    start: date,
+    end: date
+) -> List[Tuple[IntervalKey, int, date, date]]:
+    """Stays and confirmed bookings of a tenant that occupy a night in [start, end)"""
+    range_start = datetime.combine(start, datetime.min.time())
+    range_end = datetime.combine(end, datetime.min.time())
+
+    stays = await db.execute(
+        select(TblRoomStays.id, TblRoomStays.room_id, TblRoomStays.checkin_date, TblRoomStays.checkout_date).where(
+            and_(
+                TblRoomStays.tenant_id == tenant_id,
+                TblRoomStays.deleted == 0,
+                TblRoomStays.checkout_date > range_start,
+                TblRoomStays.checkin_date < range_end,
+                TblRoomStays.room_id.isnot(None),
+                or_(TblRoomStays.status.is_(None), TblRoomStays.status.notin_(STAY_RELEASED_STATUSES))
+            )
+        )
+    )
+    bookings = await db.execute(
+        select(
+            TblBookingRequests.id, TblBookingRequests.room_id,
+            TblBookingRequests.check_in_date, TblBookingRequests.check_out_date
+        ).where(
+            and_(
+                TblBookingRequests.tenant_id == tenant_id,
+                TblBookingRequests.deleted == 0,
+                TblBookingRequests.check_out_date > range_start,
+                TblBookingRequests.check_in_date < range_end,
+                TblBookingRequests.room_id.isnot(None),
+                TblBookingRequests.status.in_(BOOKING_BLOCKING_STATUSES)
+            )
+        )
+    )
+
+    intervals = []
+    for kind, rows in (("stay", stays.all()), ("booking", bookings.all())):
+        for row_id, room_id, check_in, check_out in rows:
+            first, last = stay_nights(check_in, check_out)
+            # Query theo datetime nên có thể lấy dư stay trả phòng trong ngày `start`
+            if first < end and last > start:
+                intervals.append(((kind, row_id), room_id, first, last))
+    return intervals
+
+
+def _night_bits(first: int, last: int) -> int:
+    """Bitmask of nights first..last-1"""
+    return ((1 << (last - first)) - 1) << first
+
+
+class _TenantCalendar:
+    """Day bitmaps of one tenant's rooms over [start, start + days)"""
+
+    __slots__ = ("start", "days", "built_at", "intervals", "room_keys", "bitmaps")
+
+    def __init__(self, start: date, days: int):
+        self.start = start
+        self.days = days
+        self.built_at = time.monotonic()
+        self.intervals: Dict[IntervalKey, Tuple[int, int, int]] = {}
+        self.room_keys: Dict[int, Set[IntervalKey]] = {}
+        self.bitmaps: Dict[int, int] = {}
+
+    def covers(self, start: date, end: date) -> bool:
+        return start >= self.start and (end - self.start).days <= self.days
+
+    def add(self, key: IntervalKey, room_id: int, first: date, last: date) -> None:
+        offset_first = max(0, (first - self.start).days)
+        offset_last = min(self.days, (last - self.start).days)
+        if offset_first >= offset_last:
+            return
+        self.intervals[key] = (room_id, offset_first, offset_last)
+        self.room_keys.setdefault(room_id, set()).add(key)
+        self.bitmaps[room_id] = self.bitmaps.get(room_id, 0) | _night_bits(offset_first, offset_last)
+
+    def discard(self, key: IntervalKey) -> None:
+        interval = self.intervals.pop(key, None)
+        if interval is None:
+            return
+        room_id = interval[0]
+        keys = self.room_keys.get(room_id, set())
+        keys.discard(key)
+        # Các khoảng có thể chồng nhau: dựng lại bitmap của phòng từ các khoảng còn lại
+        bitmap = 0
+        for other in keys:
+            _, first, last = self.intervals[other]
+            bitmap |= _night_bits(first, last)
+        if bitmap:
+            self.bitmaps[room_id] = bitmap
+        else:
+            self.bitmaps.pop(room_id, None)
+            self.room_keys.pop(room_id, None)
+
+    def occupied(self, start: date, nights: int) -> Dict[int, int]:
+        offset = (start - self.start).days
+        mask = (1 << nights) - 1
+        occupied = {}
+        for room_id, bitmap in self.bitmaps.items():
+            bits = (bitmap >> offset) & mask
+            if bits:
+                occupied[room_id] = bits
+        return occupied
+
+
+class OccupancyCalendar:
+    """Per-tenant occupancy calendars, updated in place by the write paths"""
+
+    def __init__(self, days: int = 400, ttl: int = 60, max_tenants: int = 500):
+        self.days = days
+        self.ttl = ttl
+        self.max_tenants = max_tenants
+        self._calendars: "OrderedDict[int, _TenantCalendar]" = OrderedDict()
+        # Tăng mỗi lần ghi; calendar dựng song song với một lần ghi sẽ không được lưu
+        self._versions: Dict[int, int] = {}
+        self._inflight: Dict[int, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.direct_queries = 0
+        self.updates = 0
+
+    def _fresh_calendar(self, tenant_id: int) -> Optional[_TenantCalendar]:
+        calendar = self._calendars.get(tenant_id)
+        if calendar is not None and time.monotonic() - calendar.built_at > self.ttl:
+            del self._calendars[tenant_id]
+            return None
+        if calendar is not None:
+            self._calendars.move_to_end(tenant_id)
+        return calendar
+
+    async def _build(self, tenant_id: int) -> _TenantCalendar:
+        with self._lock:
+            version = self._versions.get(tenant_id, 0)
+            self.builds += 1
+        calendar = _TenantCalendar(date.today(), self.days)
+        async with AsyncSessionLocal() as db:
+            intervals = await load_intervals(
+                db, tenant_id=tenant_id, start=calendar.start, end=calendar.start + timedelta(days=self.days)
+            )
+        for key, room_id, first, last in intervals:
+            calendar.add(key, room_id, first, last)
+
+        with self._lock:
+            if self._versions.get(tenant_id, 0) == version:
+                self._calendars[tenant_id] = calendar
+                self._calendars.move_to_end(tenant_id)
+                while len(self._calendars) > self.max_tenants:
+                    self._calendars.popitem(last=False)
+        return calendar
+
+    async def _get_calendar(self, tenant_id: int) -> _TenantCalendar:
+        with self._lock:
+            calendar = self._fresh_calendar(tenant_id)
+            if calendar is not None:
+                self.hits += 1
+                return calendar
+
+        task = self._inflight.get(tenant_id)
+        if task is None:
+            task = asyncio.ensure_future(self._build(tenant_id))
+            self._inflight[tenant_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(tenant_id, None))
+        return await asyncio.shield(task)
+
+    async def occupied(self, db: AsyncSession, *, tenant_id: int, start: date, end: date) -> Dict[int, int]:
+        """room_id -> bitmask of occupied nights (bit i = night start + i), occupied rooms only"""
+        nights = (end - start).days
+        if self.ttl > 0 and start >= date.today() and (end - date.today()).days <= self.days:
+            calendar = await self._get_calendar(tenant_id)
+            if calendar.covers(start, end):
+                with self._lock:
+                    return calendar.occupied(start, nights)
+
+        with self._lock:
+            self.direct_queries += 1
+        calendar = _TenantCalendar(start, nights)
+        for key, room_id, first, last in await load_intervals(db, tenant_id=tenant_id, start=start, end=end):
+            calendar.add(key, room_id, first, last)
+        return calendar.occupied(start, nights)
+
+    def record(self, obj: Any, removed: bool = False) -> None:
+        """Apply a committed change of a room stay / booking request to its tenant's calendar"""
+        if not isinstance(obj, (TblRoomStays, TblBookingRequests)) or not obj.tenant_id:
+            return
+        key = ("stay" if isinstance(obj, TblRoomStays) else "booking", obj.id)
+        interval = None if removed else blocking_interval(obj)
+
+        with self._lock:
+            self._versions[obj.tenant_id] = self._versions.get(obj.tenant_id, 0) + 1
+            calendar = self._calendars.get(obj.tenant_id)
+            if calendar is None:
+                return
+            self.updates += 1
+            calendar.discard(key)
+            if interval is not None:
+                _, room_id, first, last = interval
+                calendar.add(key, room_id, first, last)
+
+    def invalidate(self, tenant_id: Any) -> None:
+        with self._lock:
+            self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+            self._calendars.pop(tenant_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "tenants": len(self._calendars),
+                "days": self.days,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "builds": self.builds,
+                "direct_queries": self.direct_queries,
+                "updates": self.updates,
+                "intervals": sum(len(calendar.intervals) for calendar in self._calendars.values())
+            }
+
+
+occupancy_calendar = OccupancyCalendar(
+    days=settings.AVAILABILITY_CALENDAR_DAYS,
+    ttl=settings.AVAILABILITY_CALENDAR_TTL,
+    max_tenants=settings.AVAILABILITY_CALENDAR_MAX_TENANTS
+)
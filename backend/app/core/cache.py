@@ -0,0 +1,245 @@
+"""
+Tenant-scoped read-through cache for catalog data.
+
+Backends:
+    - MemoryCache: in-process LRU with TTL (default)
+    - RedisCache: Redis-compatible server, shared by all workers (CACHE_BACKEND=redis)
+
+Invalidation is generation based: every (tenant, namespace) pair has a
+generation number that is part of each key. A write bumps the generation,
+so every cached query of that tenant/model is dropped at once without
+scanning keys; the orphaned entries age out through LRU/TTL.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 2000, default_ttl: int = 60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def bump_generation(self, key: str) -> None:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+class RedisCache:
+    """
+    Redis-compatible backend (redis-py client). Errors are logged and treated
+    as cache misses so a Redis outage never breaks reads.
+    """
+
+    def __init__(self, url: str, default_ttl: int = 60, prefix: str = "zma:cache:"):
+        import redis  # optional dependency, only needed for CACHE_BACKEND=redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Redis cache get failed: {e}")
+            return default
+        if raw is None:
+            self._count("misses")
+            return default
+        self._count("hits")
+        return pickle.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        try:
+            self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or self.default_ttl)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Redis cache set failed: {e}")
+
+    def get_generation(self, key: str) -> int:
+        try:
+            value = self.client.get(self.prefix + "gen:" + key)
+            return int(value) if value else 0
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Redis cache generation read failed: {e}")
+            return -1  # -1: không dùng được cache cho lần đọc này
+
+    def bump_generation(self, key: str) -> None:
+        try:
+            self.client.incr(self.prefix + "gen:" + key)
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Redis cache invalidation failed: {e}")
+
+    def clear(self) -> None:
+        try:
+            for key in self.client.scan_iter(self.prefix + "*"):
+                self.client.delete(key)
+        except Exception as e:
+            logger.warning(f"Redis cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        evictions = None
+        try:
+            evictions = self.client.info("stats").get("evicted_keys")
+        except Exception:
+            pass
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,
+            "evictions": evictions,
+            "errors": self.errors
+        }
+
+
+class TenantCache:
+    """Keys cached values by (tenant, namespace, generation, params)"""
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+
+    def make_key(self, tenant_id: Any, namespace: str, **params: Any) -> Optional[str]:
+        """Cache key for a query, or None when the cache is unavailable"""
+        generation = self.backend.get_generation(f"{namespace}:{tenant_id}")
+        if generation < 0:
+            return None
+        query = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        return f"{namespace}:{tenant_id}:g{generation}:{query}"
+
+    def get(self, key: Optional[str]) -> Any:
+        if key is None:
+            return _MISSING
+        return self.backend.get(key, _MISSING)
+
+    def set(self, key: Optional[str], value: Any, ttl: Optional[int] = None) -> None:
+        if key is not None:
+            self.backend.set(key, value, ttl)
+
+    def invalidate(self, tenant_id: Any, namespace: str) -> None:
+        """Drop every cached query of a tenant for one namespace (model)"""
+        self.backend.bump_generation(f"{namespace}:{tenant_id}")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+
+def is_miss(value: Any) -> bool:
+    return value is _MISSING
+
+
+def create_cache_backend() -> Optional[Any]:
+    """Backend selected by CACHE_BACKEND (memory | redis | none)"""
+    backend = (settings.CACHE_BACKEND or "none").lower()
+    if backend == "memory":
+        return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.CACHE_TTL_SECONDS)
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            logger.warning("CACHE_BACKEND=redis but REDIS_URL is not set, falling back to memory cache")
+            return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.CACHE_TTL_SECONDS)
+        try:
+            return RedisCache(settings.REDIS_URL, default_ttl=settings.CACHE_TTL_SECONDS)
+        except ImportError:
+            logger.warning("redis package is not installed, falling back to memory cache")
+            return MemoryCache(max_entries=settings.CACHE_MAX_ENTRIES, default_ttl=settings.CACHE_TTL_SECONDS)
+    return None
+
+
+_backend = create_cache_backend()
+
+# Cache dùng chung cho dữ liệu catalog (rooms, facilities, services, promotions, brand)
+catalog_cache: Optional[TenantCache] = TenantCache(_backend) if _backend is not None else None
+
+
+# Cache principal cho auth: luôn in-process (không đưa hashed_password lên Redis), TTL ngắn
+principal_cache: Optional[TenantCache] = (
+    TenantCache(MemoryCache(
+        max_entries=settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+        default_ttl=settings.AUTH_PRINCIPAL_CACHE_TTL
+    ))
+    if settings.AUTH_PRINCIPAL_CACHE_TTL > 0 else None
+)
+
+
+def get_cache_stats() -> Optional[Dict[str, Any]]:
+    return catalog_cache.stats() if catalog_cache is not None else None
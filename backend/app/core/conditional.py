@@ -0,0 +1,113 @@
+"""
+HTTP conditional GET helpers (ETag / If-None-Match / Last-Modified).
+
+Catalog endpoints compute cheap validators (row count + MAX(updated_at) for
+the tenant, or the record's own updated_at) before loading the rows. When
+the client's cached copy is still current the endpoint answers
+`304 Not Modified` without querying or serializing the data.
+
+List endpoints only use the ETag: a soft delete drops a row without moving
+MAX(updated_at) of the remaining rows forward, so Last-Modified /
+If-Modified-Since would keep a stale list; the row count in the ETag does
+change. Single records also send Last-Modified.
+
+updated_at has second precision, so two edits of the same record within one
+second can share a validator; clients revalidate on every request
+(Cache-Control: no-cache), which bounds the staleness to that window.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from the validator parts (tenant, count, max updated_at, query params...)"""
+    raw = "|".join(str(part) for part in parts).encode()
+    return f'W/"{hashlib.sha1(raw).hexdigest()}"'
+
+
+def format_http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison (RFC 7232 §2.3.2): bỏ tiền tố W/ trước khi so sánh
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    *,
+    etag: str,
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Set ETag / Last-Modified / Cache-Control on the response. Returns a 304
+    Response when the request's If-None-Match (or, without it,
+    If-Modified-Since) shows the client copy is current, else None.
+    Without last_modified (list endpoints) If-Modified-Since is ignored.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_http_date(last_modified)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and last_modified is not None:
+        not_modified = _not_modified_since(if_modified_since, last_modified)
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
+
+
+def list_etag(crud: Any, tenant_id: int, count: int, last_modified: Optional[datetime], page: Any) -> str:
+    """ETag of a paginated catalog list: validators of the tenant's rows + page params (no Last-Modified)"""
+    return make_etag(
+        crud.cache_namespace, tenant_id, count, last_modified,
+        page.skip, page.limit, page.cursor_mode, page.after, page.order_by
+    )
+
+
+def record_etag(crud: Any, tenant_id: int, obj: Any) -> str:
+    """ETag of a single catalog record"""
+    return make_etag(crud.cache_namespace, tenant_id, obj.id, obj.updated_at)
@@ -14,11 +14,34 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production-9a8b7c6d5e4f3a2b1c0d9e8f7a6b5c4d"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Cache principal (admin user) theo (user_id, token version) trong mỗi process; 0 = tắt
+    AUTH_PRINCIPAL_CACHE_TTL: int = 30
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 1000
+    # bcrypt: cost factor và executor riêng cho hash/verify (login)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
     
     # Zalo Mini App Configuration
     ZALO_APP_ID: Optional[str]
     ZALO_SECRET_KEY: Optional[str]
-    
+    # Đổi sang stub local khi test (scripts/zalo_stub_server.py)
+    ZALO_GRAPH_BASE_URL: str = "https://graph.zalo.me"
+    ZALO_OPENAPI_BASE_URL: str = "https://openapi.zalo.me"
+    # Cache app id/secret key Zalo theo tenant trong mỗi process; 0 = tắt (luôn đọc DB)
+    ZALO_CREDENTIALS_CACHE_TTL: int = 300
+    ZALO_CREDENTIALS_CACHE_MAX_ENTRIES: int = 1000
+
+    # HTTP client dùng chung cho upstream API (pool keep-alive, timeout mỗi lần thử, retry có jitter)
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 3.0
+    HTTP_CLIENT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_RETRIES: int = 2
+    HTTP_CLIENT_BACKOFF_BASE: float = 0.1
+    HTTP_CLIENT_BACKOFF_MAX: float = 1.0
+
     SERVER_NAME: str = "Zalo Mini App Backend"
     SERVER_HOST: AnyHttpUrl = "http://localhost"
     
@@ -59,6 +82,16 @@ class Settings(BaseSettings):
     MYSQL_PASSWORD: str = "bI9SmNMOEbXC5@b/"
     MYSQL_DB: str = "zalo-mini-app"
     DATABASE_URI: Optional[str] = None
+    
+    # Connection pool (MySQL). SQLite luôn dùng NullPool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # giây chờ tối đa khi pool đã hết connection
+    DB_POOL_RECYCLE: int = 1800  # giây, nhỏ hơn wait_timeout của MySQL
+    DB_POOL_PRE_PING: bool = True
+    DB_CONNECT_TIMEOUT: int = 10
+    DB_ECHO: bool = False  # Log toàn bộ câu SQL (chỉ bật khi debug)
+    DB_SLOW_CHECKOUT_MS: int = 100  # Checkout chờ lâu hơn ngưỡng này được đếm là chậm
 
     def model_post_init(self, __context) -> None:
         """Initialize database URI after model creation"""
@@ -74,6 +107,52 @@ class Settings(BaseSettings):
                 self.DATABASE_URI = f"mysql+pymysql://{self.MYSQL_USER}:{self.MYSQL_PASSWORD}@{self.MYSQL_SERVER}/{self.MYSQL_DB}"
                 print(f"🔧 Using remote MySQL database: {self.MYSQL_SERVER}")
 
+    # Read-through cache cho dữ liệu catalog (memory | redis | none)
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 2000
+    REDIS_URL: Optional[str] = None
+
+    # Rate limiting (RateLimitMiddleware); backend: memory | redis (dùng REDIS_URL)
+    # Mặc định tắt: sau reverse proxy mà chưa khai báo RATE_LIMIT_TRUSTED_PROXIES thì
+    # mọi request đều mang IP của proxy và toàn bộ người dùng dùng chung một bucket
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_IDLE_SECONDS: int = 3600
+    RATE_LIMIT_MAX_CLIENTS: int = 100000
+    # Chỉ tin X-Forwarded-For khi request đến từ các proxy này (IP hoặc CIDR), phải khai báo
+    # theo từng deployment trước khi bật: VPS sau nginx -> ["127.0.0.1","::1"],
+    # Render -> dải IP nội bộ của load balancer Render (vd ["10.0.0.0/8"])
+    RATE_LIMIT_TRUSTED_PROXIES: List[str] = []
+
+    # Logging (app/core/logging_config.py): ghi file qua QueueListener, không block request
+    LOG_DIR: str = "logs"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_ROTATION: str = "size"  # size | time
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024
+    LOG_ROTATION_WHEN: str = "midnight"  # dùng khi LOG_ROTATION = "time"
+    LOG_BACKUP_COUNT: int = 10
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_REQUEST_START: bool = True
+    # Tỉ lệ request thành công được ghi log (lỗi và request chậm luôn được ghi)
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+
+    # Health checks: /health/ready trả kết quả cache, refresh nền mỗi HEALTH_REFRESH_INTERVAL_SECONDS
+    HEALTH_REFRESH_INTERVAL_SECONDS: float = 5.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 3.0
+
+    # Tìm phòng trống: calendar chiếm phòng theo ngày trong bộ nhớ, dựng lại sau TTL; 0 = luôn query DB
+    AVAILABILITY_CALENDAR_DAYS: int = 400
+    AVAILABILITY_CALENDAR_TTL: int = 60
+    AVAILABILITY_CALENDAR_MAX_TENANTS: int = 500
+    AVAILABILITY_MAX_NIGHTS: int = 90
+
+    # Striped counter cho used_count của promotion/voucher khi traffic dồn vào một campaign;
+    # 0 = tắt (UPDATE trực tiếp row promotion). Tổng đọc qua cache, gom về used_count định kỳ
+    USAGE_COUNTER_STRIPES: int = 0
+    USAGE_COUNTER_CACHE_TTL: float = 2.0
+    USAGE_COUNTER_FLUSH_SECONDS: float = 5.0
+
     # Email
     SMTP_TLS: bool = True
     SMTP_PORT: Optional[int] = None
@@ -96,6 +175,15 @@ class Settings(BaseSettings):
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_VIDEO_SIZE: int = 50 * 1024 * 1024  # 50MB
+    MAX_UPLOAD_FILES: int = 10
+    # Upload được ghi xuống đĩa theo từng chunk, không đọc cả file vào bộ nhớ
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Ảnh upload được resize thành thumb/medium/large (WebP + JPEG) trong process pool
+    IMAGE_VARIANTS_ENABLED: bool = True
+    IMAGE_PROCESS_WORKERS: int = 2
+    # Ảnh vượt quá số pixel này bị bỏ qua (chống decompression bomb làm chết worker vì hết RAM)
+    IMAGE_MAX_PIXELS: int = 40_000_000
     ALLOWED_IMAGE_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".gif", ".webp"]
 
     class Config:
@@ -1,4 +1,5 @@
-from typing import Generator, Optional
+import logging
+from typing import Any, Dict, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
@@ -6,16 +7,67 @@ from jose import jwt, JWTError
 from pydantic import ValidationError
 
 from app.db.session_local import get_db
+from app.core.cache import is_miss, principal_cache
 from app.core.config import settings
 from app.models.models import TblAdminUsers
 from app.crud.crud_admin_users import crud_admin_user
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/v1/auth/login",
     auto_error=False  # Don't auto-raise errors for debugging
 )
 
 
+def _decode_token(token: str) -> Optional[Dict[str, Any]]:
+    """Decode and validate a JWT; None when it is invalid or has no subject"""
+    try:
+        payload = jwt.decode(
+            token, 
+            settings.SECRET_KEY, 
+            algorithms=[settings.ALGORITHM]
+        )
+    except (JWTError, ValidationError) as e:
+        logger.debug(f"JWT validation failed: {e}")
+        return None
+
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+
+def _load_principal(db: Session, payload: Dict[str, Any]) -> Optional[TblAdminUsers]:
+    """
+    Admin user for a decoded token. Served from the principal cache keyed by
+    (user_id, token version); on a miss the user is loaded from the DB and
+    the token version is checked against the current password fingerprint.
+    """
+    try:
+        user_id = int(payload["sub"])
+    except (TypeError, ValueError):
+        return None
+    version = payload.get("ver")
+
+    key = principal_cache.make_key(user_id, "principal", ver=version) if principal_cache else None
+    if key is not None:
+        cached = principal_cache.get(key)
+        if not is_miss(cached):
+            return crud_admin_user.principal_from_snapshot(cached)
+
+    admin_user = crud_admin_user.get_by_id(db, id=user_id)
+    if admin_user is None:
+        return None
+    # Token cũ (trước khi đổi mật khẩu) không còn hợp lệ; token không có `ver` vẫn được chấp nhận
+    if version is not None and version != crud_admin_user.token_version(admin_user):
+        logger.debug(f"Token version mismatch for admin user {user_id}")
+        return None
+
+    if key is not None:
+        principal_cache.set(key, crud_admin_user.principal_snapshot(admin_user))
+    return admin_user
+
+
 def get_current_admin_user(
     db: Session = Depends(get_db), 
     token: str = Depends(oauth2_scheme)
@@ -33,26 +85,11 @@ def get_current_admin_user(
     if not token:
         raise credentials_exception
     
-    try:
-        # Decode JWT token
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except (JWTError, ValidationError) as e:
-        # Debug: print the actual error
-        print(f"JWT Error: {e}")
-        print(f"Token: {token[:50]}...")
-        print(f"Secret key exists: {bool(settings.SECRET_KEY)}")
-        print(f"Algorithm: {settings.ALGORITHM}")
+    payload = _decode_token(token)
+    if payload is None:
         raise credentials_exception
     
-    # Get admin user from database
-    admin_user = crud_admin_user.get_by_id(db, id=int(user_id))
+    admin_user = _load_principal(db, payload)
     if admin_user is None:
         raise credentials_exception
     
@@ -69,23 +106,11 @@ def get_current_admin_user_optional(
     if not token:
         return None
     
-    try:
-        # Decode JWT token
-        payload = jwt.decode(
-            token, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-            
-        # Get admin user from database
-        admin_user = crud_admin_user.get_by_id(db, id=int(user_id))
-        return admin_user
-        
-    except (JWTError, ValidationError):
+    payload = _decode_token(token)
+    if payload is None:
         return None
+    
+    return _load_principal(db, payload)
 
 
 def get_current_super_admin(
@@ -1,26 +1,17 @@
-import logging
 import time
 from contextlib import asynccontextmanager
 from typing import Dict, Any
-import json
 import traceback
 
+from app.core.logging_config import get_file_logger
+
 class ErrorHandler:
     """
     Centralized error handling and monitoring
     """
     
     def __init__(self):
-        self.error_logger = logging.getLogger("error_handler")
-        
-        # Create file handler if not exists
-        if not self.error_logger.handlers:
-            handler = logging.FileHandler("logs/errors.log")
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.error_logger.addHandler(handler)
+        self.error_logger = get_file_logger("error_handler", "errors.log")
         
         self.error_counts = {}
         self.critical_errors = []
@@ -42,7 +33,8 @@ class ErrorHandler:
         }
         
         # Log error
-        self.error_logger.error(f"ERROR: {json.dumps(error_record)}")
+        # Record được serialize ở thread ghi log, không phải trong request
+        self.error_logger.error("ERROR", extra={"error": error_record})
         
         # Track error counts
         self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
@@ -103,16 +95,7 @@ class AlertSystem:
     """
     
     def __init__(self):
-        self.alert_logger = logging.getLogger("alert_system")
-        
-        # Create file handler if not exists
-        if not self.alert_logger.handlers:
-            handler = logging.FileHandler("logs/alerts.log")
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
-            self.alert_logger.addHandler(handler)
+        self.alert_logger = get_file_logger("alert_system", "alerts.log")
         
         self.active_alerts = {}
         self.alert_history = []
@@ -141,7 +124,7 @@ class AlertSystem:
             self.alert_history = self.alert_history[-1000:]
         
         # Log alert
-        self.alert_logger.warning(f"ALERT: {json.dumps(alert)}")
+        self.alert_logger.warning("ALERT", extra={"alert": alert})
         
         # For critical alerts, you might want to send notifications
         if severity == "critical":
@@ -156,7 +139,7 @@ class AlertSystem:
         # - SMS alerts
         # - PagerDuty/OpsGenie
         
-        self.alert_logger.critical(f"CRITICAL_ALERT_NOTIFICATION: {json.dumps(alert)}")
+        self.alert_logger.critical("CRITICAL_ALERT_NOTIFICATION", extra={"alert": alert})
     
     def resolve_alert(self, alert_id: str):
         """Mark an alert as resolved"""
@@ -0,0 +1,264 @@
+"""
+Shared outbound HTTP client for upstream APIs (Zalo Open API).
+
+One httpx.AsyncClient lives for the whole application (started on startup,
+closed on shutdown) so calls to graph.zalo.me reuse pooled keep-alive
+connections instead of paying a TCP + TLS handshake per request. HTTP/2 is
+used when the `h2` package is installed.
+
+Every call is tagged with a short endpoint name ("zalo_me_info", ...) and
+gets a per-attempt timeout and retry with jittered exponential backoff on
+transient failures (connection errors, timeouts, 502/503/504). Latency,
+attempts, retries and errors are counted per endpoint name and exported via
+/metrics.
+
+Settings:
+    ZALO_GRAPH_BASE_URL, ZALO_OPENAPI_BASE_URL, HTTP_CLIENT_MAX_CONNECTIONS,
+    HTTP_CLIENT_MAX_KEEPALIVE, HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    HTTP_CLIENT_CONNECT_TIMEOUT, HTTP_CLIENT_TIMEOUT, HTTP_CLIENT_RETRIES,
+    HTTP_CLIENT_BACKOFF_BASE, HTTP_CLIENT_BACKOFF_MAX
+
+scripts/zalo_stub_server.py is a local stand-in for the Zalo Graph API.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.monitoring import MetricsCollector
+
+logger = logging.getLogger(__name__)
+
+# Status upstream trả về khi quá tải/tạm thời lỗi: thử lại được
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# Chỉ thử lại lỗi sau khi request đã gửi đi với method idempotent;
+# lỗi kết nối (request chưa tới upstream) thì method nào cũng thử lại được
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Status ghi vào metrics khi không nhận được response (timeout, lỗi kết nối)
+NO_RESPONSE_STATUS = 0
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class _EndpointCounters:
+    """Attempt/retry/error counters for one upstream endpoint name"""
+
+    __slots__ = ("calls", "attempts", "retries", "failures", "errors")
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        # loại lỗi (timeout, connect, http_503, ...) -> số lần
+        self.errors: Dict[str, int] = {}
+
+
+class UpstreamHTTPClient:
+    """App-lifetime pooled AsyncClient with retries and per-endpoint metrics"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 3.0,
+        timeout: float = 5.0,
+        retries: int = 2,
+        backoff_base: float = 0.1,
+        backoff_max: float = 1.0
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = http2_available()
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self._counters: Dict[str, _EndpointCounters] = {}
+        # Histogram latency theo endpoint (mỗi attempt), dùng lại MetricsCollector
+        self._latency = MetricsCollector()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            limits=self.limits,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            http2=self.http2
+        )
+
+    async def start(self) -> None:
+        """Create the shared client (called on startup)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+            logger.info(f"Upstream HTTP client started (http2={self.http2}, max_connections={self.limits.max_connections})")
+
+    async def close(self) -> None:
+        """Close pooled connections (called on shutdown)"""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Dùng được cả khi startup chưa chạy (script, test)
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: random delay in [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _counters_for(self, endpoint: str) -> _EndpointCounters:
+        counters = self._counters.get(endpoint)
+        if counters is None:
+            counters = self._counters[endpoint] = _EndpointCounters()
+        return counters
+
+    def _record_error(self, endpoint: str, kind: str) -> None:
+        with self._lock:
+            errors = self._counters_for(endpoint).errors
+            errors[kind] = errors.get(kind, 0) + 1
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        endpoint: str,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        retry_on_timeout: bool = True,
+        **kwargs: Any
+    ) -> httpx.Response:
+        """
+        Send a request through the shared client. `timeout` applies to each
+        attempt; transient failures are retried up to `retries` times. The last
+        exception (httpx.TimeoutException / httpx.RequestError) is raised when
+        all attempts fail; 502/503/504 responses are returned after the last
+        attempt. With retry_on_timeout=False only failures where the request
+        never reached upstream (connect errors, pool timeouts) are retried, for
+        calls that must not be sent twice (single-use codes/tokens).
+        """
+        method = method.upper()
+        retries = self.retries if retries is None else retries
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=min(timeout, self.connect_timeout))
+
+        with self._lock:
+            self._counters_for(endpoint).calls += 1
+
+        attempt = 0
+        while True:
+            with self._lock:
+                counters = self._counters_for(endpoint)
+                counters.attempts += 1
+                if attempt:
+                    counters.retries += 1
+
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.RequestError as e:
+                elapsed = time.perf_counter() - start
+                self._latency.record_request(endpoint, method, NO_RESPONSE_STATUS, elapsed)
+                kind = "timeout" if isinstance(e, httpx.TimeoutException) else (
+                    "connect" if isinstance(e, httpx.ConnectError) else "transport"
+                )
+                self._record_error(endpoint, kind)
+
+                # ConnectError / ConnectTimeout / PoolTimeout: request chưa được gửi đi
+                not_sent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+                if attempt < retries and (not_sent or (retry_on_timeout and method in IDEMPOTENT_METHODS)):
+                    delay = self._backoff(attempt)
+                    logger.warning(f"Upstream {endpoint} {kind} error ({e!r}), retry {attempt + 1}/{retries} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+
+                with self._lock:
+                    self._counters_for(endpoint).failures += 1
+                raise
+
+            elapsed = time.perf_counter() - start
+            self._latency.record_request(endpoint, method, response.status_code, elapsed)
+            if response.status_code >= 500:
+                self._record_error(endpoint, f"http_{response.status_code}")
+
+            if (response.status_code in RETRY_STATUS_CODES and attempt < retries
+                    and retry_on_timeout and method in IDEMPOTENT_METHODS):
+                await response.aclose()
+                delay = self._backoff(attempt)
+                logger.warning(f"Upstream {endpoint} returned {response.status_code}, retry {attempt + 1}/{retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if response.status_code >= 500:
+                with self._lock:
+                    self._counters_for(endpoint).failures += 1
+            return response
+
+    async def get(self, url: str, *, endpoint: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, endpoint=endpoint, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        latency = self._latency.get_metrics_summary()
+        endpoints = {}
+        with self._lock:
+            for name, counters in sorted(self._counters.items()):
+                entry = {
+                    "calls": counters.calls,
+                    "attempts": counters.attempts,
+                    "retries": counters.retries,
+                    "failures": counters.failures,
+                    "errors": dict(counters.errors)
+                }
+                for key, summary in latency.items():
+                    if key.split(":", 1)[1] == name:
+                        entry["avg_latency"] = summary["avg_response_time"]
+                        entry["p95_latency"] = summary["p95_response_time"]
+                        entry["max_latency"] = summary["max_response_time"]
+                        entry["status_codes"] = summary["status_codes"]
+                endpoints[name] = entry
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "endpoints": endpoints
+        }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counters = {}
+        self._latency.reset_metrics()
+
+
+upstream_http = UpstreamHTTPClient(
+    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    connect_timeout=settings.HTTP_CLIENT_CONNECT_TIMEOUT,
+    timeout=settings.HTTP_CLIENT_TIMEOUT,
+    retries=settings.HTTP_CLIENT_RETRIES,
+    backoff_base=settings.HTTP_CLIENT_BACKOFF_BASE,
+    backoff_max=settings.HTTP_CLIENT_BACKOFF_MAX
+)
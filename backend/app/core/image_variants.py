@@ -0,0 +1,219 @@
+"""
+Responsive image variants for uploaded photos.
+
+After an image upload, ImageProcessor generates resized copies in a process
+pool (Pillow work is CPU-bound and would otherwise hold the event loop or the
+GIL): thumb / medium / large, each as WebP plus a JPEG fallback, auto-rotated
+and with EXIF/metadata stripped.
+
+Variants live next to the original under a `variants/` folder, named after
+the original file, so their URLs can be derived from the stored image_url
+without any extra storage:
+
+    /uploads/tenant_1/rooms/images/abc.jpg
+    -> /uploads/tenant_1/rooms/images/variants/abc_medium.webp
+    -> /uploads/tenant_1/rooms/images/variants/abc_medium.jpg
+
+URLs are only advertised while IMAGE_VARIANTS_ENABLED is on and the variants
+were actually generated (checked on disk), so a failed or not yet backfilled
+image keeps serving just the original.
+
+scripts/generate_image_variants.py backfills variants for existing uploads.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+# Tên variant -> cạnh dài tối đa (px); ảnh nhỏ hơn không bị phóng to
+VARIANT_SIZES: Dict[str, int] = {"thumb": 320, "medium": 800, "large": 1600}
+
+# Đuôi file -> (format Pillow, tham số save)
+VARIANT_FORMATS: Dict[str, tuple] = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Chỉ ảnh raster tĩnh mới có variant (svg và gif động giữ nguyên)
+RASTER_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+VARIANT_DIR = "variants"
+
+
+def has_variants(image_url: Optional[str]) -> bool:
+    """Whether image_url is an uploaded raster image whose variants have been generated"""
+    if not settings.IMAGE_VARIANTS_ENABLED:
+        return False
+    if not image_url or not isinstance(image_url, str) or not image_url.startswith("/uploads/"):
+        return False
+    if os.path.splitext(image_url)[1].lower() not in RASTER_EXTENSIONS or ".." in image_url:
+        return False
+    source_path = os.path.join(settings.UPLOAD_DIR, image_url[len("/uploads/"):])
+    # generate_variants ghi file này cuối cùng (os.replace), có nó nghĩa là đủ bộ variant
+    return os.path.exists(variant_paths(source_path)[-1])
+
+
+def variant_urls(image_url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """{"thumb": {"webp": url, "jpg": url}, "medium": ..., "large": ...} or None"""
+    if not has_variants(image_url):
+        return None
+    folder, filename = image_url.rsplit("/", 1)
+    stem = os.path.splitext(filename)[0]
+    return {
+        name: {ext: f"{folder}/{VARIANT_DIR}/{stem}_{name}.{ext}" for ext in VARIANT_FORMATS}
+        for name in VARIANT_SIZES
+    }
+
+
+def variant_urls_list(image_urls: Any) -> Optional[List[Optional[Dict[str, Dict[str, str]]]]]:
+    """variant_urls for each URL of a list (service image_url, brand banner_images)"""
+    if not image_urls:
+        return None
+    if isinstance(image_urls, str):
+        # banner_images có thể là chuỗi JSON hoặc các URL cách nhau bởi xuống dòng
+        try:
+            parsed = json.loads(image_urls)
+        except ValueError:
+            parsed = None
+        image_urls = parsed if isinstance(parsed, list) else [url.strip() for url in image_urls.splitlines() if url.strip()]
+    return [variant_urls(url) for url in image_urls]
+
+
+def variant_paths(source_path: str) -> List[str]:
+    """Files generate_variants writes for source_path"""
+    directory, filename = os.path.split(source_path)
+    stem = os.path.splitext(filename)[0]
+    return [
+        os.path.join(directory, VARIANT_DIR, f"{stem}_{name}.{ext}")
+        for name in VARIANT_SIZES
+        for ext in VARIANT_FORMATS
+    ]
+
+
+def generate_variants(source_path: str) -> Dict[str, Any]:
+    """
+    Create all variants of one image (runs in a worker process).
+    Returns {"width", "height", "variants": {name: {ext: filename}}}.
+    Raises ValueError for images larger than IMAGE_MAX_PIXELS.
+    """
+    from PIL import Image, ImageOps
+
+    # Pillow chỉ báo lỗi khi vượt gấp đôi MAX_IMAGE_PIXELS, nên kiểm tra kích thước trước khi decode
+    Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+    directory, filename = os.path.split(source_path)
+    stem = os.path.splitext(filename)[0]
+    target_dir = os.path.join(directory, VARIANT_DIR)
+
+    with Image.open(source_path) as original:
+        if original.width * original.height > settings.IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image too large: {original.width}x{original.height}")
+        os.makedirs(target_dir, exist_ok=True)
+
+        # Xoay theo EXIF Orientation trước khi bỏ metadata
+        image = ImageOps.exif_transpose(original)
+        width, height = image.size
+
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            # JPEG không có alpha: ghép lên nền trắng
+            flat = Image.new("RGB", image.size, (255, 255, 255))
+            flat.paste(image, mask=image.getchannel("A"))
+        else:
+            image = image.convert("RGB")
+            flat = image
+
+        variants: Dict[str, Dict[str, str]] = {}
+        for name, max_side in VARIANT_SIZES.items():
+            scale = min(1.0, max_side / max(width, height))
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            resized = image.resize(size, Image.LANCZOS) if scale < 1.0 else image
+            resized_flat = flat.resize(size, Image.LANCZOS) if scale < 1.0 else flat
+
+            variants[name] = {}
+            for ext, (pil_format, options) in VARIANT_FORMATS.items():
+                out_name = f"{stem}_{name}.{ext}"
+                out_path = os.path.join(target_dir, out_name)
+                tmp_path = f"{out_path}.part"
+                # Không truyền exif=... nên metadata không được ghi lại
+                (resized if pil_format == "WEBP" else resized_flat).save(tmp_path, pil_format, **options)
+                os.replace(tmp_path, out_path)
+                variants[name][ext] = out_name
+
+    return {"width": width, "height": height, "variants": variants}
+
+
+class ImageProcessor:
+    """Runs generate_variants on a lazily created process pool"""
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.pool_restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: không fork process đang có thread (event loop, log listener)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def process(self, source_path: str) -> Optional[Dict[str, Any]]:
+        """Generate variants for source_path; returns None (original is kept) on failure"""
+        if not settings.IMAGE_VARIANTS_ENABLED:
+            return None
+        if os.path.splitext(source_path)[1].lower() not in RASTER_EXTENSIONS:
+            return None
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            result = await loop.run_in_executor(executor, generate_variants, str(source_path))
+        except BrokenProcessPool:
+            # Worker chết (OOM, segfault): bỏ pool hỏng để lần sau tạo pool mới
+            with self._lock:
+                self.failed += 1
+                self.pool_restarts += 1
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return None
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            return None
+        with self._lock:
+            self.processed += 1
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.IMAGE_VARIANTS_ENABLED,
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "pool_restarts": self.pool_restarts
+            }
+
+
+image_processor = ImageProcessor(workers=settings.IMAGE_PROCESS_WORKERS)
@@ -0,0 +1,203 @@
+"""
+Non-blocking logging pipeline.
+
+Every logger configured here writes into one in-memory queue through
+NonBlockingQueueHandler; a single QueueListener thread formats the records
+(JSON lines by default) and writes them to rotating files. Request handling
+only pays for building the LogRecord and a put_nowait(): when the queue is
+full the record is dropped and counted instead of blocking.
+
+Settings:
+    LOG_DIR, LOG_FORMAT (json | text), LOG_ROTATION (size | time),
+    LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_ROTATION_WHEN, LOG_QUEUE_SIZE,
+    LOG_REQUEST_START, LOG_SUCCESS_SAMPLE_RATE
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Thuộc tính chuẩn của LogRecord; phần còn lại là dữ liệu `extra=` của người gọi
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def record_extras(record: logging.LogRecord) -> Dict[str, Any]:
+    """Structured fields passed through `extra=`"""
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message + extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        payload.update(record_extras(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Classic text line with the extra fields appended as JSON"""
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = record_extras(record)
+        if extras:
+            line = f"{line} {json.dumps(extras, default=str, ensure_ascii=False)}"
+        return line
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Chỉ merge args và render traceback; format JSON được làm ở thread listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _RoutingHandler(logging.Handler):
+    """Runs in the listener thread: sends each record to the file handler of its logger"""
+
+    def __init__(self):
+        super().__init__()
+        self.routes: Dict[str, list] = {}
+        self.default: list = []
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in self.routes.get(record.name, self.default):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        pass
+
+    def close(self) -> None:
+        for handler in [h for handlers in self.routes.values() for h in handlers] + self.default:
+            handler.close()
+        super().close()
+
+
+_lock = threading.Lock()
+_queue: "queue.Queue" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+_queue_handler = NonBlockingQueueHandler(_queue)
+_router = _RoutingHandler()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _formatter() -> logging.Formatter:
+    return TextFormatter() if settings.LOG_FORMAT.lower() == "text" else JsonFormatter()
+
+
+def _file_handler(filename: str) -> logging.Handler:
+    """Rotating file handler (size- or time-based, per LOG_ROTATION)"""
+    os.makedirs(settings.LOG_DIR, exist_ok=True)
+    path = os.path.join(settings.LOG_DIR, filename)
+    if settings.LOG_ROTATION.lower() == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=settings.LOG_ROTATION_WHEN, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    handler.setFormatter(_formatter())
+    return handler
+
+
+def _ensure_listener() -> None:
+    global _listener
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_queue, _router, respect_handler_level=False)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def get_file_logger(name: str, filename: str, level: int = logging.INFO) -> logging.Logger:
+    """Logger whose records go through the queue to LOG_DIR/filename"""
+    with _lock:
+        logger = logging.getLogger(name)
+        if name not in _router.routes:
+            _router.routes[name] = [_file_handler(filename)]
+            logger.addHandler(_queue_handler)
+            logger.setLevel(level)
+            # Có file riêng, không ghi lặp lại vào app.log/console
+            logger.propagate = False
+        _ensure_listener()
+        return logger
+
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """Route the root logger (app.log + console) through the queue and start the listener"""
+    with _lock:
+        root = logging.getLogger()
+        if _queue_handler not in root.handlers:
+            console = logging.StreamHandler(sys.stderr)
+            console.setFormatter(TextFormatter())
+            _router.default = [_file_handler("app.log"), console]
+            root.addHandler(_queue_handler)
+            root.setLevel(level)
+        _ensure_listener()
+
+
+def shutdown_logging() -> None:
+    """Flush the queue and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def should_sample() -> bool:
+    """Whether this request's success-path log lines are written (LOG_SUCCESS_SAMPLE_RATE)"""
+    rate = settings.LOG_SUCCESS_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _queue.qsize(),
+        "queue_size": settings.LOG_QUEUE_SIZE,
+        "dropped": _queue_handler.dropped
+    }
@@ -1,24 +1,41 @@
-from typing import Generator, Optional
+from typing import Any, Dict, Generator, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import text
+import asyncio
+import bisect
 import logging
+import re
+import threading
 import time
+from app.core.config import settings
 from app.db.session import SessionLocal
+from app.db.session_async import async_engine
 
 logger = logging.getLogger(__name__)
 
+# cpu_percent(interval=None) đo từ lần gọi trước; hai lần gọi sát nhau cho kết quả vô nghĩa (thường 100%)
+CPU_MIN_SAMPLE_INTERVAL = 0.5
+
 class HealthChecker:
     """
-    Comprehensive health checking system
+    Comprehensive health checking system.
+    The readiness result is cached and refreshed by a background task every
+    HEALTH_REFRESH_INTERVAL_SECONDS, so probes never wait on the database.
+    Readiness (`ready`) only depends on the database: a busy instance
+    (high CPU/memory) stays in rotation, its status is just "degraded".
     """
     
-    def __init__(self):
-        pass
+    def __init__(self, refresh_interval: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self._cpu_sampled_at: Optional[float] = None
+        self._cached: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
     
     async def check_health(self) -> dict:
         """Main health check method"""
         try:
-            database_health = self.check_database_health()
+            database_health = await self.check_database_health_async()
             system_health = self.check_system_resources()
             
             # Determine overall status
@@ -31,6 +48,7 @@ class HealthChecker:
             
             return {
                 "status": overall_status,
+                "ready": database_health["status"] != "unhealthy",
                 "timestamp": time.time(),
                 "database": database_health,
                 "system": system_health
@@ -39,13 +57,57 @@ class HealthChecker:
             logger.error(f"Health check failed: {str(e)}")
             return {
                 "status": "unhealthy",
+                "ready": False,
                 "error": str(e),
                 "timestamp": time.time()
             }
     
+    async def refresh(self) -> dict:
+        """Run check_health and store the result (concurrent callers share one run)"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        checked_before = self._cached["timestamp"] if self._cached else None
+        async with self._refresh_lock:
+            # Một request khác vừa refresh xong trong lúc chờ lock
+            if self._cached and self._cached["timestamp"] != checked_before:
+                return self._cached
+            self._cached = await self.check_health()
+            return self._cached
+    
+    async def get_readiness(self) -> dict:
+        """Cached health result; refreshed inline only when missing or stale (no background task)"""
+        cached = self._cached
+        if cached is None or time.time() - cached["timestamp"] > self.refresh_interval * 3:
+            cached = await self.refresh()
+        return dict(cached, age_seconds=round(time.time() - cached["timestamp"], 3))
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Health refresh failed: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
+    
+    def start_background_refresh(self) -> None:
+        """Start the refresh task on the running event loop (call from startup)"""
+        if self._task is None or self._task.done():
+            # Lần gọi cpu_percent(interval=None) đầu tiên chỉ khởi tạo mốc đo (CPU bị bỏ qua ở lần refresh đầu)
+            self.check_system_resources()
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+    
+    async def stop_background_refresh(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
     async def detailed_health_check(self) -> dict:
         """Detailed health check with all components"""
-        database_health = self.check_database_health()
+        database_health = await self.check_database_health_async()
         system_health = self.check_system_resources()
         auth_health = self.check_authentication_service()
         
@@ -80,10 +142,10 @@ class HealthChecker:
             
             # Test table existence (for SQLite compatibility)
             try:
-                tenant_check = db.execute(text("SELECT COUNT(*) FROM TblTenants"))
+                tenant_check = db.execute(text("SELECT COUNT(*) FROM tbl_tenants"))
                 tenant_count = tenant_check.scalar()
             except Exception:
-                # If TblTenants doesn't exist, just set count to 0
+                # If tbl_tenants doesn't exist, just set count to 0
                 tenant_count = 0
             
             db.close()
@@ -105,13 +167,54 @@ class HealthChecker:
                 "timestamp": time.time()
             }
     
+    async def check_database_health_async(self) -> dict:
+        """Database check through the async engine pool (does not block the event loop)"""
+        async def ping() -> dict:
+            async with async_engine.connect() as conn:
+                start_time = time.time()
+                await conn.execute(text("SELECT 1"))
+                connection_time = time.time() - start_time
+                
+                try:
+                    tenant_count = (await conn.execute(text("SELECT COUNT(*) FROM tbl_tenants"))).scalar()
+                except Exception:
+                    tenant_count = 0
+            
+            return {
+                "status": "healthy" if connection_time < 1.0 else "degraded",
+                "connection_time": connection_time,
+                "tenant_count": tenant_count,
+                "timestamp": time.time()
+            }
+        
+        try:
+            return await asyncio.wait_for(ping(), timeout=settings.HEALTH_DB_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.error("Database health check timed out")
+            return {
+                "status": "unhealthy",
+                "error": f"timeout after {settings.HEALTH_DB_TIMEOUT_SECONDS}s",
+                "timestamp": time.time()
+            }
+        except Exception as e:
+            logger.error(f"Database health check failed: {str(e)}")
+            return {
+                "status": "unhealthy",
+                "error": str(e),
+                "timestamp": time.time()
+            }
+    
     def check_system_resources(self) -> dict:
         """Check system resource usage"""
         try:
             import psutil
             
-            # CPU usage
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU usage since the previous call (non-blocking); None when that call was too recent
+            now = time.monotonic()
+            cpu_percent = psutil.cpu_percent(interval=None)
+            if self._cpu_sampled_at is None or now - self._cpu_sampled_at < CPU_MIN_SAMPLE_INTERVAL:
+                cpu_percent = None
+            self._cpu_sampled_at = now
             
             # Memory usage
             memory = psutil.virtual_memory()
@@ -122,10 +225,11 @@ class HealthChecker:
             disk_percent = (disk.used / disk.total) * 100
             
             # Determine overall status
+            usage = max(cpu_percent or 0.0, memory_percent, disk_percent)
             status = "healthy"
-            if cpu_percent > 80 or memory_percent > 80 or disk_percent > 80:
+            if usage > 80:
                 status = "degraded"
-            if cpu_percent > 95 or memory_percent > 95 or disk_percent > 95:
+            if usage > 95:
                 status = "critical"
             
             return {
@@ -205,72 +309,179 @@ class HealthChecker:
         }
 
 
+# Bucket biên trên (giây) của histogram latency, giống default của Prometheus client
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _RouteMetrics:
+    """Counters and a fixed-bucket latency histogram for one (method, route)"""
+
+    __slots__ = ("count", "success_count", "error_count", "total_time", "min_time", "max_time",
+                 "status_codes", "buckets")
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.success_count = 0
+        self.error_count = 0
+        self.total_time = 0.0
+        self.min_time = float('inf')
+        self.max_time = 0.0
+        self.status_codes: Dict[str, int] = {}
+        # buckets[i] = số request có latency <= LATENCY_BUCKETS[i] (không cộng dồn); phần tử cuối là +Inf
+        self.buckets = [0] * (bucket_count + 1)
+
+
 class MetricsCollector:
     """
-    Collect and track application metrics
+    Collect and track application metrics.
+    Thread-safe; memory is constant per (method, route template): callers pass
+    the route path (e.g. /api/v1/rooms/{item_id}), never the raw URL.
     """
     
-    def __init__(self):
-        self.metrics = {}
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.metrics: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self.in_flight = 0
+    
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+    
+    def request_finished(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
     
     def record_request(self, endpoint: str, method: str, status_code: int, processing_time: float):
         """Record request metrics"""
-        key = f"{method}:{endpoint}"
-        
-        if key not in self.metrics:
-            self.metrics[key] = {
-                "count": 0,
-                "success_count": 0,
-                "error_count": 0,
-                "total_time": 0.0,
-                "min_time": float('inf'),
-                "max_time": 0.0,
-                "status_codes": {}
-            }
-        
-        metrics = self.metrics[key]
-        metrics["count"] += 1
-        metrics["total_time"] += processing_time
-        metrics["min_time"] = min(metrics["min_time"], processing_time)
-        metrics["max_time"] = max(metrics["max_time"], processing_time)
-        
-        # Track status codes
+        bucket = bisect.bisect_left(self.buckets, processing_time)
         status_str = str(status_code)
-        metrics["status_codes"][status_str] = metrics["status_codes"].get(status_str, 0) + 1
         
-        # Track success/error
-        if 200 <= status_code < 400:
-            metrics["success_count"] += 1
-        else:
-            metrics["error_count"] += 1
+        with self._lock:
+            metrics = self.metrics.get((method, endpoint))
+            if metrics is None:
+                metrics = self.metrics[(method, endpoint)] = _RouteMetrics(len(self.buckets))
+            
+            metrics.count += 1
+            metrics.total_time += processing_time
+            metrics.min_time = min(metrics.min_time, processing_time)
+            metrics.max_time = max(metrics.max_time, processing_time)
+            metrics.buckets[bucket] += 1
+            
+            # Track status codes
+            metrics.status_codes[status_str] = metrics.status_codes.get(status_str, 0) + 1
+            
+            # Track success/error
+            if 200 <= status_code < 400:
+                metrics.success_count += 1
+            else:
+                metrics.error_count += 1
+    
+    def _percentile(self, metrics: _RouteMetrics, pct: float) -> float:
+        """Percentile estimated from the histogram (linear interpolation inside the bucket)"""
+        rank = pct / 100 * metrics.count
+        seen = 0
+        for index, bucket_count in enumerate(metrics.buckets):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else metrics.max_time
+                lower = max(lower, metrics.min_time)
+                upper = min(upper, metrics.max_time)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return metrics.max_time
     
     def get_metrics_summary(self) -> dict:
         """Get summary of all metrics"""
         summary = {}
         
-        for endpoint, metrics in self.metrics.items():
-            if metrics["count"] > 0:
-                avg_time = metrics["total_time"] / metrics["count"]
-                success_rate = (metrics["success_count"] / metrics["count"]) * 100
-                
-                summary[endpoint] = {
-                    "total_requests": metrics["count"],
-                    "success_count": metrics["success_count"],
-                    "error_count": metrics["error_count"],
-                    "success_rate": success_rate,
-                    "avg_response_time": avg_time,
-                    "min_response_time": metrics["min_time"],
-                    "max_response_time": metrics["max_time"],
-                    "status_codes": metrics["status_codes"]
-                }
+        with self._lock:
+            for (method, endpoint), metrics in sorted(self.metrics.items(), key=lambda item: (item[0][1], item[0][0])):
+                if metrics.count > 0:
+                    avg_time = metrics.total_time / metrics.count
+                    success_rate = (metrics.success_count / metrics.count) * 100
+                    
+                    summary[f"{method}:{endpoint}"] = {
+                        "total_requests": metrics.count,
+                        "success_count": metrics.success_count,
+                        "error_count": metrics.error_count,
+                        "success_rate": success_rate,
+                        "error_rate": 100 - success_rate,
+                        "avg_response_time": avg_time,
+                        "min_response_time": metrics.min_time,
+                        "max_response_time": metrics.max_time,
+                        "p50_response_time": self._percentile(metrics, 50),
+                        "p95_response_time": self._percentile(metrics, 95),
+                        "p99_response_time": self._percentile(metrics, 99),
+                        "status_codes": dict(metrics.status_codes)
+                    }
         
         return summary
     
+    def render_prometheus(self) -> str:
+        """Request metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being processed",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_requests_total Completed HTTP requests",
+            "# TYPE http_requests_total counter"
+        ]
+        histogram = [
+            "# HELP http_request_duration_seconds Request latency by route template",
+            "# TYPE http_request_duration_seconds histogram"
+        ]
+        
+        with self._lock:
+            items = sorted(self.metrics.items(), key=lambda item: (item[0][1], item[0][0]))
+            for (method, endpoint), metrics in items:
+                labels = f'method="{_escape_label(method)}",route="{_escape_label(endpoint)}"'
+                for status_str, count in sorted(metrics.status_codes.items()):
+                    lines.append(f'http_requests_total{{{labels},status="{status_str}"}} {count}')
+                
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, metrics.buckets):
+                    cumulative += bucket_count
+                    histogram.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                histogram.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+                histogram.append(f'http_request_duration_seconds_sum{{{labels}}} {metrics.total_time}')
+                histogram.append(f'http_request_duration_seconds_count{{{labels}}} {metrics.count}')
+        
+        return "\n".join(lines + histogram) + "\n"
+    
     def reset_metrics(self):
         """Reset all metrics"""
-        self.metrics = {}
+        with self._lock:
+            self.metrics = {}
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_name(value: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", value)
+
+
+def render_prometheus_gauges(prefix: str, stats: Dict[str, Any]) -> str:
+    """Numeric values of a (nested) stats dict as Prometheus gauges, e.g. app_cache_hits"""
+    lines = []
+    
+    def walk(name: str, value: Any) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{name}_{key}", item)
+        elif isinstance(value, (bool, int, float)):
+            metric = _metric_name(name)
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {float(value)}")
+    
+    walk(prefix, stats)
+    return "\n".join(lines) + "\n" if lines else ""
 
 
 # Global instances
-health_checker = HealthChecker()
+health_checker = HealthChecker(refresh_interval=settings.HEALTH_REFRESH_INTERVAL_SECONDS)
 metrics_collector = MetricsCollector()
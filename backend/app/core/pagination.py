@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints.
+
+Offset mode (`skip`/`limit`) stays the default. Cursor mode is opt-in:
+`?cursor=true` returns the first page, every response carries the token for
+the next page in the `X-Next-Cursor` header, and `?after=<token>` fetches it.
+The body of the list response is unchanged in both modes.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy.orm import Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(order_by: str, value: Any, last_id: int) -> str:
+    """Opaque cursor token for the position after (value, last_id)"""
+    payload: Dict[str, Any] = {"o": order_by, "id": last_id}
+    if isinstance(value, datetime):
+        payload["v"], payload["t"] = value.isoformat(), "dt"
+    elif isinstance(value, date):
+        payload["v"], payload["t"] = value.isoformat(), "d"
+    else:
+        payload["v"] = value
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Decode a cursor token; raises ValueError when it is malformed"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload.get("t") == "dt":
+            payload["v"] = datetime.fromisoformat(payload["v"])
+        elif payload.get("t") == "d":
+            payload["v"] = date.fromisoformat(payload["v"])
+        if not isinstance(payload.get("id"), int) or not isinstance(payload.get("o"), str):
+            raise ValueError
+        return payload
+    except Exception:
+        raise ValueError("Cursor không hợp lệ")
+
+
+class PageParams:
+    """Query params chung cho các list endpoint (offset hoặc cursor mode)"""
+
+    def __init__(
+        self,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1),
+        cursor: bool = Query(False, description="Bật keyset pagination (trả về header X-Next-Cursor)"),
+        after: Optional[str] = Query(None, description="Cursor của trang trước (X-Next-Cursor)"),
+        order_by: str = Query("id", description="Cột sắp xếp trong cursor mode")
+    ):
+        self.skip = skip
+        self.limit = limit
+        self.after = after
+        self.order_by = order_by
+        self.cursor_mode = cursor or after is not None
+
+
+def paginate(
+    crud: Any,
+    db: Session,
+    *,
+    tenant_id: int,
+    page: PageParams,
+    response: Response
+) -> List[Any]:
+    """Run a CRUD list query in offset or cursor mode, setting X-Next-Cursor in cursor mode"""
+    if not page.cursor_mode:
+        return crud.get_multi(db=db, tenant_id=tenant_id, skip=page.skip, limit=page.limit)
+
+    try:
+        items, next_cursor = crud.get_page(
+            db,
+            tenant_id=tenant_id,
+            limit=page.limit,
+            after=page.after,
+            order_by=page.order_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
+
+
+async def paginate_async(
+    crud: Any,
+    db: Any,
+    *,
+    tenant_id: int,
+    page: PageParams,
+    response: Response
+) -> List[Any]:
+    """Async version of paginate() for endpoints using AsyncSession"""
+    if not page.cursor_mode:
+        return await crud.get_multi_async(db, tenant_id=tenant_id, skip=page.skip, limit=page.limit)
+
+    try:
+        items, next_cursor = await crud.get_page_async(
+            db,
+            tenant_id=tenant_id,
+            limit=page.limit,
+            after=page.after,
+            order_by=page.order_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return items
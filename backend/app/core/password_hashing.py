@@ -0,0 +1,150 @@
+"""
+Bounded executor for bcrypt hashing/verification.
+
+bcrypt is deliberately slow (BCRYPT_ROUNDS), so running it inline in a
+request handler holds a worker thread for the whole hash. PasswordHasher
+runs it on a small dedicated thread pool instead: at most
+PASSWORD_HASH_WORKERS hashes run at once, at most PASSWORD_HASH_QUEUE_SIZE
+more wait, and anything beyond that is rejected immediately
+(PasswordHasherBusy -> 503) so a login burst cannot starve other endpoints.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+# min/max = default: hash có cost khác BCRYPT_ROUNDS sẽ được needs_update() đánh dấu để rehash
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
+
+
+def is_bcrypt_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith(("$2b$", "$2a$"))
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password. Returns (valid, new_hash); new_hash is set when the
+    stored bcrypt hash uses a different cost factor than BCRYPT_ROUNDS.
+    """
+    if is_bcrypt_hash(hashed_password):
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+
+    # Fallback to simple hash for testing (SQLite data)
+    return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password, None
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full"""
+
+
+class PasswordHasher:
+    """Runs bcrypt work on a dedicated, size-bounded thread pool"""
+
+    def __init__(self, workers: int = 4, queue_size: int = 32):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.total_hash_time = 0.0
+        self.max_hash_time = 0.0
+
+    def _reserve(self) -> None:
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self.pending += 1
+            self.submitted += 1
+
+    def _release(self, _: Future) -> None:
+        # Done-callback: chạy đúng một lần cho mỗi job, kể cả job bị huỷ khi còn trong hàng đợi
+        with self._lock:
+            self.pending -= 1
+
+    def _timed(self, func: Callable[..., Any], queued_at: float, *args: Any) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            wait = started - queued_at
+            self.total_queue_wait += wait
+            self.max_queue_wait = max(self.max_queue_wait, wait)
+            self.running += 1
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+                self.total_hash_time += elapsed
+                self.max_hash_time = max(self.max_hash_time, elapsed)
+
+    def _submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        self._reserve()
+        try:
+            future = self._executor.submit(self._timed, func, time.perf_counter(), *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the hashing pool; raises PasswordHasherBusy when full"""
+        # Request bị huỷ thì future cũng bị huỷ (nếu chưa chạy); _release vẫn được gọi
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def run_sync(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Blocking version of run() for sync endpoints/CRUD (never call it on the event loop)"""
+        return self._submit(func, *args).result()
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(pwd_context.hash, password)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_wait_ms": round(self.total_queue_wait / self.completed * 1000, 3) if self.completed else 0.0,
+                "max_queue_wait_ms": round(self.max_queue_wait * 1000, 3),
+                "avg_hash_ms": round(self.total_hash_time / self.completed * 1000, 3) if self.completed else 0.0,
+                "max_hash_ms": round(self.max_hash_time * 1000, 3)
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE
+)
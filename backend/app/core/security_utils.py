@@ -1,25 +1,289 @@
+import logging
+import threading
 import time
+import zlib
+from collections import OrderedDict
 from typing import Dict, Any, Optional
-from collections import defaultdict, deque
-import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _ClientState:
+    """Rate limit state of one client: a token bucket and blocking info per endpoint type"""
+
+    __slots__ = ("buckets", "blocks", "last_seen")
+
+    def __init__(self, now: float):
+        self.buckets: Dict[str, list] = {}  # endpoint_type -> [tokens, updated_at]
+        self.blocks: Dict[str, list] = {}  # endpoint_type -> [blocked_until, violations, last_violation]
+        self.last_seen = now
+
+    @property
+    def blocked_until(self) -> float:
+        return max((block[0] for block in self.blocks.values()), default=0.0)
+
+
+class MemoryRateLimitStore:
+    """
+    In-process store. Clients are spread over lock stripes so concurrent
+    requests from different clients rarely contend; each stripe is an LRU
+    that evicts idle clients and is capped at max_clients / stripes entries.
+    """
+
+    def __init__(self, stripes: int = 64, idle_seconds: int = 3600, max_clients: int = 100000):
+        self.stripes = [(threading.Lock(), OrderedDict()) for _ in range(stripes)]
+        self.idle_seconds = idle_seconds
+        self.max_per_stripe = max(1, max_clients // stripes)
+        self.evictions = 0
+
+    def _stripe(self, client_id: str):
+        return self.stripes[zlib.crc32(client_id.encode()) % len(self.stripes)]
+
+    def _evict(self, clients: "OrderedDict[str, _ClientState]", now: float) -> None:
+        # Đầu OrderedDict là client lâu nhất không hoạt động
+        while clients:
+            client_id, state = next(iter(clients.items()))
+            idle = now - state.last_seen > self.idle_seconds and now >= state.blocked_until
+            if not idle and len(clients) <= self.max_per_stripe:
+                break
+            del clients[client_id]
+            self.evictions += 1
+
+    def consume(
+        self,
+        client_id: str,
+        endpoint_type: str,
+        capacity: int,
+        rate: float,
+        block_durations: Dict[str, int],
+        now: float
+    ) -> Dict[str, Any]:
+        lock, clients = self._stripe(client_id)
+        with lock:
+            state = clients.get(client_id)
+            if state is None:
+                state = clients[client_id] = _ClientState(now)
+            else:
+                clients.move_to_end(client_id)
+            state.last_seen = now
+            try:
+                # Block chỉ áp dụng cho loại endpoint đã vi phạm
+                block = state.blocks.get(endpoint_type)
+                if block is not None and now < block[0]:
+                    return {"allowed": False, "blocked_until": block[0],
+                            "violations": block[1], "duration": None}
+
+                bucket = state.buckets.get(endpoint_type)
+                tokens = capacity if bucket is None else min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                if tokens >= 1:
+                    state.buckets[endpoint_type] = [tokens - 1, now]
+                    return {"allowed": True, "tokens": tokens - 1}
+
+                state.buckets[endpoint_type] = [tokens, now]
+                if block is None:
+                    block = state.blocks[endpoint_type] = [0.0, 0, 0.0]
+                # Vi phạm cũ hơn thời gian block nặng nhất thì không tính nữa
+                if now - block[2] > block_durations["hard"]:
+                    block[1] = 0
+                block[1] += 1
+                block[2] = now
+                duration = block_duration_for(block[1], block_durations)
+                block[0] = now + duration
+                return {"allowed": False, "blocked_until": block[0],
+                        "violations": block[1], "duration": duration}
+            finally:
+                self._evict(clients, now)
+
+    def reset(self, client_id: str) -> None:
+        lock, clients = self._stripe(client_id)
+        with lock:
+            clients.pop(client_id, None)
+
+    def status(self, client_id: str) -> Optional[Dict[str, Any]]:
+        lock, clients = self._stripe(client_id)
+        with lock:
+            state = clients.get(client_id)
+            if state is None:
+                return None
+            return {"blocks": {name: block[0] for name, block in state.blocks.items()},
+                    "violations": {name: block[1] for name, block in state.blocks.items()},
+                    "buckets": {name: bucket[0] for name, bucket in state.buckets.items()}}
+
+    def size(self) -> int:
+        return sum(len(clients) for _, clients in self.stripes)
+
+
+# KEYS[1] = client key; ARGV = endpoint_type, capacity, rate, now, soft, medium, hard, idle_seconds
+_REDIS_TOKEN_BUCKET = """
+local key = KEYS[1]
+local etype = ARGV[1]
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local soft, medium, hard = tonumber(ARGV[5]), tonumber(ARGV[6]), tonumber(ARGV[7])
+local idle = tonumber(ARGV[8])
+local s = redis.call('HMGET', key, 'b:' .. etype, 'v:' .. etype, 'l:' .. etype, 't:' .. etype, 'u:' .. etype)
+local blocked_until = tonumber(s[1]) or 0
+local violations = tonumber(s[2]) or 0
+if now < blocked_until then
+  return {0, tostring(blocked_until), violations, -1}
+end
+local tokens = tonumber(s[4])
+if tokens == nil then
+  tokens = capacity
+else
+  tokens = math.min(capacity, tokens + (now - (tonumber(s[5]) or now)) * rate)
+end
+if tokens >= 1 then
+  redis.call('HSET', key, 't:' .. etype, tostring(tokens - 1), 'u:' .. etype, tostring(now))
+  redis.call('EXPIRE', key, idle)
+  return {1, tostring(tokens - 1), violations, 0}
+end
+if now - (tonumber(s[3]) or 0) > hard then
+  violations = 0
+end
+violations = violations + 1
+local duration = soft
+if violations > 3 then
+  duration = hard
+elseif violations > 1 then
+  duration = medium
+end
+blocked_until = now + duration
+redis.call('HSET', key, 't:' .. etype, tostring(tokens), 'u:' .. etype, tostring(now),
+  'b:' .. etype, tostring(blocked_until), 'v:' .. etype, violations, 'l:' .. etype, tostring(now))
+redis.call('EXPIRE', key, math.max(idle, hard))
+return {0, tostring(blocked_until), violations, duration}
+"""
+
+
+class RedisRateLimitStore:
+    """
+    Redis-compatible store shared by all workers. The token bucket update
+    runs as one Lua script, so it is atomic without client-side locks; key
+    TTLs evict idle clients. Redis errors fail open (request allowed).
+    """
+
+    def __init__(self, url: str, idle_seconds: int = 3600, prefix: str = "zma:ratelimit:"):
+        import redis  # optional dependency, only needed for RATE_LIMIT_BACKEND=redis
+        import redis.asyncio as redis_async
+
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.async_client = redis_async.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.script = self.client.register_script(_REDIS_TOKEN_BUCKET)
+        self.async_script = self.async_client.register_script(_REDIS_TOKEN_BUCKET)
+        self.idle_seconds = idle_seconds
+        self.prefix = prefix
+        self.errors = 0
+
+    def _args(self, endpoint_type, capacity, rate, block_durations, now):
+        return [endpoint_type, capacity, rate, now, block_durations["soft"],
+                block_durations["medium"], block_durations["hard"], self.idle_seconds]
+
+    @staticmethod
+    def _result(raw) -> Dict[str, Any]:
+        allowed, value, violations, duration = int(raw[0]), float(raw[1]), int(raw[2]), int(raw[3])
+        if allowed:
+            return {"allowed": True, "tokens": value}
+        return {"allowed": False, "blocked_until": value, "violations": violations,
+                "duration": duration if duration >= 0 else None}
+
+    def _fail_open(self, e: Exception) -> Dict[str, Any]:
+        self.errors += 1
+        logger.warning(f"Redis rate limit store unavailable, allowing request: {e}")
+        return {"allowed": True, "tokens": None}
+
+    def consume(self, client_id, endpoint_type, capacity, rate, block_durations, now) -> Dict[str, Any]:
+        try:
+            raw = self.script(keys=[self.prefix + client_id],
+                              args=self._args(endpoint_type, capacity, rate, block_durations, now))
+            return self._result(raw)
+        except Exception as e:
+            return self._fail_open(e)
+
+    async def consume_async(self, client_id, endpoint_type, capacity, rate, block_durations, now) -> Dict[str, Any]:
+        try:
+            raw = await self.async_script(keys=[self.prefix + client_id],
+                                          args=self._args(endpoint_type, capacity, rate, block_durations, now))
+            return self._result(raw)
+        except Exception as e:
+            return self._fail_open(e)
+
+    def reset(self, client_id: str) -> None:
+        try:
+            self.client.delete(self.prefix + client_id)
+        except Exception as e:
+            logger.warning(f"Redis rate limit reset failed: {e}")
+
+    def status(self, client_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = self.client.hgetall(self.prefix + client_id)
+        except Exception as e:
+            logger.warning(f"Redis rate limit status failed: {e}")
+            return None
+        if not data:
+            return None
+        data = {key.decode(): value.decode() for key, value in data.items()}
+        return {
+            "blocks": {key[2:]: float(value) for key, value in data.items() if key.startswith("b:")},
+            "violations": {key[2:]: int(value) for key, value in data.items() if key.startswith("v:")},
+            "buckets": {key[2:]: float(value) for key, value in data.items() if key.startswith("t:")}
+        }
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+def block_duration_for(violation_count: int, block_durations: Dict[str, int]) -> int:
+    """Progressive block duration: 1 violation -> soft, 2-3 -> medium, more -> hard"""
+    if violation_count <= 1:
+        return block_durations['soft']
+    elif violation_count <= 3:
+        return block_durations['medium']
+    else:
+        return block_durations['hard']
+
+
+def _memory_store() -> MemoryRateLimitStore:
+    return MemoryRateLimitStore(
+        idle_seconds=settings.RATE_LIMIT_IDLE_SECONDS,
+        max_clients=settings.RATE_LIMIT_MAX_CLIENTS
+    )
+
+
+def create_rate_limit_store():
+    """Store selected by RATE_LIMIT_BACKEND (memory | redis)"""
+    if (settings.RATE_LIMIT_BACKEND or "memory").lower() != "redis":
+        return _memory_store()
+    if not settings.REDIS_URL:
+        logger.warning("RATE_LIMIT_BACKEND=redis but REDIS_URL is not set, falling back to memory store")
+        return _memory_store()
+    try:
+        return RedisRateLimitStore(settings.REDIS_URL, idle_seconds=settings.RATE_LIMIT_IDLE_SECONDS)
+    except ImportError:
+        logger.warning("redis package is not installed, falling back to memory rate limit store")
+        return _memory_store()
 
 
 class RateLimiter:
     """
-    Rate limiting implementation for API endpoints
+    Rate limiting implementation for API endpoints.
+    Token bucket per (client, endpoint type): `requests` tokens, refilled
+    continuously over `window` seconds - constant memory per client.
+    Exceeding a limit blocks the client for that endpoint type only, with
+    progressive durations.
     """
     
-    def __init__(self):
-        self.clients = defaultdict(lambda: {
-            'requests': deque(),
-            'blocked_until': 0
-        })
-        self.lock = threading.Lock()
+    def __init__(self, store=None):
+        self.store = store if store is not None else create_rate_limit_store()
         
         # Rate limit configurations
         self.limits = {
             'default': {'requests': 100, 'window': 60},  # 100 requests per minute
             'auth': {'requests': 10, 'window': 60},      # 10 auth requests per minute
+            'zalo': {'requests': 60, 'window': 60},      # Zalo phone lookup: nhiều khách chung IP NAT nhà mạng
             'upload': {'requests': 20, 'window': 60},    # 20 uploads per minute
             'search': {'requests': 200, 'window': 60},   # 200 search requests per minute
         }
@@ -30,107 +294,88 @@ class RateLimiter:
             'medium': 300,   # 5 minutes
             'hard': 3600,    # 1 hour
         }
+
+    def _limit(self, endpoint_type: str):
+        limit_config = self.limits.get(endpoint_type, self.limits['default'])
+        return limit_config['requests'], limit_config['requests'] / limit_config['window']
+
+    def _build_result(self, raw: Dict[str, Any], endpoint_type: str, now: float) -> Dict[str, Any]:
+        capacity, rate = self._limit(endpoint_type)
+        if raw["allowed"]:
+            tokens = raw["tokens"]
+            if tokens is None:  # store unavailable (fail open)
+                return {'allowed': True, 'limit': capacity, 'remaining': capacity, 'reset_time': now}
+            return {
+                'allowed': True,
+                'limit': capacity,
+                'remaining': int(tokens),
+                'reset_time': now + (capacity - tokens) / rate
+            }
+
+        retry_after = max(1, int(raw["blocked_until"] - now + 0.999))
+        if raw["duration"] is None:
+            return {
+                'allowed': False,
+                'reason': 'rate_limited',
+                'limit': capacity,
+                'blocked_until': raw["blocked_until"],
+                'retry_after': retry_after
+            }
+        return {
+            'allowed': False,
+            'reason': 'rate_limit_exceeded',
+            'limit': capacity,
+            'blocked_until': raw["blocked_until"],
+            'retry_after': retry_after,
+            'violation_count': raw["violations"]
+        }
     
     def is_allowed(self, client_id: str, endpoint_type: str = 'default') -> Dict[str, Any]:
         """Check if request is allowed for client"""
-        
-        current_time = time.time()
-        
-        with self.lock:
-            client_data = self.clients[client_id]
-            
-            # Check if client is currently blocked
-            if current_time < client_data['blocked_until']:
-                return {
-                    'allowed': False,
-                    'reason': 'rate_limited',
-                    'blocked_until': client_data['blocked_until'],
-                    'retry_after': int(client_data['blocked_until'] - current_time)
-                }
-            
-            # Get rate limit config for endpoint type
-            limit_config = self.limits.get(endpoint_type, self.limits['default'])
-            max_requests = limit_config['requests']
-            time_window = limit_config['window']
-            
-            # Clean old requests outside the time window
-            requests = client_data['requests']
-            while requests and requests[0] < current_time - time_window:
-                requests.popleft()
-            
-            # Check if within limit
-            if len(requests) < max_requests:
-                requests.append(current_time)
-                return {
-                    'allowed': True,
-                    'remaining': max_requests - len(requests),
-                    'reset_time': current_time + time_window
-                }
-            else:
-                # Rate limit exceeded - determine block duration
-                violation_count = self._get_violation_count(client_id)
-                block_duration = self._get_block_duration(violation_count)
-                
-                client_data['blocked_until'] = current_time + block_duration
-                
-                return {
-                    'allowed': False,
-                    'reason': 'rate_limit_exceeded',
-                    'blocked_until': client_data['blocked_until'],
-                    'retry_after': block_duration,
-                    'violation_count': violation_count
-                }
-    
-    def _get_violation_count(self, client_id: str) -> int:
-        """Get violation count for progressive blocking"""
-        
-        # In production, this would be stored in Redis or database
-        # For now, using simple in-memory tracking
-        if not hasattr(self, '_violations'):
-            self._violations = defaultdict(int)
-        
-        return self._violations[client_id]
+        now = time.time()
+        capacity, rate = self._limit(endpoint_type)
+        raw = self.store.consume(client_id, endpoint_type, capacity, rate, self.block_durations, now)
+        return self._build_result(raw, endpoint_type, now)
+
+    async def is_allowed_async(self, client_id: str, endpoint_type: str = 'default') -> Dict[str, Any]:
+        """is_allowed() without blocking the event loop on a remote store"""
+        if not hasattr(self.store, "consume_async"):
+            return self.is_allowed(client_id, endpoint_type)
+        now = time.time()
+        capacity, rate = self._limit(endpoint_type)
+        raw = await self.store.consume_async(client_id, endpoint_type, capacity, rate, self.block_durations, now)
+        return self._build_result(raw, endpoint_type, now)
     
     def _get_block_duration(self, violation_count: int) -> int:
         """Get block duration based on violation count"""
-        
-        if violation_count <= 1:
-            return self.block_durations['soft']
-        elif violation_count <= 3:
-            return self.block_durations['medium']
-        else:
-            return self.block_durations['hard']
+        return block_duration_for(violation_count, self.block_durations)
     
     def reset_client(self, client_id: str):
         """Reset rate limit for a client"""
-        
-        with self.lock:
-            if client_id in self.clients:
-                del self.clients[client_id]
-            
-            if hasattr(self, '_violations') and client_id in self._violations:
-                del self._violations[client_id]
+        self.store.reset(client_id)
     
     def get_client_status(self, client_id: str) -> Dict[str, Any]:
         """Get current status for a client"""
-        
         current_time = time.time()
+        state = self.store.status(client_id) or {"blocks": {}, "violations": {}, "buckets": {}}
+        blocked = {name: until for name, until in state['blocks'].items() if current_time < until}
         
-        with self.lock:
-            client_data = self.clients[client_id]
-            
-            # Clean old requests
-            requests = client_data['requests']
-            while requests and requests[0] < current_time - 60:  # Using default window
-                requests.popleft()
-            
-            return {
-                'client_id': client_id,
-                'current_requests': len(requests),
-                'blocked_until': client_data['blocked_until'],
-                'is_blocked': current_time < client_data['blocked_until'],
-                'violation_count': self._get_violation_count(client_id)
-            }
+        return {
+            'client_id': client_id,
+            'remaining': {name: int(tokens) for name, tokens in state['buckets'].items()},
+            'blocked_until': max(state['blocks'].values(), default=0),
+            'blocked': blocked,
+            'is_blocked': bool(blocked),
+            'violation_count': sum(state['violations'].values())
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.store).__name__,
+            "tracked_clients": self.store.size(),
+            "evictions": getattr(self.store, "evictions", None),
+            "store_errors": getattr(self.store, "errors", None)
+        }
 
 
 class SecurityValidator:
@@ -0,0 +1,152 @@
+"""
+Per-tenant Zalo credentials (app id + secret key) for the Zalo Open API.
+
+resolve_zalo_phone needs the tenant's zalo_secret_key on every phone lookup.
+ZaloCredentialsResolver keeps it in an in-process TTL cache (never Redis: it
+is a secret, same as the auth principal cache) and loads misses through the
+async engine, so the hot path does no DB round-trip and never blocks the
+event loop. Concurrent misses for the same tenant share one query
+(single-flight).
+
+The catalog cache leaves zalo_secret_key out of cached hotel brands;
+crud_hotel_brands fills it back in from here (tenant_secret_key).
+
+The settings.ZALO_APP_ID / ZALO_SECRET_KEY fallback for tenants without their
+own credentials is applied here too. hotel_brands create/update call
+invalidate(tenant_id); other workers pick changes up after
+ZALO_CREDENTIALS_CACHE_TTL seconds.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, select
+
+from app.core.cache import MemoryCache, TenantCache, is_miss
+from app.core.config import settings
+from app.db.session_async import AsyncSessionLocal
+from app.models.models import TblHotelBrands
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAMESPACE = "zalo_credentials"
+
+
+class ZaloCredentialsResolver:
+    """Cached tenant_id -> {"app_id", "secret_key", "source"} lookup"""
+
+    def __init__(self, ttl: int = 300, max_entries: int = 1000):
+        self.ttl = ttl
+        self.cache: Optional[TenantCache] = (
+            TenantCache(MemoryCache(max_entries=max_entries, default_ttl=ttl)) if ttl > 0 else None
+        )
+        # cache key -> task đang load (các request cùng miss chờ chung một query)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    async def _load(self, tenant_id: int) -> Dict[str, Any]:
+        """Credentials row of the tenant's hotel brand ({"found": False} when there is no brand)"""
+        self._count("loads")
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(TblHotelBrands.zalo_app_id, TblHotelBrands.zalo_secret_key).where(
+                        and_(
+                            TblHotelBrands.tenant_id == tenant_id,
+                            TblHotelBrands.deleted == 0
+                        )
+                    ).limit(1)
+                )
+                row = result.first()
+        except Exception:
+            self._count("errors")
+            raise
+        if row is None:
+            return {"found": False, "app_id": None, "secret_key": None}
+        return {"found": True, "app_id": row.zalo_app_id, "secret_key": row.zalo_secret_key}
+
+    async def _load_and_store(self, key: str, tenant_id: int) -> Dict[str, Any]:
+        record = await self._load(tenant_id)
+        # key chứa generation: nếu invalidate() chạy trong lúc load, bản ghi cũ không còn được đọc tới
+        self.cache.set(key, record)
+        return record
+
+    @staticmethod
+    def _with_fallback(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not record["found"]:
+            return None
+        secret_key, source = record["secret_key"], "tenant"
+        if not secret_key:
+            # Fallback về env nếu DB chưa có (giai đoạn migrate)
+            secret_key, source = settings.ZALO_SECRET_KEY or os.getenv("ZALO_SECRET_KEY"), "env"
+        return {
+            "app_id": record["app_id"] or settings.ZALO_APP_ID,
+            "secret_key": secret_key,
+            "source": source if secret_key else None
+        }
+
+    async def _record(self, tenant_id: int) -> Dict[str, Any]:
+        """Cached credentials row of a tenant, as stored in the DB (no env fallback)"""
+        if self.cache is None:
+            return await self._load(tenant_id)
+
+        key = self.cache.make_key(tenant_id, CACHE_NAMESPACE)
+        cached = self.cache.get(key)
+        if not is_miss(cached):
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_and_store(key, tenant_id))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self._count("coalesced")
+        # shield: request bị huỷ không huỷ query mà các request khác đang chờ
+        return await asyncio.shield(task)
+
+    async def resolve(self, tenant_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Credentials for a tenant, or None when the tenant has no hotel brand.
+        secret_key is None when neither the tenant nor the env has one.
+        """
+        return self._with_fallback(await self._record(tenant_id))
+
+    async def tenant_secret_key(self, tenant_id: int) -> Optional[str]:
+        """The tenant's own zalo_secret_key (no env fallback), for records rebuilt from the catalog cache"""
+        return (await self._record(tenant_id))["secret_key"]
+
+    def invalidate(self, tenant_id: Any) -> None:
+        """Drop the cached credentials of a tenant (call after commit)"""
+        if self.cache is not None:
+            self.cache.invalidate(tenant_id, CACHE_NAMESPACE)
+
+    def stats(self) -> Dict[str, Any]:
+        cache_stats = self.cache.stats() if self.cache is not None else {}
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "entries": cache_stats.get("entries", 0),
+                "hits": cache_stats.get("hits", 0),
+                "misses": cache_stats.get("misses", 0),
+                "loads": self.loads,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "inflight": len(self._inflight)
+            }
+
+
+zalo_credentials = ZaloCredentialsResolver(
+    ttl=settings.ZALO_CREDENTIALS_CACHE_TTL,
+    max_entries=settings.ZALO_CREDENTIALS_CACHE_MAX_ENTRIES
+)
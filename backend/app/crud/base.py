@@ -1,12 +1,18 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from sqlalchemy import and_, func, or_, select
 from datetime import datetime
 
+from app.core.availability import occupancy_calendar
+from app.core.cache import TenantCache, is_miss
+from app.core.pagination import decode_cursor, encode_cursor
 from app.db.session_local import SessionLocal
 from app.models.models import Base
+from app.crud.crud_tenant_stats import tenant_stats
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -14,24 +20,134 @@ UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    # Các cột (có index) được phép dùng làm thứ tự trong cursor mode
+    cursor_columns: Tuple[str, ...] = ("id", "created_at")
+    # Cột bí mật không bao giờ đưa vào catalog cache (có thể là Redis)
+    secret_columns: Tuple[str, ...] = ("hashed_password", "zalo_secret_key")
+
+    def __init__(self, model: Type[ModelType], cache: Optional[TenantCache] = None):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
         **Parameters**
         * `model`: A SQLAlchemy model class
-        * `schema`: A Pydantic model (schema) class
+        * `cache`: Optional tenant-scoped read-through cache for the async reads
         """
         self.model = model
+        self.cache = cache
+        self.cache_namespace = model.__tablename__
 
-    def get(self, db: Session, id: Any, tenant_id: int) -> Optional[ModelType]:
-        """Get single record by ID and tenant"""
-        return db.query(self.model).filter(
+    def _to_snapshot(self, obj: ModelType, include_secrets: bool = False) -> Dict[str, Any]:
+        """Column values of a record, safe to keep in the cache (secret_columns left out)"""
+        return {
+            attr.key: getattr(obj, attr.key)
+            for attr in self.model.__mapper__.column_attrs
+            if include_secrets or attr.key not in self.secret_columns
+        }
+
+    def _from_snapshot(self, snapshot: Dict[str, Any]) -> ModelType:
+        """Detached copy of a cached record (not attached to any session)"""
+        return self.model(**snapshot)
+
+    def invalidate_cache(self, tenant_id: Any) -> None:
+        """Drop all cached reads of this model for a tenant (call after commit)"""
+        if self.cache is not None:
+            self.cache.invalidate(tenant_id, self.cache_namespace)
+
+    def select_one(self, id: Any, tenant_id: int) -> Select:
+        """SELECT statement for a single record by ID and tenant"""
+        return select(self.model).where(
             and_(
                 self.model.id == id,
                 self.model.tenant_id == tenant_id,
                 self.model.deleted == 0
             )
-        ).first()
+        ).limit(1)
+
+    def select_multi(
+        self,
+        *,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        include_deleted: bool = False
+    ) -> Select:
+        """SELECT statement for a tenant's records (offset pagination)"""
+        stmt = select(self.model).where(self.model.tenant_id == tenant_id)
+        
+        if not include_deleted:
+            stmt = stmt.where(self.model.deleted == 0)
+            
+        return stmt.order_by(self.model.id).offset(skip).limit(limit)
+
+    def select_page(
+        self,
+        *,
+        tenant_id: int,
+        limit: int = 100,
+        after: Optional[str] = None,
+        order_by: str = "id"
+    ) -> Select:
+        """
+        SELECT statement for keyset pagination: records after the `after`
+        cursor, ordered on (tenant_id, order_by, id). Fetches limit + 1 rows
+        so finish_page() can tell whether there is a next page.
+        Raises ValueError on a bad cursor/column.
+        """
+        if order_by not in self.cursor_columns or not hasattr(self.model, order_by):
+            raise ValueError(f"Không thể sắp xếp theo '{order_by}'")
+
+        column = getattr(self.model, order_by)
+        stmt = select(self.model).where(
+            and_(
+                self.model.tenant_id == tenant_id,
+                self.model.deleted == 0
+            )
+        )
+
+        if after:
+            cursor = decode_cursor(after)
+            if cursor["o"] != order_by:
+                raise ValueError("Cursor không khớp với order_by")
+            if order_by == "id":
+                stmt = stmt.where(self.model.id > cursor["id"])
+            else:
+                stmt = stmt.where(
+                    or_(
+                        column > cursor["v"],
+                        and_(column == cursor["v"], self.model.id > cursor["id"])
+                    )
+                )
+
+        order = [self.model.id] if order_by == "id" else [column, self.model.id]
+        return stmt.order_by(*order).limit(limit + 1)
+
+    def finish_page(
+        self,
+        items: List[ModelType],
+        *,
+        limit: int,
+        order_by: str = "id"
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Trim the extra row fetched by select_page() and build the next cursor"""
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(order_by, getattr(last, order_by), last.id)
+        return items, next_cursor
+
+    def select_validators(self, tenant_id: int) -> Select:
+        """SELECT (row count, MAX(updated_at)) of a tenant's records, used for ETag / Last-Modified"""
+        return select(func.count(self.model.id), func.max(self.model.updated_at)).where(
+            and_(
+                self.model.tenant_id == tenant_id,
+                self.model.deleted == 0
+            )
+        )
+
+    def get(self, db: Session, id: Any, tenant_id: int) -> Optional[ModelType]:
+        """Get single record by ID and tenant"""
+        return db.execute(self.select_one(id, tenant_id)).scalars().first()
 
     def get_multi(
         self,
@@ -43,12 +159,115 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         include_deleted: bool = False
     ) -> List[ModelType]:
         """Get multiple records for a tenant"""
-        query = db.query(self.model).filter(self.model.tenant_id == tenant_id)
-        
-        if not include_deleted:
-            query = query.filter(self.model.deleted == 0)
-            
-        return query.offset(skip).limit(limit).all()
+        stmt = self.select_multi(tenant_id=tenant_id, skip=skip, limit=limit, include_deleted=include_deleted)
+        return db.execute(stmt).scalars().all()
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        limit: int = 100,
+        after: Optional[str] = None,
+        order_by: str = "id"
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        Keyset pagination. Returns (items, next_cursor); next_cursor is None
+        on the last page. Raises ValueError on a bad cursor/column.
+        """
+        stmt = self.select_page(tenant_id=tenant_id, limit=limit, after=after, order_by=order_by)
+        items = db.execute(stmt).scalars().all()
+        return self.finish_page(items, limit=limit, order_by=order_by)
+
+    def get_validators(self, db: Session, *, tenant_id: int) -> Tuple[int, Optional[datetime]]:
+        """(row count, last modified) of a tenant's records"""
+        count, last_modified = db.execute(self.select_validators(tenant_id)).one()
+        return count, last_modified
+
+    async def get_validators_async(self, db: AsyncSession, *, tenant_id: int) -> Tuple[int, Optional[datetime]]:
+        """Async version of get_validators(), served from the cache when configured"""
+        key = self.cache.make_key(tenant_id, self.cache_namespace, op="validators") if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if not is_miss(cached):
+                return cached
+
+        result = await db.execute(self.select_validators(tenant_id))
+        count, last_modified = result.one()
+        if key is not None:
+            self.cache.set(key, (count, last_modified))
+        return count, last_modified
+
+    async def get_async(self, db: AsyncSession, id: Any, tenant_id: int) -> Optional[ModelType]:
+        """Async version of get(), served from the cache when configured"""
+        key = self.cache.make_key(tenant_id, self.cache_namespace, op="get", id=id) if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if not is_miss(cached):
+                return self._from_snapshot(cached) if cached is not None else None
+
+        result = await db.execute(self.select_one(id, tenant_id))
+        obj = result.scalars().first()
+        if key is not None:
+            self.cache.set(key, self._to_snapshot(obj) if obj is not None else None)
+        return obj
+
+    async def get_multi_async(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        include_deleted: bool = False
+    ) -> List[ModelType]:
+        """Async version of get_multi(), served from the cache when configured"""
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(
+                tenant_id, self.cache_namespace,
+                op="multi", skip=skip, limit=limit, include_deleted=include_deleted
+            )
+            cached = self.cache.get(key)
+            if not is_miss(cached):
+                return [self._from_snapshot(row) for row in cached]
+
+        stmt = self.select_multi(tenant_id=tenant_id, skip=skip, limit=limit, include_deleted=include_deleted)
+        result = await db.execute(stmt)
+        items = result.scalars().all()
+        if key is not None:
+            self.cache.set(key, [self._to_snapshot(item) for item in items])
+        return items
+
+    async def get_page_async(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int,
+        limit: int = 100,
+        after: Optional[str] = None,
+        order_by: str = "id"
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """Async version of get_page(), served from the cache when configured"""
+        stmt = self.select_page(tenant_id=tenant_id, limit=limit, after=after, order_by=order_by)
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(
+                tenant_id, self.cache_namespace,
+                op="page", limit=limit, after=after, order_by=order_by
+            )
+            cached = self.cache.get(key)
+            if not is_miss(cached):
+                return self.finish_page(
+                    [self._from_snapshot(row) for row in cached], limit=limit, order_by=order_by
+                )
+
+        result = await db.execute(stmt)
+        items = result.scalars().all()
+        if key is not None:
+            self.cache.set(key, [self._to_snapshot(item) for item in items])
+        return self.finish_page(items, limit=limit, order_by=order_by)
 
     def get_count(
         self,
@@ -83,8 +302,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
+        db.flush()
+        tenant_stats.record(db, db_obj, before={})
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_cache(tenant_id)
+        occupancy_calendar.record(db_obj)
         return db_obj
 
     def update(
@@ -97,6 +320,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     ) -> ModelType:
         """Update existing record"""
         obj_data = jsonable_encoder(db_obj)
+        stats_before = tenant_stats.snapshot(db_obj)
         
         if isinstance(obj_in, dict):
             update_data = obj_in
@@ -112,8 +336,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
                 setattr(db_obj, field, update_data[field])
                 
         db.add(db_obj)
+        tenant_stats.record(db, db_obj, before=stats_before)
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_cache(db_obj.tenant_id)
+        occupancy_calendar.record(db_obj)
         return db_obj
 
     def remove(
@@ -127,13 +354,17 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Soft delete record"""
         obj = self.get(db=db, id=id, tenant_id=tenant_id)
         if obj:
+            stats_before = tenant_stats.snapshot(obj)
             obj.deleted = 1
             obj.deleted_at = datetime.utcnow()
             if deleted_by:
                 obj.deleted_by = deleted_by
             db.add(obj)
+            tenant_stats.record(db, obj, before=stats_before)
             db.commit()
             db.refresh(obj)
+            self.invalidate_cache(tenant_id)
+            occupancy_calendar.record(obj)
         return obj
 
     def restore(
@@ -160,8 +391,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             if updated_by:
                 obj.updated_by = updated_by
             db.add(obj)
+            tenant_stats.record(db, obj, before={})
             db.commit()
             db.refresh(obj)
+            self.invalidate_cache(tenant_id)
+            occupancy_calendar.record(obj)
         return obj
 
     def hard_delete(
@@ -174,6 +408,10 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """Permanently delete record"""
         obj = self.get(db=db, id=id, tenant_id=tenant_id)
         if obj:
+            stats_before = tenant_stats.snapshot(obj)
             db.delete(obj)
+            tenant_stats.record(db, obj, before=stats_before, removed=True)
             db.commit()
+            self.invalidate_cache(tenant_id)
+            occupancy_calendar.record(obj, removed=True)
         return obj
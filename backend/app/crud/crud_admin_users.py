@@ -1,15 +1,16 @@
-from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from passlib.context import CryptContext
+import hashlib
+from typing import Any, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy import and_, select
 from datetime import datetime
 
+from app.core.cache import principal_cache
+from app.core.password_hashing import password_hasher, pwd_context, verify_and_update
 from app.crud.base import CRUDBase
 from app.models.models import TblAdminUsers
 from app.schemas.admin_users import AdminUserCreate, AdminUserUpdate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
     
@@ -45,6 +46,37 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
             )
         ).first()
 
+    async def get_by_username_async(self, db: AsyncSession, *, username: str) -> Optional[TblAdminUsers]:
+        """Async version of get_by_username()"""
+        result = await db.execute(
+            select(TblAdminUsers).where(
+                and_(
+                    TblAdminUsers.username == username,
+                    TblAdminUsers.deleted == 0
+                )
+            ).limit(1)
+        )
+        return result.scalars().first()
+
+    async def authenticate_async(self, db: AsyncSession, *, username: str, password: str) -> Optional[TblAdminUsers]:
+        """
+        Authenticate admin user with bcrypt running on the password hashing
+        pool (raises PasswordHasherBusy when it is saturated). A hash made
+        with a different BCRYPT_ROUNDS is transparently replaced.
+        """
+        user = await self.get_by_username_async(db, username=username)
+        if not user:
+            return None
+        valid, new_hash = await password_hasher.verify_and_update(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            await db.refresh(user)
+            self.invalidate_principal(user.id)
+        return user
+
     def authenticate(self, db: Session, *, username: str, password: str) -> Optional[TblAdminUsers]:
         """Authenticate admin user"""
         user = self.get_by_username(db, username=username)
@@ -55,18 +87,37 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
         return user
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify password - support both bcrypt and simple hash for testing"""
-        # Try bcrypt first
-        if hashed_password.startswith('$2b$') or hashed_password.startswith('$2a$'):
-            return pwd_context.verify(plain_password, hashed_password)
-        
-        # Fallback to simple hash for testing (SQLite data)
-        import hashlib
-        return hashlib.sha256(plain_password.encode()).hexdigest() == hashed_password
+        """Verify password - support both bcrypt and simple hash for testing (on the password hashing pool)"""
+        return password_hasher.run_sync(verify_and_update, plain_password, hashed_password)[0]
 
     def get_password_hash(self, password: str) -> str:
-        """Get password hash"""
-        return pwd_context.hash(password)
+        """Get password hash (on the password hashing pool)"""
+        return password_hasher.run_sync(pwd_context.hash, password)
+
+    def token_version(self, user: TblAdminUsers) -> str:
+        """
+        Token version (`ver` claim): fingerprint of the password hash, so
+        changing the password revokes tokens issued before the change
+        """
+        return hashlib.sha256(user.hashed_password.encode()).hexdigest()[:16]
+
+    def principal_snapshot(self, user: TblAdminUsers) -> Dict[str, Any]:
+        """Column values of an admin user for the principal cache (in-process only, keeps hashed_password)"""
+        return self._to_snapshot(user, include_secrets=True)
+
+    def principal_from_snapshot(self, snapshot: Dict[str, Any]) -> TblAdminUsers:
+        """
+        Detached admin user rebuilt from the principal cache. It has an
+        identity, so db.add() on it (e.g. profile updates) issues an UPDATE
+        """
+        user = self._from_snapshot(snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def invalidate_principal(self, user_id: int) -> None:
+        """Drop cached principals of a user (all token versions)"""
+        if principal_cache is not None:
+            principal_cache.invalidate(user_id, "principal")
 
     def create(
         self, 
@@ -126,6 +177,7 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_principal(db_obj.id)
         return db_obj
 
     def remove(self, db: Session, *, id: int, deleted_by: str = None) -> TblAdminUsers:
@@ -140,6 +192,7 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
                 obj.deleted_by = deleted_by
             db.add(obj)
             db.commit()
+            self.invalidate_principal(obj.id)
         return obj
 
     def update_password(
@@ -158,6 +211,7 @@ class CRUDAdminUser(CRUDBase[TblAdminUsers, AdminUserCreate, AdminUserUpdate]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self.invalidate_principal(db_obj.id)
         return db_obj
 
     def is_active(self, user: TblAdminUsers) -> bool:
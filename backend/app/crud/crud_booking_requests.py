@@ -1,9 +1,9 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from app.crud.base import CRUDBase
-from app.models.models import TblBookingRequests
+from app.models.models import TblBookingRequests, TblCustomers, TblFacilities, TblRooms
 from app.schemas.booking_requests import BookingRequestCreate, BookingRequestUpdate
 
 
@@ -61,5 +61,31 @@ class CRUDBookingRequest(CRUDBase[TblBookingRequests, BookingRequestCreate, Book
             )
         ).offset(skip).limit(limit).all()
 
+    def load_relations(
+        self,
+        db: Session,
+        bookings: List[TblBookingRequests],
+        *,
+        customers: bool = True,
+        rooms: bool = True,
+        facilities: bool = True
+    ) -> Dict[str, Dict[int, Any]]:
+        """
+        Batch load related customers, rooms and facilities for a list of bookings.
+        Runs one IN (...) query per entity type instead of one query per booking.
+        Returns {"customers": {id: obj}, "rooms": {id: obj}, "facilities": {id: obj}}
+        """
+        def load(model, attr: str, enabled: bool) -> Dict[int, Any]:
+            ids = {getattr(b, attr) for b in bookings if getattr(b, attr)}
+            if not enabled or not ids:
+                return {}
+            return {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids)).all()}
+
+        return {
+            "customers": load(TblCustomers, "customer_id", customers),
+            "rooms": load(TblRooms, "room_id", rooms),
+            "facilities": load(TblFacilities, "facility_id", facilities)
+        }
+
 
 booking_request = CRUDBookingRequest(TblBookingRequests)
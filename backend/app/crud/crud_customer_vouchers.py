@@ -1,11 +1,29 @@
-from typing import List, Optional
+import random
+import time
+from typing import List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_, select
 
 from app.crud.base import CRUDBase
-from app.models.models import TblCustomerVouchers
+from app.crud.crud_usage_counters import COUNTER_PROMOTION, usage_counters
+from app.models.models import TblCustomerVouchers, TblPromotions
 from app.schemas.customer_vouchers import CustomerVoucherCreate, CustomerVoucherUpdate
 
+# Kết quả của claim_promotion
+CLAIM_OK = "claimed"
+CLAIM_LIMIT_REACHED = "limit_reached"
+CLAIM_ALREADY_CLAIMED = "already_claimed"
+
+# Số lần thử lại claim khi MySQL báo deadlock (1213)
+CLAIM_DEADLOCK_RETRIES = 3
+MYSQL_DEADLOCK = 1213
+
+
+def _is_deadlock(error: OperationalError) -> bool:
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] == MYSQL_DEADLOCK
+
 
 class CRUDCustomerVoucher(CRUDBase[TblCustomerVouchers, CustomerVoucherCreate, CustomerVoucherUpdate]):
     def get_by_customer(
@@ -63,5 +81,97 @@ class CRUDCustomerVoucher(CRUDBase[TblCustomerVouchers, CustomerVoucherCreate, C
             )
         ).offset(skip).limit(limit).all()
 
+    def claim_promotion(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        customer_id: int,
+        promotion_id: int
+    ) -> Tuple[str, Optional[TblCustomerVouchers], Optional[int]]:
+        """
+        Give the customer one slot of a promotion without locking it up front.
+        The slot is taken first with a conditional
+        UPDATE ... SET used_count = used_count + 1 WHERE used_count < max_usage,
+        then the claim row is inserted in the same transaction
+        (uq_customer_vouchers_live_claim rejects a second live claim, which
+        rolls the slot back) and the transaction is committed right away, so
+        the promotion row is only locked for that short transaction. With
+        USAGE_COUNTER_STRIPES the slot is taken from one of the promotion's
+        counter slots instead and the promotion row is not written at all.
+        A deadlock (MySQL 1213) is retried up to CLAIM_DEADLOCK_RETRIES times.
+        Returns (CLAIM_OK, customer_voucher, used_count) or (CLAIM_LIMIT_REACHED
+        | CLAIM_ALREADY_CLAIMED, None, None).
+        """
+        if usage_counters.enabled:
+            usage_counters.ensure_slots(db, COUNTER_PROMOTION, promotion_id)
+
+        for attempt in range(CLAIM_DEADLOCK_RETRIES + 1):
+            try:
+                return self._claim_once(
+                    db, tenant_id=tenant_id, customer_id=customer_id, promotion_id=promotion_id
+                )
+            except OperationalError as e:
+                db.rollback()
+                if not _is_deadlock(e) or attempt == CLAIM_DEADLOCK_RETRIES:
+                    raise
+                time.sleep(random.uniform(0, 0.01 * (2 ** attempt)))
+
+    def _claim_once(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        customer_id: int,
+        promotion_id: int
+    ) -> Tuple[str, Optional[TblCustomerVouchers], Optional[int]]:
+        """One claim transaction: take a slot, then insert the claim row"""
+        # Khóa X trên row promotion (hoặc slot) trước: lúc insert, kiểm tra foreign key
+        # promotion_id chỉ cần khóa S mà transaction này đã giữ, không deadlock giữa các claim
+        if usage_counters.enabled:
+            taken = usage_counters.take(db, COUNTER_PROMOTION, promotion_id)
+        else:
+            taken = db.query(TblPromotions).filter(
+                TblPromotions.id == promotion_id,
+                TblPromotions.tenant_id == tenant_id,
+                TblPromotions.deleted == 0,
+                or_(
+                    TblPromotions.max_usage.is_(None),
+                    func.coalesce(TblPromotions.used_count, 0) < TblPromotions.max_usage
+                )
+            ).update(
+                {TblPromotions.used_count: func.coalesce(TblPromotions.used_count, 0) + 1},
+                synchronize_session=False
+            )
+        if not taken:
+            # Giữ thứ tự kiểm tra cũ: hết lượt được báo trước "đã lưu"
+            db.rollback()
+            return CLAIM_LIMIT_REACHED, None, None
+
+        cv = TblCustomerVouchers(
+            tenant_id=tenant_id,
+            customer_id=customer_id,
+            promotion_id=promotion_id,
+            status='assigned',
+            is_used=False,
+        )
+        db.add(cv)
+        try:
+            db.flush()
+        except IntegrityError:
+            # Claim trùng: rollback trả lại lượt vừa giữ
+            db.rollback()
+            return CLAIM_ALREADY_CLAIMED, None, None
+
+        if usage_counters.enabled:
+            db.commit()
+            return CLAIM_OK, cv, usage_counters.committed(db, COUNTER_PROMOTION, promotion_id, tenant_id)
+
+        # Trong cùng transaction nên đọc được giá trị vừa tăng của chính mình
+        used_count = db.execute(
+            select(TblPromotions.used_count).where(TblPromotions.id == promotion_id)
+        ).scalar()
+        db.commit()
+        return CLAIM_OK, cv, used_count
 
 customer_voucher = CRUDCustomerVoucher(TblCustomerVouchers)
@@ -1,9 +1,9 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_
 
 from app.crud.base import CRUDBase
-from app.models.models import TblCustomers
+from app.models.models import TblBookingRequests, TblCustomers, TblCustomerVouchers, TblRoomStays
 from app.schemas.customers import CustomerCreate, CustomerUpdate
 
 
@@ -60,5 +60,136 @@ class CRUDCustomer(CRUDBase[TblCustomers, CustomerCreate, CustomerUpdate]):
             )
         ).offset(skip).limit(limit).all()
 
+    def get_multi_with_stats(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        search_query: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        skip: int = 0,
+        limit: int = 50
+    ) -> Tuple[List[Any], int]:
+        """
+        Customers of a page together with their aggregates
+        (total_bookings, last_booking, vouchers_count, total_spent).
+        Aggregates come from grouped subqueries joined to the page query,
+        so they can be sorted on and do not cost a query per customer.
+        Returns (rows, total_count); each row is (TblCustomers, total_bookings,
+        last_booking, vouchers_count, total_spent).
+        """
+        booking_stats = db.query(
+            TblBookingRequests.customer_id.label("customer_id"),
+            func.count(TblBookingRequests.id).label("total_bookings"),
+            func.max(TblBookingRequests.created_at).label("last_booking")
+        ).filter(
+            and_(
+                TblBookingRequests.tenant_id == tenant_id,
+                TblBookingRequests.deleted == 0
+            )
+        ).group_by(TblBookingRequests.customer_id).subquery()
+
+        voucher_stats = db.query(
+            TblCustomerVouchers.customer_id.label("customer_id"),
+            func.count(TblCustomerVouchers.id).label("vouchers_count")
+        ).filter(
+            and_(
+                TblCustomerVouchers.tenant_id == tenant_id,
+                TblCustomerVouchers.deleted == 0
+            )
+        ).group_by(TblCustomerVouchers.customer_id).subquery()
+
+        spent_stats = db.query(
+            TblRoomStays.customer_id.label("customer_id"),
+            func.sum(TblRoomStays.total_amount).label("total_spent")
+        ).filter(
+            and_(
+                TblRoomStays.tenant_id == tenant_id,
+                TblRoomStays.status != 'cancelled',
+                TblRoomStays.deleted == 0
+            )
+        ).group_by(TblRoomStays.customer_id).subquery()
+
+        total_bookings = func.coalesce(booking_stats.c.total_bookings, 0)
+        vouchers_count = func.coalesce(voucher_stats.c.vouchers_count, 0)
+        total_spent = func.coalesce(spent_stats.c.total_spent, 0)
+        sort_columns = {
+            "created_at": TblCustomers.created_at,
+            "total_bookings": total_bookings,
+            "last_booking": booking_stats.c.last_booking,
+            "vouchers_count": vouchers_count,
+            "total_spent": total_spent
+        }
+
+        filters = [TblCustomers.tenant_id == tenant_id, TblCustomers.deleted == 0]
+        if search_query:
+            filters.append(or_(
+                TblCustomers.name.ilike(f"%{search_query}%"),
+                TblCustomers.email.ilike(f"%{search_query}%"),
+                TblCustomers.phone.ilike(f"%{search_query}%")
+            ))
+
+        total_count = db.query(func.count(TblCustomers.id)).filter(and_(*filters)).scalar() or 0
+
+        sort_column = sort_columns.get(sort_by, TblCustomers.created_at)
+        order = sort_column.desc() if sort_order == "desc" else sort_column.asc()
+
+        rows = db.query(
+            TblCustomers,
+            total_bookings.label("total_bookings"),
+            booking_stats.c.last_booking,
+            vouchers_count.label("vouchers_count"),
+            total_spent.label("total_spent")
+        ).outerjoin(
+            booking_stats, booking_stats.c.customer_id == TblCustomers.id
+        ).outerjoin(
+            voucher_stats, voucher_stats.c.customer_id == TblCustomers.id
+        ).outerjoin(
+            spent_stats, spent_stats.c.customer_id == TblCustomers.id
+        ).filter(
+            and_(*filters)
+        ).order_by(order, TblCustomers.id.desc()).offset(skip).limit(limit).all()
+
+        return rows, total_count
+
+    def get_latest_bookings(
+        self,
+        db: Session,
+        *,
+        tenant_id: int,
+        customer_ids: List[int]
+    ) -> Dict[int, TblBookingRequests]:
+        """Most recent booking of each customer, for a whole page in one query"""
+        if not customer_ids:
+            return {}
+
+        latest = db.query(
+            TblBookingRequests.customer_id.label("customer_id"),
+            func.max(TblBookingRequests.created_at).label("last_booking")
+        ).filter(
+            and_(
+                TblBookingRequests.customer_id.in_(customer_ids),
+                TblBookingRequests.tenant_id == tenant_id,
+                TblBookingRequests.deleted == 0
+            )
+        ).group_by(TblBookingRequests.customer_id).subquery()
+
+        bookings = db.query(TblBookingRequests).join(
+            latest,
+            and_(
+                TblBookingRequests.customer_id == latest.c.customer_id,
+                TblBookingRequests.created_at == latest.c.last_booking
+            )
+        ).filter(
+            and_(
+                TblBookingRequests.tenant_id == tenant_id,
+                TblBookingRequests.deleted == 0
+            )
+        ).order_by(TblBookingRequests.id).all()
+
+        # Nếu trùng created_at, giữ booking có id lớn nhất
+        return {booking.customer_id: booking for booking in bookings}
+
 
 customer = CRUDCustomer(TblCustomers)
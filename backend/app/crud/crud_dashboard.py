@@ -0,0 +1,197 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, desc, func, select
+from datetime import date, datetime, timedelta
+
+from app.models.models import (
+    TblBookingRequests, TblCustomers, TblFacilities, TblPromotions, TblRooms
+)
+
+
+def _count_if(condition) -> Any:
+    """Conditional aggregate: number of rows matching `condition`"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _tenant_filter(model, tenant_id: Optional[int]) -> list:
+    """Soft-delete filter, scoped to a tenant unless tenant_id is None (super admin)"""
+    filters = [model.deleted == 0]
+    if tenant_id:
+        filters.append(model.tenant_id == tenant_id)
+    return filters
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """DATE() returns a date on MySQL and an ISO string on SQLite"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+class CRUDDashboard:
+    """
+    Dashboard aggregation engine.
+    Each method answers one block of the dashboard with a single grouped
+    statement using conditional aggregates instead of one COUNT per metric.
+    """
+
+    def get_booking_summary(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int],
+        start_date: datetime,
+        end_date: datetime,
+        previous_start: datetime
+    ) -> Dict[str, int]:
+        """Booking counters for the current period plus confirmed count of the previous period"""
+        in_period = and_(
+            TblBookingRequests.created_at >= start_date,
+            TblBookingRequests.created_at <= end_date
+        )
+        in_previous = and_(
+            TblBookingRequests.created_at >= previous_start,
+            TblBookingRequests.created_at < start_date
+        )
+        row = db.query(
+            _count_if(in_period).label("total"),
+            _count_if(and_(in_period, TblBookingRequests.status == 'pending')).label("pending"),
+            _count_if(and_(in_period, TblBookingRequests.status == 'confirmed')).label("confirmed"),
+            _count_if(and_(in_period, TblBookingRequests.status == 'cancelled')).label("cancelled"),
+            _count_if(TblBookingRequests.created_at >= start_date).label("recent"),
+            _count_if(and_(in_previous, TblBookingRequests.status == 'confirmed')).label("previous_confirmed")
+        ).filter(
+            and_(
+                TblBookingRequests.created_at >= previous_start,
+                *_tenant_filter(TblBookingRequests, tenant_id)
+            )
+        ).one()
+
+        return {key: int(value or 0) for key, value in row._asdict().items()}
+
+    def get_daily_bookings(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int],
+        days: int = 7
+    ) -> List[Dict[str, Any]]:
+        """Bookings per calendar day for the last `days` days (oldest first, missing days = 0)"""
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        first_day = today - timedelta(days=days - 1)
+        booking_day = func.date(TblBookingRequests.created_at)
+
+        rows = db.query(
+            booking_day.label("day"),
+            func.count(TblBookingRequests.id).label("count")
+        ).filter(
+            and_(
+                TblBookingRequests.created_at >= first_day,
+                *_tenant_filter(TblBookingRequests, tenant_id)
+            )
+        ).group_by(booking_day).all()
+
+        counts = {_as_date(row.day): row.count for row in rows}
+        daily_bookings = []
+        for i in range(days):
+            day = (first_day + timedelta(days=i)).date()
+            daily_bookings.append({
+                "date": day.strftime("%m/%d"),
+                "bookings": counts.get(day, 0)
+            })
+        return daily_bookings
+
+    def get_customer_summary(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int],
+        start_date: datetime,
+        end_date: datetime,
+        previous_start: datetime
+    ) -> Dict[str, int]:
+        """Total customers, new customers in the period and in the previous period"""
+        row = db.query(
+            func.count(TblCustomers.id).label("total"),
+            _count_if(and_(
+                TblCustomers.created_at >= start_date,
+                TblCustomers.created_at <= end_date
+            )).label("new_current"),
+            _count_if(and_(
+                TblCustomers.created_at >= previous_start,
+                TblCustomers.created_at < start_date
+            )).label("new_previous")
+        ).filter(and_(*_tenant_filter(TblCustomers, tenant_id))).one()
+
+        return {key: int(value or 0) for key, value in row._asdict().items()}
+
+    def get_room_type_counts(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """Room count per room_type (the sum is the total room count)"""
+        rows = db.query(
+            TblRooms.room_type,
+            func.count(TblRooms.id).label("count")
+        ).filter(and_(*_tenant_filter(TblRooms, tenant_id))).group_by(TblRooms.room_type).all()
+
+        return [{"type": row.room_type, "count": row.count} for row in rows]
+
+    def get_catalog_summary(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int]
+    ) -> Dict[str, int]:
+        """Facility count and total/active promotion counts in one statement"""
+        facilities_count = select(func.count(TblFacilities.id)).where(
+            and_(*_tenant_filter(TblFacilities, tenant_id))
+        ).scalar_subquery()
+
+        row = db.query(
+            facilities_count.label("facilities"),
+            func.count(TblPromotions.id).label("promotions"),
+            _count_if(TblPromotions.status == 'active').label("active_promotions")
+        ).filter(and_(*_tenant_filter(TblPromotions, tenant_id))).one()
+
+        return {key: int(value or 0) for key, value in row._asdict().items()}
+
+    def get_recent_bookings(
+        self,
+        db: Session,
+        *,
+        tenant_id: Optional[int],
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Latest bookings with customer and room resolved through outer joins"""
+        rows = db.query(TblBookingRequests, TblCustomers, TblRooms).outerjoin(
+            TblCustomers, TblCustomers.id == TblBookingRequests.customer_id
+        ).outerjoin(
+            TblRooms, TblRooms.id == TblBookingRequests.room_id
+        ).filter(
+            and_(*_tenant_filter(TblBookingRequests, tenant_id))
+        ).order_by(desc(TblBookingRequests.created_at)).limit(limit).all()
+
+        recent_bookings = []
+        for booking, customer, room in rows:
+            recent_bookings.append({
+                "id": booking.id,
+                "customer_name": customer.name if customer else "Unknown",
+                "customer_phone": customer.phone if customer else "",
+                "room_name": room.room_name if room else "Unknown Room",
+                "room_type": room.room_type if room else "",
+                "check_in_date": booking.check_in_date.isoformat() if booking.check_in_date else None,
+                "check_out_date": booking.check_out_date.isoformat() if booking.check_out_date else None,
+                "status": booking.status,
+                "created_at": booking.created_at.isoformat() if booking.created_at else None
+            })
+        return recent_bookings
+
+
+dashboard = CRUDDashboard()
@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
+from app.core.cache import catalog_cache
 from app.crud.base import CRUDBase
 from app.models.models import TblFacilities
 from app.schemas.facilities import FacilityCreate, FacilityUpdate
@@ -60,4 +61,4 @@ class CRUDFacility(CRUDBase[TblFacilities, FacilityCreate, FacilityUpdate]):
         ).first()
 
 
-facility = CRUDFacility(TblFacilities)
+facility = CRUDFacility(TblFacilities, cache=catalog_cache)
@@ -1,7 +1,10 @@
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 
+from app.core.cache import catalog_cache, is_miss
+from app.core.zalo_credentials import zalo_credentials
 from app.crud.base import CRUDBase
 from app.models.models import TblHotelBrands
 from app.schemas.hotel_brands import HotelBrandCreate, HotelBrandUpdate
@@ -41,5 +44,37 @@ class CRUDHotelBrand(CRUDBase[TblHotelBrands, HotelBrandCreate, HotelBrandUpdate
             )
         ).offset(skip).limit(limit).all()
 
+    async def get_by_tenant_async(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int
+    ) -> Optional[TblHotelBrands]:
+        """
+        Get the tenant's hotel brand (cached; a missing brand is not cached).
+        zalo_secret_key is not kept in the catalog cache; on a hit it comes
+        from the in-process Zalo credentials cache.
+        """
+        key = self.cache.make_key(tenant_id, self.cache_namespace, op="tenant") if self.cache else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if not is_miss(cached):
+                brand = self._from_snapshot(cached)
+                brand.zalo_secret_key = await zalo_credentials.tenant_secret_key(tenant_id)
+                return brand
+
+        result = await db.execute(
+            select(TblHotelBrands).where(
+                and_(
+                    TblHotelBrands.tenant_id == tenant_id,
+                    TblHotelBrands.deleted == 0
+                )
+            ).limit(1)
+        )
+        brand = result.scalars().first()
+        if key is not None and brand is not None:
+            self.cache.set(key, self._to_snapshot(brand))
+        return brand
+
 
-hotel_brand = CRUDHotelBrand(TblHotelBrands)
+hotel_brand = CRUDHotelBrand(TblHotelBrands, cache=catalog_cache)
@@ -1,8 +1,10 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
+from app.core.cache import catalog_cache
 from app.crud.base import CRUDBase
+from app.crud.crud_usage_counters import COUNTER_PROMOTION, usage_counters
 from app.models.models import TblPromotions
 from app.schemas.promotions import PromotionCreate, PromotionUpdate
 
@@ -59,5 +61,20 @@ class CRUDPromotion(CRUDBase[TblPromotions, PromotionCreate, PromotionUpdate]):
             )
         ).offset(skip).limit(limit).all()
 
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: TblPromotions,
+        obj_in: Union[PromotionUpdate, Dict[str, Any]],
+        updated_by: str = None
+    ) -> TblPromotions:
+        """Update promotion; with striped usage counters, re-split max_usage and resync used_count"""
+        obj = super().update(db, db_obj=db_obj, obj_in=obj_in, updated_by=updated_by)
+        if usage_counters.enabled:
+            usage_counters.rebalance(db, COUNTER_PROMOTION, obj)
+            self.invalidate_cache(obj.tenant_id)
+        return obj
+
 
-promotion = CRUDPromotion(TblPromotions)
+promotion = CRUDPromotion(TblPromotions, cache=catalog_cache)
@@ -1,13 +1,20 @@
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 
+from app.core.availability import occupancy_calendar
+from app.core.cache import catalog_cache
 from app.crud.base import CRUDBase
 from app.models.models import TblRooms
 from app.schemas.rooms import RoomCreate, RoomUpdate
 
 
 class CRUDRoom(CRUDBase[TblRooms, RoomCreate, RoomUpdate]):
+    # Số phòng tối đa của một tenant được xét khi tìm phòng trống
+    availability_room_limit = 10000
+
     def get_by_room_type(
         self, 
         db: Session, 
@@ -48,6 +55,65 @@ class CRUDRoom(CRUDBase[TblRooms, RoomCreate, RoomUpdate]):
             
         return query.all()
 
+    async def get_availability_async(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: int,
+        check_in: date,
+        check_out: date,
+        adults: int = None,
+        children: int = None
+    ) -> Dict[str, Any]:
+        """
+        Rooms fitting the guests that are free on every night of
+        [check_in, check_out), plus free-room counts per night by room_type
+        """
+        nights = (check_out - check_in).days
+        rooms = await self.get_multi_async(db, tenant_id=tenant_id, limit=self.availability_room_limit)
+        # Cùng điều kiện sức chứa với get_available_rooms
+        if adults:
+            rooms = [item for item in rooms if (item.capacity_adults or 0) >= adults]
+        if children:
+            rooms = [item for item in rooms if (item.capacity_children or 0) >= children]
+
+        occupied = await occupancy_calendar.occupied(db, tenant_id=tenant_id, start=check_in, end=check_out)
+
+        free_rooms = []
+        by_type: Dict[str, Dict[str, Any]] = {}
+        for item in rooms:
+            entry = by_type.setdefault(item.room_type, {"total_rooms": 0, "free": 0, "nightly": [0] * nights})
+            entry["total_rooms"] += 1
+            bits = occupied.get(item.id, 0)
+            if not bits:
+                entry["free"] += 1
+                free_rooms.append(item)
+                continue
+            for night in range(nights):
+                if not bits >> night & 1:
+                    entry["nightly"][night] += 1
+
+        room_types = []
+        for room_type, entry in sorted(by_type.items()):
+            room_types.append({
+                "room_type": room_type,
+                "total_rooms": entry["total_rooms"],
+                "available_rooms": entry["free"],
+                "nightly": [
+                    {"date": check_in + timedelta(days=night), "available": count + entry["free"]}
+                    for night, count in enumerate(entry["nightly"])
+                ]
+            })
+
+        return {
+            "tenant_id": tenant_id,
+            "check_in": check_in,
+            "check_out": check_out,
+            "nights": nights,
+            "rooms": free_rooms,
+            "room_types": room_types
+        }
+
     def search_rooms(
         self,
         db: Session,
@@ -68,4 +134,4 @@ class CRUDRoom(CRUDBase[TblRooms, RoomCreate, RoomUpdate]):
         ).offset(skip).limit(limit).all()
 
 
-room = CRUDRoom(TblRooms)
+room = CRUDRoom(TblRooms, cache=catalog_cache)
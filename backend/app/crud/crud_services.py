@@ -2,6 +2,7 @@ from typing import List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
+from app.core.cache import catalog_cache
 from app.crud.base import CRUDBase
 from app.models.models import TblServices
 from app.schemas.services import ServiceCreate, ServiceUpdate
@@ -61,4 +62,4 @@ class CRUDService(CRUDBase[TblServices, ServiceCreate, ServiceUpdate]):
         ).offset(skip).limit(limit).all()
 
 
-service = CRUDService(TblServices)
+service = CRUDService(TblServices, cache=catalog_cache)
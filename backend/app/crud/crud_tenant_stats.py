@@ -0,0 +1,201 @@
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, case, func, select
+from datetime import datetime
+
+from app.models.models import (
+    TblBookingRequests, TblCustomers, TblFacilities, TblPromotions,
+    TblRooms, TblServices, TblTenants, TblTenantStats, TblVouchers
+)
+
+
+# Đóng góp của một bản ghi (chưa xóa) vào các cột thống kê
+STAT_CONTRIBUTIONS: Dict[type, Callable[[Any], Dict[str, int]]] = {
+    TblRooms: lambda obj: {"total_rooms": 1},
+    TblFacilities: lambda obj: {"total_facilities": 1},
+    TblServices: lambda obj: {"total_services": 1},
+    TblCustomers: lambda obj: {"total_customers": 1},
+    TblBookingRequests: lambda obj: {
+        "total_bookings": 1,
+        "pending_bookings": int(obj.status == 'pending'),
+        "confirmed_bookings": int(obj.status == 'confirmed'),
+        "cancelled_bookings": int(obj.status == 'cancelled'),
+    },
+    TblVouchers: lambda obj: {
+        "total_vouchers": 1,
+        "active_vouchers": int(obj.status == 'active'),
+    },
+    TblPromotions: lambda obj: {
+        "total_promotions": 1,
+        "active_promotions": int(obj.status == 'active'),
+    },
+}
+
+STAT_COLUMNS = [
+    "total_rooms", "total_facilities", "total_services", "total_customers",
+    "total_bookings", "pending_bookings", "confirmed_bookings", "cancelled_bookings",
+    "total_vouchers", "active_vouchers", "total_promotions", "active_promotions",
+]
+
+
+def _count_if(condition) -> Any:
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+class CRUDTenantStats:
+    """
+    Rollup thống kê theo tenant (tbl_tenant_stats).
+    Các counter được cộng/trừ bằng UPDATE nguyên tử trong cùng transaction
+    với thay đổi dữ liệu; rebuild() đếm lại từ các bảng nguồn.
+    """
+
+    def snapshot(self, obj: Any) -> Dict[str, int]:
+        """Phần đóng góp hiện tại của obj vào thống kê (rỗng nếu không theo dõi hoặc đã xóa)"""
+        contribution = STAT_CONTRIBUTIONS.get(type(obj))
+        if contribution is None or obj.deleted:
+            return {}
+        return contribution(obj)
+
+    def record(self, db: Session, obj: Any, before: Dict[str, int], removed: bool = False) -> None:
+        """
+        Ghi nhận thay đổi của obj so với snapshot `before`.
+        Không commit - caller commit cùng với thay đổi dữ liệu.
+        """
+        if type(obj) not in STAT_CONTRIBUTIONS or not obj.tenant_id:
+            return
+        after = {} if removed else self.snapshot(obj)
+        deltas = {
+            column: after.get(column, 0) - before.get(column, 0)
+            for column in set(before) | set(after)
+        }
+        self.apply_deltas(db, tenant_id=obj.tenant_id, deltas=deltas)
+
+    def apply_deltas(self, db: Session, *, tenant_id: int, deltas: Dict[str, int]) -> None:
+        """UPDATE ... SET col = col + delta; dựng lại row nếu tenant chưa có thống kê"""
+        values = {
+            column: getattr(TblTenantStats, column) + delta
+            for column, delta in deltas.items() if delta
+        }
+        if not values:
+            return
+
+        updated = db.query(TblTenantStats).filter(
+            TblTenantStats.tenant_id == tenant_id
+        ).update(values, synchronize_session=False)
+
+        if updated == 0:
+            # Chưa có row: đếm lại từ nguồn (đã bao gồm thay đổi hiện tại sau khi flush)
+            db.flush()
+            self.rebuild(db, tenant_id=tenant_id)
+
+    def count_from_source(self, db: Session, *, tenant_id: int) -> Dict[str, int]:
+        """Đếm lại toàn bộ counters từ các bảng nguồn"""
+        def live(model):
+            return and_(model.tenant_id == tenant_id, model.deleted == 0)
+
+        def count(model):
+            return select(func.count(model.id)).where(live(model)).scalar_subquery()
+
+        def count_status(model, status):
+            return select(func.count(model.id)).where(
+                and_(live(model), model.status == status)
+            ).scalar_subquery()
+
+        booking_row = db.query(
+            func.count(TblBookingRequests.id).label("total_bookings"),
+            _count_if(TblBookingRequests.status == 'pending').label("pending_bookings"),
+            _count_if(TblBookingRequests.status == 'confirmed').label("confirmed_bookings"),
+            _count_if(TblBookingRequests.status == 'cancelled').label("cancelled_bookings"),
+            count(TblRooms).label("total_rooms"),
+            count(TblFacilities).label("total_facilities"),
+            count(TblServices).label("total_services"),
+            count(TblCustomers).label("total_customers"),
+            count(TblVouchers).label("total_vouchers"),
+            count_status(TblVouchers, 'active').label("active_vouchers"),
+            count(TblPromotions).label("total_promotions"),
+            count_status(TblPromotions, 'active').label("active_promotions")
+        ).filter(live(TblBookingRequests)).one()
+
+        return {key: int(value or 0) for key, value in booking_row._asdict().items()}
+
+    def rebuild(self, db: Session, *, tenant_id: int) -> TblTenantStats:
+        """Dựng lại row thống kê của tenant từ các bảng nguồn (không commit)"""
+        counts = self.count_from_source(db, tenant_id=tenant_id)
+        stats = db.query(TblTenantStats).filter(TblTenantStats.tenant_id == tenant_id).first()
+
+        if stats is None:
+            try:
+                # Savepoint: một request khác có thể vừa tạo row cho cùng tenant
+                with db.begin_nested():
+                    stats = TblTenantStats(tenant_id=tenant_id, **counts, rebuilt_at=datetime.now())
+                    db.add(stats)
+                return stats
+            except IntegrityError:
+                stats = db.query(TblTenantStats).filter(TblTenantStats.tenant_id == tenant_id).one()
+
+        for column, value in counts.items():
+            setattr(stats, column, value)
+        stats.rebuilt_at = datetime.now()
+        db.add(stats)
+        db.flush()
+        return stats
+
+    def get(self, db: Session, *, tenant_id: int) -> Dict[str, int]:
+        """Đọc thống kê của một tenant (dựng lại lần đầu nếu chưa có)"""
+        stats = db.query(TblTenantStats).filter(TblTenantStats.tenant_id == tenant_id).first()
+        if stats is None:
+            stats = self.rebuild(db, tenant_id=tenant_id)
+            db.commit()
+        return {column: getattr(stats, column) or 0 for column in STAT_COLUMNS}
+
+    def get_totals(self, db: Session) -> Dict[str, int]:
+        """Tổng thống kê toàn hệ thống (cộng các row theo tenant)"""
+        self.ensure_all(db)
+        row = db.query(
+            *[func.coalesce(func.sum(getattr(TblTenantStats, column)), 0).label(column)
+              for column in STAT_COLUMNS]
+        ).one()
+        return {key: int(value or 0) for key, value in row._asdict().items()}
+
+    def get_for(self, db: Session, *, tenant_id: Optional[int]) -> Dict[str, int]:
+        """Thống kê của tenant, hoặc toàn hệ thống khi tenant_id là None (super admin)"""
+        if tenant_id:
+            return self.get(db, tenant_id=tenant_id)
+        return self.get_totals(db)
+
+    def ensure_all(self, db: Session) -> None:
+        """Tạo row thống kê cho các tenant chưa có (chỉ chạy khi thiếu)"""
+        missing = db.query(TblTenants.id).filter(
+            ~TblTenants.id.in_(select(TblTenantStats.tenant_id))
+        ).all()
+        for (tenant_id,) in missing:
+            self.rebuild(db, tenant_id=tenant_id)
+        if missing:
+            db.commit()
+
+    def reconcile(self, db: Session, tenant_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """
+        Dựng lại thống kê từ các bảng nguồn và trả về danh sách sai lệch đã sửa.
+        Mặc định chạy cho mọi tenant.
+        """
+        if tenant_ids is None:
+            tenant_ids = [row.id for row in db.query(TblTenants.id).all()]
+
+        drift = []
+        for tenant_id in tenant_ids:
+            stats = db.query(TblTenantStats).filter(TblTenantStats.tenant_id == tenant_id).first()
+            before = {column: getattr(stats, column) for column in STAT_COLUMNS} if stats else None
+            after = self.rebuild(db, tenant_id=tenant_id)
+            changes = {
+                column: (before.get(column) if before else None, getattr(after, column))
+                for column in STAT_COLUMNS
+                if before is None or before.get(column) != getattr(after, column)
+            }
+            if changes:
+                drift.append({"tenant_id": tenant_id, "changes": changes})
+            db.commit()
+        return drift
+
+
+tenant_stats = CRUDTenantStats()
@@ -0,0 +1,196 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.image_variants import RASTER_EXTENSIONS, VARIANT_DIR
+from app.core.pagination import decode_cursor, encode_cursor
+from app.crud.base import CRUDBase
+from app.models.models import TblUploadedFiles
+from app.schemas.uploaded_files import UploadedFileCreate
+
+# Thư mục con theo loại file: uploads/<tenant>/<folder>/<file_type>s/<filename>
+FILE_TYPES = ("image", "video", "document")
+
+
+def parse_upload_path(relative_path: str) -> Optional[Dict[str, Any]]:
+    """tenant_id / folder / file_type of a path relative to UPLOAD_DIR, or None if it is not an upload"""
+    parts = relative_path.replace(os.sep, "/").split("/")
+    if len(parts) != 4 or not parts[2].endswith("s") or parts[2][:-1] not in FILE_TYPES:
+        return None
+    tenant_folder, folder, type_dir, filename = parts
+    if tenant_folder == "global":
+        tenant_id = None
+    elif tenant_folder.startswith("tenant_") and tenant_folder[7:].isdigit():
+        tenant_id = int(tenant_folder[7:])
+    else:
+        return None
+    return {"tenant_id": tenant_id, "folder": folder, "file_type": type_dir[:-1], "filename": filename}
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_size(path: str) -> Tuple[Optional[int], Optional[int]]:
+    """(width, height) from the image header, (None, None) if unreadable"""
+    try:
+        from PIL import Image
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+class CRUDUploadedFile(CRUDBase[TblUploadedFiles, UploadedFileCreate, UploadedFileCreate]):
+    def _listing_filters(self, tenant_id: Optional[int], folder: Optional[str], file_type: Optional[str]) -> List[Any]:
+        filters = [TblUploadedFiles.tenant_id == tenant_id, TblUploadedFiles.deleted == 0]
+        if folder:
+            filters.append(TblUploadedFiles.folder == folder)
+        if file_type:
+            filters.append(TblUploadedFiles.file_type == file_type)
+        return filters
+
+    async def create_async(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: UploadedFileCreate,
+        tenant_id: Optional[int],
+        created_by: str = None
+    ) -> TblUploadedFiles:
+        """Index an uploaded file"""
+        db_obj = TblUploadedFiles(**jsonable_encoder(obj_in), tenant_id=tenant_id, created_by=created_by)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def list_files_async(
+        self,
+        db: AsyncSession,
+        *,
+        tenant_id: Optional[int],
+        folder: Optional[str] = None,
+        file_type: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 50,
+        after: Optional[str] = None
+    ) -> Tuple[List[TblUploadedFiles], int, Optional[str]]:
+        """
+        Newest-first listing. Returns (items, total, next_cursor); with
+        `after` (a previous next_cursor) the page is fetched by keyset on id
+        instead of OFFSET. Raises ValueError on a bad cursor.
+        """
+        filters = self._listing_filters(tenant_id, folder, file_type)
+        total = (await db.execute(select(func.count(TblUploadedFiles.id)).where(and_(*filters)))).scalar()
+
+        stmt = select(TblUploadedFiles).where(and_(*filters))
+        if after:
+            cursor = decode_cursor(after)
+            if cursor["o"] != "id":
+                raise ValueError("Cursor không khớp với order_by")
+            stmt = stmt.where(TblUploadedFiles.id < cursor["id"])
+        else:
+            stmt = stmt.offset(skip)
+        stmt = stmt.order_by(TblUploadedFiles.id.desc()).limit(limit + 1)
+
+        items = (await db.execute(stmt)).scalars().all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor("id", items[-1].id, items[-1].id)
+        return items, total, next_cursor
+
+    async def remove_by_url_async(self, db: AsyncSession, *, url: str, deleted_by: str = None) -> Optional[TblUploadedFiles]:
+        """Soft delete the index row of a deleted file"""
+        result = await db.execute(
+            select(TblUploadedFiles).where(and_(TblUploadedFiles.url == url, TblUploadedFiles.deleted == 0))
+        )
+        obj = result.scalars().first()
+        if obj:
+            obj.deleted = 1
+            obj.deleted_at = datetime.utcnow()
+            obj.deleted_by = deleted_by
+            await db.commit()
+        return obj
+
+    def reconcile(self, db: Session, upload_dir: str) -> Dict[str, int]:
+        """
+        Rescan upload_dir and bring the index in line with the disk: index
+        files that have no row, restore rows of files that reappeared, refresh
+        changed sizes and soft delete rows whose file is gone.
+        """
+        rows = {row.url: row for row in db.execute(select(TblUploadedFiles)).scalars().all()}
+        summary = {"added": 0, "restored": 0, "updated": 0, "removed": 0}
+        seen = set()
+
+        for root, dirs, files in os.walk(upload_dir):
+            dirs[:] = [d for d in dirs if d != VARIANT_DIR]
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.join(root, name)
+                info = parse_upload_path(os.path.relpath(path, upload_dir))
+                if info is None:
+                    continue
+
+                url = "/uploads/" + os.path.relpath(path, upload_dir).replace(os.sep, "/")
+                seen.add(url)
+                stat = os.stat(path)
+                row = rows.get(url)
+
+                if row is not None and row.deleted == 0 and row.size == stat.st_size:
+                    continue
+
+                width, height = (None, None)
+                if info["file_type"] == "image" and os.path.splitext(name)[1].lower() in RASTER_EXTENSIONS:
+                    width, height = image_size(path)
+                values = {
+                    "size": stat.st_size,
+                    "sha256": file_sha256(path),
+                    "width": width,
+                    "height": height
+                }
+
+                if row is None:
+                    db.add(TblUploadedFiles(
+                        **info,
+                        url=url,
+                        created_at=datetime.fromtimestamp(stat.st_mtime),
+                        created_by="reconcile",
+                        **values
+                    ))
+                    summary["added"] += 1
+                    continue
+
+                for field, value in values.items():
+                    setattr(row, field, value)
+                if row.deleted:
+                    row.deleted, row.deleted_at, row.deleted_by = 0, None, None
+                    summary["restored"] += 1
+                else:
+                    summary["updated"] += 1
+                row.updated_by = "reconcile"
+
+        for url, row in rows.items():
+            if row.deleted == 0 and url not in seen:
+                row.deleted = 1
+                row.deleted_at = datetime.utcnow()
+                row.deleted_by = "reconcile"
+                summary["removed"] += 1
+
+        db.commit()
+        return summary
+
+
+uploaded_file = CRUDUploadedFile(TblUploadedFiles)
@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, func, or_, select, update
+
+from app.core.cache import catalog_cache
+from app.core.config import settings
+from app.db.session_async import AsyncSessionLocal
+from app.models.models import TblPromotions, TblUsageCounterSlots, TblVouchers
+
+logger = logging.getLogger(__name__)
+
+# Loại counter -> model có cột used_count / max_usage
+COUNTER_PROMOTION = "promotion"
+COUNTER_VOUCHER = "voucher"
+COUNTER_MODELS = {
+    COUNTER_PROMOTION: TblPromotions,
+    COUNTER_VOUCHER: TblVouchers,
+}
+
+CounterKey = Tuple[str, int]
+
+
+def split_quota(max_usage: Optional[int], used: List[int]) -> List[Optional[int]]:
+    """Quota của từng slot: lượt slot đã dùng + phần chia đều của số lượt còn lại"""
+    if max_usage is None:
+        return [None] * len(used)
+    remaining = max(0, max_usage - sum(used))
+    share, extra = divmod(remaining, len(used))
+    return [value + share + (1 if index < extra else 0) for index, value in enumerate(used)]
+
+
+class CRUDUsageCounters:
+    """
+    Striped counter cho used_count của promotion/voucher (tbl_usage_counter_slots).
+
+    Khi bật (USAGE_COUNTER_STRIPES > 0), mỗi lượt dùng không UPDATE row promotion
+    - row nóng mà mọi claim của một campaign đều tranh khóa - mà cộng vào một
+    trong N slot chọn ngẫu nhiên. max_usage được chia trước thành quota của từng
+    slot (reservation): slot chỉ nhận thêm lượt khi used < quota nên tổng không
+    bao giờ vượt max_usage; slot hết quota thì thử các slot còn trống.
+
+    Tổng = SUM(used) của các slot, đọc qua cache trong process
+    (USAGE_COUNTER_CACHE_TTL). used_count trên row gốc được gom lại từ các slot
+    sau mỗi USAGE_COUNTER_FLUSH_SECONDS và khi admin cập nhật bản ghi.
+    """
+
+    def __init__(self, stripes: int = 0, cache_ttl: float = 2.0, flush_interval: float = 5.0):
+        self.stripes = stripes
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        # key -> (tổng, hết hạn lúc)
+        self._totals: Dict[CounterKey, Tuple[int, float]] = {}
+        # Counter đã có slot (tránh query kiểm tra ở mỗi lượt dùng)
+        self._initialized: Set[CounterKey] = set()
+        # key -> tenant_id của các counter có lượt dùng chưa gom về row gốc
+        self._dirty: Dict[CounterKey, int] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.increments = 0
+        self.slot_retries = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.stripes > 0
+
+    def _count(self, attr: str, value: int = 1) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + value)
+
+    def _slots(self, kind: str, counter_id: int):
+        return and_(
+            TblUsageCounterSlots.counter_type == kind,
+            TblUsageCounterSlots.counter_id == counter_id
+        )
+
+    def ensure_slots(self, db: Session, kind: str, counter_id: int) -> None:
+        """
+        Tạo N slot cho counter nếu chưa có: slot 0 nhận used_count hiện tại,
+        quota chia theo max_usage. Chạy trong transaction riêng (commit ngay).
+        """
+        key = (kind, counter_id)
+        if key in self._initialized:
+            return
+        exists = db.execute(
+            select(TblUsageCounterSlots.id).where(self._slots(kind, counter_id)).limit(1)
+        ).first()
+        if exists is None:
+            model = COUNTER_MODELS[kind]
+            row = db.execute(
+                select(model.tenant_id, model.max_usage, model.used_count).where(model.id == counter_id)
+            ).first()
+            if row is None:
+                return
+            used = [row.used_count or 0] + [0] * (self.stripes - 1)
+            db.add_all([
+                TblUsageCounterSlots(
+                    tenant_id=row.tenant_id, counter_type=kind, counter_id=counter_id,
+                    slot=index, quota=quota, used=used[index]
+                )
+                for index, quota in enumerate(split_quota(row.max_usage, used))
+            ])
+            try:
+                db.commit()
+            except IntegrityError:
+                # Request/process khác vừa tạo slot cho counter này
+                db.rollback()
+        with self._lock:
+            self._initialized.add(key)
+
+    def _increment(self, db: Session, kind: str, counter_id: int, slot: int) -> bool:
+        """UPDATE slot SET used = used + 1 nếu slot còn quota"""
+        return bool(db.query(TblUsageCounterSlots).filter(
+            self._slots(kind, counter_id),
+            TblUsageCounterSlots.slot == slot,
+            or_(
+                TblUsageCounterSlots.quota.is_(None),
+                TblUsageCounterSlots.used < TblUsageCounterSlots.quota
+            )
+        ).update(
+            {TblUsageCounterSlots.used: TblUsageCounterSlots.used + 1},
+            synchronize_session=False
+        ))
+
+    def take(self, db: Session, kind: str, counter_id: int) -> bool:
+        """
+        Giữ một lượt trong một slot còn quota; False khi mọi slot đã hết (đạt max_usage).
+        Không commit - caller commit cùng với bản ghi sử dụng rồi gọi committed().
+        """
+        if self._increment(db, kind, counter_id, random.randrange(self.stripes)):
+            self._count("increments")
+            return True
+
+        # Slot được chọn đã hết quota: thử các slot còn trống theo thứ tự ngẫu nhiên
+        free = db.execute(
+            select(TblUsageCounterSlots.slot).where(
+                and_(
+                    self._slots(kind, counter_id),
+                    or_(
+                        TblUsageCounterSlots.quota.is_(None),
+                        TblUsageCounterSlots.used < TblUsageCounterSlots.quota
+                    )
+                )
+            )
+        ).scalars().all()
+        random.shuffle(free)
+        for slot in free:
+            self._count("slot_retries")
+            if self._increment(db, kind, counter_id, slot):
+                self._count("increments")
+                return True
+        self._count("rejected")
+        return False
+
+    def committed(self, db: Session, kind: str, counter_id: int, tenant_id: int) -> int:
+        """Ghi nhận một lượt đã commit; trả về tổng mới (từ cache nếu có)"""
+        key = (kind, counter_id)
+        with self._lock:
+            self._dirty[key] = tenant_id
+            cached = self._totals.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                total = cached[0] + 1
+                self._totals[key] = (total, cached[1])
+                return total
+        return self.total(db, kind, counter_id)
+
+    def total(self, db: Session, kind: str, counter_id: int) -> Optional[int]:
+        """Tổng lượt đã dùng (SUM các slot, cache USAGE_COUNTER_CACHE_TTL giây); None khi chưa có slot"""
+        key = (kind, counter_id)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._totals.get(key)
+            if cached is not None and cached[1] > now:
+                self.cache_hits += 1
+                return cached[0]
+            self.cache_misses += 1
+
+        slots, total = db.execute(
+            select(func.count(TblUsageCounterSlots.id), func.coalesce(func.sum(TblUsageCounterSlots.used), 0)).where(
+                self._slots(kind, counter_id)
+            )
+        ).one()
+        if not slots:
+            return None
+        total = int(total)
+        with self._lock:
+            self._totals[key] = (total, now + self.cache_ttl)
+        return total
+
+    def used_count(self, db: Session, kind: str, obj: Any) -> int:
+        """used_count hiện tại của promotion/voucher (tổng các slot khi striped counter đang bật)"""
+        if self.enabled:
+            total = self.total(db, kind, obj.id)
+            if total is not None:
+                return total
+        return obj.used_count or 0
+
+    def rebalance(self, db: Session, kind: str, obj: Any) -> None:
+        """
+        Sau khi cập nhật bản ghi: chia lại quota theo max_usage hiện tại và ghi
+        tổng các slot vào used_count (các slot là nguồn đúng khi striped counter bật).
+        """
+        if not self.enabled:
+            return
+        slots = db.query(TblUsageCounterSlots).filter(
+            self._slots(kind, obj.id)
+        ).order_by(TblUsageCounterSlots.slot).with_for_update().all()
+        if not slots:
+            return
+        used = [slot.used or 0 for slot in slots]
+        for slot, quota in zip(slots, split_quota(obj.max_usage, used)):
+            slot.quota = quota
+        obj.used_count = sum(used)
+        db.commit()
+        db.refresh(obj)
+        with self._lock:
+            self._totals.pop((kind, obj.id), None)
+            self._dirty.pop((kind, obj.id), None)
+
+    async def flush(self) -> int:
+        """Gom tổng các slot về used_count của các counter vừa có lượt dùng; trả về số counter đã gom"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        try:
+            async with AsyncSessionLocal() as db:
+                for (kind, counter_id) in dirty:
+                    model = COUNTER_MODELS[kind]
+                    total = select(func.coalesce(func.sum(TblUsageCounterSlots.used), 0)).where(
+                        self._slots(kind, counter_id)
+                    ).scalar_subquery()
+                    await db.execute(update(model).where(model.id == counter_id).values(used_count=total))
+                await db.commit()
+        except Exception:
+            # Giữ lại để lần sau gom tiếp
+            with self._lock:
+                for key, tenant_id in dirty.items():
+                    self._dirty.setdefault(key, tenant_id)
+            self._count("flush_errors")
+            raise
+        if catalog_cache is not None:
+            for (kind, _), tenant_id in dirty.items():
+                catalog_cache.invalidate(tenant_id, COUNTER_MODELS[kind].__tablename__)
+        self._count("flushes")
+        return len(dirty)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Usage counter flush failed: {e}")
+
+    def start_background_flush(self) -> None:
+        """Start the flush task on the running event loop (call from startup)"""
+        if self.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop_background_flush(self) -> None:
+        """Stop the flush task and flush what is left (call from shutdown)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Usage counter flush failed: {e}")
+
+    def reconcile(self, db: Session, reset: bool = False) -> List[Dict[str, Any]]:
+        """
+        Ghi tổng các slot vào used_count của mọi counter có slot; trả về các counter bị lệch.
+        reset=True xoá các slot sau khi gom (chạy sau khi đã tắt USAGE_COUNTER_STRIPES):
+        used_count giữ giá trị lớn hơn vì row có thể đã nhận thêm lượt từ lúc tắt.
+        """
+        rows = db.execute(
+            select(
+                TblUsageCounterSlots.counter_type,
+                TblUsageCounterSlots.counter_id,
+                func.sum(TblUsageCounterSlots.used).label("total")
+            ).group_by(TblUsageCounterSlots.counter_type, TblUsageCounterSlots.counter_id)
+        ).all()
+
+        drift = []
+        for kind, counter_id, total in rows:
+            model = COUNTER_MODELS[kind]
+            obj = db.query(model).filter(model.id == counter_id).first()
+            if obj is None:
+                continue
+            total = max(int(total), obj.used_count or 0) if reset else int(total)
+            if (obj.used_count or 0) != total:
+                drift.append({"counter_type": kind, "counter_id": counter_id, "before": obj.used_count, "after": total})
+                obj.used_count = total
+                db.add(obj)
+                if catalog_cache is not None:
+                    catalog_cache.invalidate(obj.tenant_id, model.__tablename__)
+        if reset:
+            db.query(TblUsageCounterSlots).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            self._totals.clear()
+            self._dirty.clear()
+            if reset:
+                self._initialized.clear()
+        return drift
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "stripes": self.stripes,
+                "counters": len(self._initialized),
+                "increments": self.increments,
+                "slot_retries": self.slot_retries,
+                "rejected": self.rejected,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "pending_flush": len(self._dirty),
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors
+            }
+
+
+usage_counters = CRUDUsageCounters(
+    stripes=settings.USAGE_COUNTER_STRIPES,
+    cache_ttl=settings.USAGE_COUNTER_CACHE_TTL,
+    flush_interval=settings.USAGE_COUNTER_FLUSH_SECONDS
+)
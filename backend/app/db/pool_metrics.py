@@ -0,0 +1,104 @@
+"""
+Connection pool instrumentation.
+InstrumentedQueuePool measures how long each checkout waits for a connection
+and counts timeouts and overflow connections, so latency caused by pool
+exhaustion shows up on /metrics.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Thread-safe counters for connection checkouts"""
+
+    def __init__(self, slow_threshold: float = 0.1):
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.slow_checkouts = 0
+            self.timeouts = 0
+            self.overflow_events = 0
+            self.connections_created = 0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if wait >= self.slow_threshold:
+                self.slow_checkouts += 1
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait = max(self.max_wait, wait)
+
+    def record_connect(self, overflow: bool) -> None:
+        with self._lock:
+            self.connections_created += 1
+            if overflow:
+                self.overflow_events += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "avg_checkout_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_checkout_wait_ms": round(self.max_wait * 1000, 3),
+                "slow_checkouts": self.slow_checkouts,
+                "checkout_timeouts": self.timeouts,
+                "overflow_events": self.overflow_events,
+                "connections_created": self.connections_created
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait time, timeouts and overflow connections"""
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - start)
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+    def _create_connection(self) -> Any:
+        # overflow() > 0 nghĩa là connection này vượt quá pool_size
+        pool_metrics.record_connect(overflow=self.overflow() > 0)
+        return super()._create_connection()
+
+
+def get_pool_status(engine: Any) -> Dict[str, Optional[Any]]:
+    """Current pool gauges plus cumulative checkout metrics"""
+    pool = engine.pool
+    status: Dict[str, Optional[Any]] = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout()
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool_metrics.snapshot())
+    return status
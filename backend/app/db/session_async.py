@@ -0,0 +1,61 @@
+"""
+Async database access (AsyncSession) next to the sync session in session_local.
+Used by the hot guest-facing read endpoints so they run on the event loop
+instead of occupying a threadpool worker per request.
+
+The async URL is derived from DATABASE_URI:
+    mysql+pymysql://...  -> mysql+aiomysql://...
+    sqlite:///...        -> sqlite+aiosqlite:///...
+"""
+
+from typing import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+
+
+def get_async_database_uri(uri: str) -> str:
+    """Map a sync SQLAlchemy URL to its async driver equivalent"""
+    scheme, sep, rest = uri.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if dialect == "mysql":
+        return f"mysql+aiomysql{sep}{rest}"
+    return uri
+
+
+ASYNC_DATABASE_URI = get_async_database_uri(settings.DATABASE_URI)
+
+if ASYNC_DATABASE_URI.startswith("sqlite"):
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URI,
+        echo=settings.DB_ECHO,
+        poolclass=NullPool
+    )
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URI,
+        echo=settings.DB_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    )
+
+AsyncSessionLocal = sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
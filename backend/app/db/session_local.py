@@ -2,18 +2,31 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from app.db.pool_metrics import InstrumentedQueuePool, pool_metrics
 
 # Configure engine based on database type
 # For SQLite: disable thread-checking and use NullPool to avoid cross-thread issues
 if settings.DATABASE_URI and "sqlite" in settings.DATABASE_URI.lower():
     engine = create_engine(
         settings.DATABASE_URI,
+        echo=settings.DB_ECHO,
         connect_args={"check_same_thread": False},
         poolclass=NullPool
     )
 else:
-    # For MySQL/other databases
-    engine = create_engine(settings.DATABASE_URI)
+    # For MySQL/other databases: sized pool from settings, instrumented for /metrics
+    pool_metrics.slow_threshold = settings.DB_SLOW_CHECKOUT_MS / 1000
+    engine = create_engine(
+        settings.DATABASE_URI,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
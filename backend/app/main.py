@@ -1,6 +1,6 @@
 from fastapi import FastAPI, Form, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
@@ -17,30 +17,33 @@ from app.api.api_v1.endpoints import (
 
 # Import database and models
 from app.db.session_local import engine
+from app.db.session_async import async_engine
+from app.db.pool_metrics import get_pool_status
+from app.core.availability import occupancy_calendar
+from app.core.cache import get_cache_stats
+from app.core.http_client import upstream_http
+from app.core.image_variants import image_processor
+from app.core.zalo_credentials import zalo_credentials
+from app.core.password_hashing import PasswordHasherBusy, password_hasher
+from app.core.security_utils import rate_limiter
 from app.core.config import settings
+from app.core.logging_config import get_logging_stats, setup_logging, shutdown_logging
+from app.crud.crud_usage_counters import usage_counters
 from app.models.models import Base
 
 # Import middleware
 from app.middleware.logging_safe import RequestLoggingMiddlewareSafe
 from app.middleware.security_safe import SecurityHeadersMiddlewareSafe
 from app.middleware.performance_safe import PerformanceMonitoringMiddlewareSafe
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 
 # Import monitoring and error handling
-from app.core.monitoring import health_checker, metrics_collector
+from app.core.monitoring import health_checker, metrics_collector, render_prometheus_gauges
 from app.core.error_handling import error_handler, system_monitor
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/app.log'),
-        logging.StreamHandler()
-    ]
-)
+# Configure logging (logs/app.log + console, ghi qua background queue)
+setup_logging(logging.INFO)
 
 logger = logging.getLogger(__name__)
 
@@ -53,6 +56,12 @@ app = FastAPI(
     openapi_url="/api/openapi.json"
 )
 
+# Upload size limit - 413 trước khi body multipart được đọc/parse
+app.add_middleware(UploadSizeLimitMiddleware)
+
+# Rate limiting - added before CORS so it runs inside it (429 responses still get CORS headers)
+app.add_middleware(RateLimitMiddleware)
+
 # CORS middleware - ADD FIRST to avoid issues with preflight requests
 app.add_middleware(
     CORSMiddleware,
@@ -64,11 +73,20 @@ app.add_middleware(
 )
 
 # Add custom middleware (order matters - last added is executed first)
-# Safe middleware that won't cause hanging
+# Pure ASGI middleware (no BaseHTTPMiddleware task/stream wrapping, streaming responses pass through)
 app.add_middleware(RequestLoggingMiddlewareSafe)
 app.add_middleware(SecurityHeadersMiddlewareSafe)  
 app.add_middleware(PerformanceMonitoringMiddlewareSafe)
 
+# Pool bcrypt đầy (đổi mật khẩu, tạo/cập nhật admin user): 503 thay vì 500
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Hệ thống đang bận, vui lòng thử lại sau"},
+        headers={"Retry-After": "1"}
+    )
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -106,15 +124,27 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 @app.on_event("startup")
 async def on_startup():
+    setup_logging(logging.INFO)
     try:
         # Create database tables
         logger.info("Creating database tables...")
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully!")
         
-        # Initialize monitoring (skip health check to avoid connection timeout issues)
+        # Initialize monitoring: health check chạy nền, không chặn startup
+        health_checker.start_background_refresh()
         logger.info("Monitoring system initialized")
         
+        # HTTP client dùng chung cho Zalo API (giữ connection keep-alive)
+        await upstream_http.start()
+        
+        # Striped usage counter: gom tổng các slot về used_count định kỳ (chỉ chạy khi bật)
+        usage_counters.start_background_flush()
+
+        if settings.RATE_LIMIT_ENABLED and not settings.RATE_LIMIT_TRUSTED_PROXIES:
+            logger.warning("RATE_LIMIT_ENABLED without RATE_LIMIT_TRUSTED_PROXIES: "
+                           "behind a reverse proxy every client shares the proxy's rate limit bucket")
+
         logger.info("Hotel Management SaaS Backend started successfully!")
         logger.info(f"Using database: {settings.DATABASE_URI}")
     except Exception as e:
@@ -134,7 +164,18 @@ async def shutdown_event():
     except Exception as e:
         logger.error(f"Error getting final metrics: {e}")
     
+    await health_checker.stop_background_refresh()
+    await usage_counters.stop_background_flush()
+    
+    # Đóng các connection của async engine
+    await async_engine.dispose()
+    await upstream_http.close()
+    password_hasher.shutdown()
+    image_processor.shutdown()
+    
     logger.info("Backend shutdown completed")
+    # Flush các log còn trong queue trước khi thoát
+    shutdown_logging()
 
 @app.get("/")
 def read_root():
@@ -146,12 +187,17 @@ def read_root():
     }
 
 # Enhanced health check endpoints
-@app.get("/health")
-async def health_check():
-    """Basic health check endpoint"""
-    health_status = await health_checker.check_health()
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests (no I/O)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: cached result of the background health check (503 only when the database is down)"""
+    health_status = await health_checker.get_readiness()
     
-    if health_status["status"] == "healthy":
+    if health_status.get("ready"):
         return health_status
     else:
         return JSONResponse(
@@ -159,15 +205,42 @@ async def health_check():
             content=health_status
         )
 
+@app.get("/health")
+async def health_check():
+    """Basic health check endpoint (same cached result as /health/ready)"""
+    return await readiness_check()
+
 @app.get("/health/detailed")
 async def detailed_health_check():
     """Detailed health check with all components"""
     return await health_checker.detailed_health_check()
 
 @app.get("/metrics")
-async def get_metrics():
-    """Get application metrics"""
-    return metrics_collector.get_metrics_summary()
+async def get_metrics(format: str = "prometheus"):
+    """Get application metrics (Prometheus text format; ?format=json for the JSON summary)"""
+    components = {
+        "database_pool": get_pool_status(engine),
+        "cache": get_cache_stats(),
+        "password_hashing": password_hasher.stats(),
+        "image_processing": image_processor.stats(),
+        "http_client": upstream_http.stats(),
+        "zalo_credentials": zalo_credentials.stats(),
+        "availability": occupancy_calendar.stats(),
+        "usage_counters": usage_counters.stats(),
+        "rate_limiting": rate_limiter.stats(),
+        "logging": get_logging_stats()
+    }
+    
+    if format == "json":
+        summary = metrics_collector.get_metrics_summary()
+        summary["in_flight"] = metrics_collector.in_flight
+        summary.update(components)
+        return summary
+    
+    body = metrics_collector.render_prometheus()
+    for name, stats in components.items():
+        body += render_prometheus_gauges(f"app_{name}", stats)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
 
 @app.get("/system/status")
 async def get_system_status():
@@ -1,73 +1,83 @@
-import logging
 import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-import os
+from starlette.datastructures import URL, Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-# Configure request logger
-request_logger = logging.getLogger("request_logger")
-request_logger.setLevel(logging.INFO)
+from app.core.config import settings
+from app.core.logging_config import get_file_logger, should_sample
 
-# Create file handler if not exists
-if not request_logger.handlers:
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    handler = logging.FileHandler(os.path.join(log_dir, "requests.log"))
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    handler.setFormatter(formatter)
-    request_logger.addHandler(handler)
+# Configure request logger (logs/requests.log, ghi qua background queue)
+request_logger = get_file_logger("request_logger", "requests.log")
 
-class RequestLoggingMiddlewareSafe(BaseHTTPMiddleware):
+class RequestLoggingMiddlewareSafe:
     """
-    Safe request logging middleware - no request body reading, no blocking operations
+    Safe request logging middleware - no request body reading, no blocking operations.
+    Pure ASGI: the request id is stored in scope["state"] (request.state.request_id)
+    and returned in the x-request-id header. Whether the request's success
+    lines are logged (LOG_SUCCESS_SAMPLE_RATE) is decided once and stored in
+    scope["state"]["log_sampled"] so the performance log samples the same requests.
     """
     
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Generate unique request ID
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        sampled = should_sample()
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        state["log_sampled"] = sampled
         
         # Start time
         start_time = time.time()
         
-        # Extract basic request information (no body reading)
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        method = request.method
-        url = str(request.url)
-        
-        # Log request start
-        request_start_data = {
-            "request_id": request_id,
-            "timestamp": start_time,
-            "method": method,
-            "url": url,
-            "client_ip": client_ip,
-            "user_agent": user_agent,
-            "event": "request_start"
-        }
-        
-        request_logger.info(f"REQUEST_START: {request_start_data}")
+        # Log request start (basic request information, no body reading)
+        if sampled and settings.LOG_REQUEST_START:
+            headers = Headers(scope=scope)
+            client = scope.get("client")
+            request_start_data = {
+                "request_id": request_id,
+                "timestamp": start_time,
+                "method": scope["method"],
+                "url": str(URL(scope=scope)),
+                "client_ip": client[0] if client else "unknown",
+                "user_agent": headers.get("user-agent", "unknown"),
+                "event": "request_start"
+            }
+            request_logger.info("REQUEST_START", extra=request_start_data)
+
+        status_code = 500
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Add request ID to response header
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode())
+                ]
+            await send(message)
         
         # Process request
         try:
-            response = await call_next(request)
-            status_code = response.status_code
-            success = True
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
-            status_code = 500
-            success = False
-            request_logger.error(f"REQUEST_ERROR: {request_id} - {str(e)}")
+            request_logger.error("REQUEST_ERROR", extra={
+                "request_id": request_id,
+                "error": str(e),
+                "event": "request_error"
+            })
             raise
         
+        # Request thành công không được chọn mẫu thì bỏ qua log
+        if not sampled and status_code < 400:
+            return
+
         # Calculate processing time
         processing_time = time.time() - start_time
         
@@ -77,12 +87,7 @@ class RequestLoggingMiddlewareSafe(BaseHTTPMiddleware):
             "timestamp": time.time(),
             "status_code": status_code,
             "processing_time": processing_time,
-            "event": "request_success" if success else "request_error"
+            "event": "request_success"
         }
         
-        request_logger.info(f"REQUEST_{'SUCCESS' if success else 'ERROR'}: {request_end_data}")
-        
-        # Add request ID to response header
-        response.headers["x-request-id"] = request_id
-        
-        return response
+        request_logger.info("REQUEST_SUCCESS", extra=request_end_data)
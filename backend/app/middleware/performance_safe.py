@@ -1,58 +1,91 @@
 import time
-import logging
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-import os
-
-# Configure performance logger
-performance_logger = logging.getLogger("performance")
-performance_logger.setLevel(logging.INFO)
-
-if not performance_logger.handlers:
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    handler = logging.FileHandler(os.path.join(log_dir, "performance.log"))
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    performance_logger.addHandler(handler)
-
-class PerformanceMonitoringMiddlewareSafe(BaseHTTPMiddleware):
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging_config import get_file_logger, should_sample
+from app.core.monitoring import MetricsCollector, metrics_collector
+
+# Configure performance logger (logs/performance.log, ghi qua background queue)
+performance_logger = get_file_logger("performance", "performance.log")
+
+# Label cho request không khớp route nào (404, redirect slash) - giữ số label cố định
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope, root_path: str = "") -> str:
+    """Route path of a handled request (e.g. /api/v1/rooms/{item_id}), never the raw URL"""
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format:
+        return path_format
+
+    # Mount (StaticFiles /uploads) chỉ để lại root_path trong scope
+    mount_path = scope.get("root_path", "")
+    if mount_path != root_path and mount_path.startswith(root_path):
+        return f"{mount_path[len(root_path):]}/{{path}}"
+    return UNMATCHED_ROUTE
+
+
+class PerformanceMonitoringMiddlewareSafe:
     """
-    Ultra-safe performance monitoring - only time measurement, no system calls
+    Ultra-safe performance monitoring - only time measurement, no system calls.
+    Feeds MetricsCollector with per-route-template latency and in-flight counts.
     """
     
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
+    def __init__(self, app: ASGIApp, collector: MetricsCollector = metrics_collector):
+        self.app = app
+        self.collector = collector
         self.slow_threshold = 2.0  # seconds
         
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Only measure time - no system metrics
         start_time = time.time()
+        status_code = 500
+        root_path = scope.get("root_path", "")
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
         # Process request
-        response = await call_next(request)
+        self.collector.request_started()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            processing_time = time.time() - start_time
+            self.collector.request_finished()
+            self.collector.record_request(route_template(scope, root_path), scope["method"], status_code, processing_time)
         
-        # Calculate processing time
-        processing_time = time.time() - start_time
+        slow = processing_time > self.slow_threshold
+
+        # Dùng cùng quyết định sampling với RequestLoggingMiddlewareSafe
+        sampled = scope.get("state", {}).get("log_sampled")
+        if sampled is None:
+            sampled = should_sample()
+        if not sampled and not slow and status_code < 400:
+            return
         
         # Log performance data
+        client = scope.get("client")
         performance_data = {
             'timestamp': time.time(),
-            'request_id': getattr(request.state, 'request_id', 'unknown'),
-            'method': request.method,
-            'url': str(request.url),
+            'request_id': scope.get("state", {}).get("request_id", "unknown"),
+            'method': scope["method"],
+            'url': str(URL(scope=scope)),
             'processing_time': processing_time,
-            'status_code': response.status_code,
-            'client_ip': request.client.host if request.client else "unknown"
+            'status_code': status_code,
+            'client_ip': client[0] if client else "unknown"
         }
         
-        # Log all requests
-        performance_logger.info(f"PERFORMANCE: {performance_data}")
+        # Log all (sampled) requests
+        performance_logger.info("PERFORMANCE", extra=performance_data)
         
         # Log slow requests separately
-        if processing_time > self.slow_threshold:
-            performance_logger.warning(f"SLOW_REQUEST: {performance_data}")
-        
-        return response
+        if slow:
+            performance_logger.warning("SLOW_REQUEST", extra=performance_data)
@@ -0,0 +1,141 @@
+import ipaddress
+import json
+import re
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security_utils import RateLimiter, rate_limiter
+
+# (methods | None, path regex, endpoint type) - rule đầu tiên khớp sẽ được dùng
+DEFAULT_ROUTE_CLASSES: Tuple[Tuple[Optional[Tuple[str, ...]], str, str], ...] = (
+    (("POST",), r"^/api/v1/auth/(login|register|change-password)$", "auth"),
+    (("PUT",), r"^/api/v1/profile/change-password$", "auth"),
+    (("POST",), r"^/api/v1/zalo/phone$", "zalo"),
+    (("POST", "DELETE"), r"^/api/v1/upload/", "upload"),
+    (("GET",), r"/search(/|$)", "search"),
+)
+
+# Tham số query biến một GET thành request tìm kiếm
+SEARCH_PARAMS = ("search", "search_query", "q")
+
+EXEMPT_PREFIXES = ("/health", "/metrics", "/uploads/", "/api/docs", "/api/redoc", "/api/openapi.json")
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI rate limiting middleware.
+    Maps each request to an endpoint type (auth / zalo / upload / search / default),
+    checks RateLimiter for the client IP and answers 429 with Retry-After when
+    the client is over its limit. Allowed responses get X-RateLimit-* headers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limiter: RateLimiter = rate_limiter,
+        route_classes: Sequence[Tuple[Optional[Tuple[str, ...]], str, str]] = DEFAULT_ROUTE_CLASSES,
+        trusted_proxies: Optional[List[str]] = None
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.route_classes = [(methods, re.compile(pattern), name) for methods, pattern, name in route_classes]
+        self.trusted_proxies = [
+            ipaddress.ip_network(proxy, strict=False)
+            for proxy in (settings.RATE_LIMIT_TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies)
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if scope["method"] == "OPTIONS" or path.startswith(EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        endpoint_type = self.classify(scope)
+        result = await self.limiter.is_allowed_async(self.client_ip(scope), endpoint_type)
+
+        if not result["allowed"]:
+            await self._reject(send, result)
+            return
+
+        rate_headers = [
+            (b"x-ratelimit-limit", str(result["limit"]).encode()),
+            (b"x-ratelimit-remaining", str(result["remaining"]).encode()),
+        ]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + rate_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def classify(self, scope: Scope) -> str:
+        """Endpoint type of a request"""
+        method, path = scope["method"], scope["path"]
+        for methods, pattern, name in self.route_classes:
+            if (methods is None or method in methods) and pattern.search(path):
+                return name
+
+        if method == "GET" and scope.get("query_string"):
+            params = parse_qsl(scope["query_string"].decode("latin-1"))
+            if any(key in SEARCH_PARAMS and value for key, value in params):
+                return "search"
+        return "default"
+
+    def _is_trusted(self, host: str) -> bool:
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def client_ip(self, scope: Scope) -> str:
+        """
+        Client IP. X-Forwarded-For is only honoured when the direct peer is a
+        trusted proxy; it is walked from the right, skipping trusted hops, so
+        a client cannot spoof its address by prepending entries.
+        """
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not self.trusted_proxies or not self._is_trusted(peer):
+            return peer
+
+        forwarded = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                forwarded = value.decode("latin-1")
+                break
+        if not forwarded:
+            return peer
+
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+        return hops[0] if hops else peer
+
+    async def _reject(self, send: Send, result: dict) -> None:
+        body = json.dumps({
+            "detail": "Quá nhiều yêu cầu, vui lòng thử lại sau",
+            "reason": result.get("reason"),
+            "retry_after": result["retry_after"]
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(result["retry_after"]).encode()),
+                (b"x-ratelimit-limit", str(result["limit"]).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
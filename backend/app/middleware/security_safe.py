@@ -1,36 +1,34 @@
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SecurityHeadersMiddlewareSafe(BaseHTTPMiddleware):
+# Basic security headers added to every HTTP response
+SECURITY_HEADERS = [
+    (b"x-frame-options", b"DENY"),
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+]
+
+class SecurityHeadersMiddlewareSafe:
     """
     Ultra-safe security headers middleware - only adds headers, no blocking checks
     """
     
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
-        
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Process request without ANY checks
-        response = await call_next(request)
-        
-        # Add basic security headers
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # Temporarily disable all CSP for debugging
-        # if request.url.path in ["/docs", "/redoc", "/openapi.json"]:
-        #     # No CSP for docs pages - allows all external resources
-        #     print(f"DEBUG: Docs page {request.url.path} - No CSP added")
-        #     pass
-        # else:
-        #     response.headers["Content-Security-Policy"] = "default-src 'self'"
-        #     print(f"DEBUG: Regular page {request.url.path} - CSP added")
+        self.app = app
         
-        # No CSP at all for now
-        print(f"DEBUG: No CSP for {request.url.path}")
-        
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Header do endpoint tự đặt được giữ nguyên
+                existing = {name.lower() for name, _ in message.get("headers", [])}
+                message["headers"] = list(message.get("headers", [])) + [
+                    (name, value) for name, value in SECURITY_HEADERS if name not in existing
+                ]
+            await send(message)
+
+        # No CSP for now (docs pages load external resources)
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,103 @@
+import json
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Chỗ cho boundary, header của từng part và các field form (folder, file_type)
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def default_upload_limits() -> Dict[str, int]:
+    """Maximum request body size per upload path"""
+    return {
+        "/api/v1/upload/image": settings.MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+        "/api/v1/upload/video": settings.MAX_VIDEO_SIZE + MULTIPART_OVERHEAD,
+        "/api/v1/upload/multiple": settings.MAX_UPLOAD_FILES * settings.MAX_VIDEO_SIZE + MULTIPART_OVERHEAD,
+    }
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Pure ASGI middleware rejecting oversized uploads with 413 before the body
+    is parsed: requests whose Content-Length is over the limit are answered
+    without reading the body; bodies without Content-Length (chunked) are
+    counted while they are received and cut off at the limit (the app sees a
+    disconnect and its error response is replaced by the 413).
+    """
+
+    def __init__(self, app: ASGIApp, limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.limits = default_upload_limits() if limits is None else limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                content_length = value
+                break
+
+        if content_length is not None:
+            try:
+                too_large = int(content_length) > limit
+            except ValueError:
+                too_large = False
+            if too_large:
+                await self._reject(send, limit)
+                return
+            await self.app(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        rejected = False
+        started = False
+
+        async def counting_receive() -> Message:
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Ngừng đọc body: parser multipart nhận disconnect và dừng
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def limited_send(message: Message) -> None:
+            nonlocal rejected, started
+            if exceeded and not started:
+                if not rejected:
+                    rejected = True
+                    await self._reject(send, limit)
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        await self.app(scope, counting_receive, limited_send)
+        if exceeded and not rejected and not started:
+            await self._reject(send, limit)
+
+    async def _reject(self, send: Send, limit: int) -> None:
+        body = json.dumps({
+            "detail": f"File too large. Maximum request size is {limit // (1024 * 1024)}MB."
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
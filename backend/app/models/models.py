@@ -3,7 +3,7 @@ SQLAlchemy Models for Zalo Mini App Hotel Booking System
 Generated from MySQL schema with multi-tenant architecture
 """
 
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, DateTime, Date, ForeignKey, Index, JSON
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, DateTime, Date, ForeignKey, Index, JSON, UniqueConstraint, Computed
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -43,6 +43,9 @@ class TblTenants(Base):
 
 class TblRooms(Base):
     __tablename__ = 'tbl_rooms'
+    __table_args__ = (
+        Index('idx_rooms_tenant_deleted_type', 'tenant_id', 'deleted', 'room_type'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -92,6 +95,9 @@ class TblRoomFeatures(Base):
 
 class TblFacilities(Base):
     __tablename__ = 'tbl_facilities'
+    __table_args__ = (
+        Index('idx_facilities_tenant_deleted', 'tenant_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -166,6 +172,9 @@ class TblHotelBrands(Base):
 
 class TblCustomers(Base):
     __tablename__ = 'tbl_customers'
+    __table_args__ = (
+        Index('idx_customers_tenant_deleted_created', 'tenant_id', 'deleted', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -183,6 +192,13 @@ class TblCustomers(Base):
 
 class TblBookingRequests(Base):
     __tablename__ = 'tbl_booking_requests'
+    __table_args__ = (
+        Index('idx_booking_requests_tenant_deleted_created', 'tenant_id', 'deleted', 'created_at'),
+        Index('idx_booking_requests_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+        Index('idx_booking_requests_customer_deleted_created', 'customer_id', 'deleted', 'created_at'),
+        # Overlap query tìm phòng trống: check_out_date > :start AND check_in_date < :end
+        Index('idx_booking_requests_tenant_deleted_checkout', 'tenant_id', 'deleted', 'check_out_date', 'check_in_date'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -206,6 +222,9 @@ class TblBookingRequests(Base):
 
 class TblServices(Base):
     __tablename__ = 'tbl_services'
+    __table_args__ = (
+        Index('idx_services_tenant_deleted', 'tenant_id', 'deleted'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -227,6 +246,9 @@ class TblServices(Base):
 
 class TblServiceBookings(Base):
     __tablename__ = 'tbl_service_bookings'
+    __table_args__ = (
+        Index('idx_service_bookings_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -246,6 +268,9 @@ class TblServiceBookings(Base):
 
 class TblVouchers(Base):
     __tablename__ = 'tbl_vouchers'
+    __table_args__ = (
+        Index('idx_vouchers_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -268,6 +293,13 @@ class TblVouchers(Base):
 
 class TblCustomerVouchers(Base):
     __tablename__ = 'tbl_customer_vouchers'
+    __table_args__ = (
+        Index('idx_customer_vouchers_tenant_deleted', 'tenant_id', 'deleted'),
+        # Mỗi customer chỉ có một claim còn hiệu lực cho mỗi promotion (chặn claim trùng khi nhiều
+        # request đồng thời). live_claim NULL với bản ghi đã xóa nên xóa/claim lại nhiều lần không vướng;
+        # legacy voucher có promotion_id NULL không bị ràng buộc
+        UniqueConstraint('customer_id', 'promotion_id', 'live_claim', name='uq_customer_vouchers_live_claim'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -286,9 +318,14 @@ class TblCustomerVouchers(Base):
     deleted = Column(Integer, default=0)
     deleted_at = Column(DateTime, default=None)
     deleted_by = Column(String(50), default=None)
+    # 1 khi bản ghi chưa xóa, NULL khi đã xóa (cột generated, chỉ dùng cho unique constraint)
+    live_claim = Column(Integer, Computed("CASE WHEN deleted = 0 THEN 1 END"))
     
 class TblPromotions(Base):
     __tablename__ = 'tbl_promotions'
+    __table_args__ = (
+        Index('idx_promotions_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -314,6 +351,9 @@ class TblPromotions(Base):
 
 class TblGames(Base):
     __tablename__ = 'tbl_games'
+    __table_args__ = (
+        Index('idx_games_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -330,6 +370,12 @@ class TblGames(Base):
 
 class TblRoomStays(Base):
     __tablename__ = 'tbl_room_stays'
+    __table_args__ = (
+        Index('idx_room_stays_tenant_deleted_status', 'tenant_id', 'deleted', 'status'),
+        Index('idx_room_stays_customer_deleted', 'customer_id', 'deleted'),
+        # Overlap query tìm phòng trống: checkout_date > :start AND checkin_date < :end
+        Index('idx_room_stays_tenant_deleted_checkout', 'tenant_id', 'deleted', 'checkout_date', 'checkin_date'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     tenant_id = Column(Integer, nullable=False, index=True)
@@ -369,3 +415,69 @@ class TblAdminUsers(Base):
     deleted = Column(Integer, default=0)
     deleted_at = Column(DateTime, default=None)
     deleted_by = Column(String(50), default=None)
+
+# Bảng thống kê tổng hợp theo tenant (được cập nhật tăng dần bởi CRUD hooks)
+class TblTenantStats(Base):
+    __tablename__ = 'tbl_tenant_stats'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, unique=True, nullable=False)
+    total_rooms = Column(Integer, nullable=False, default=0)
+    total_facilities = Column(Integer, nullable=False, default=0)
+    total_services = Column(Integer, nullable=False, default=0)
+    total_customers = Column(Integer, nullable=False, default=0)
+    total_bookings = Column(Integer, nullable=False, default=0)
+    pending_bookings = Column(Integer, nullable=False, default=0)
+    confirmed_bookings = Column(Integer, nullable=False, default=0)
+    cancelled_bookings = Column(Integer, nullable=False, default=0)
+    total_vouchers = Column(Integer, nullable=False, default=0)
+    active_vouchers = Column(Integer, nullable=False, default=0)
+    total_promotions = Column(Integer, nullable=False, default=0)
+    active_promotions = Column(Integer, nullable=False, default=0)
+    rebuilt_at = Column(DateTime, default=None)
+    updated_at = Column(DateTime, nullable=False, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+# Slot của striped counter (used_count của promotion/voucher khi USAGE_COUNTER_STRIPES > 0):
+# lượt dùng được cộng vào một trong N slot, max_usage chia trước thành quota của từng slot
+class TblUsageCounterSlots(Base):
+    __tablename__ = 'tbl_usage_counter_slots'
+    __table_args__ = (
+        UniqueConstraint('counter_type', 'counter_id', 'slot', name='uq_usage_counter_slots_counter_slot'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, nullable=False, index=True)
+    counter_type = Column(String(20), nullable=False)  # promotion | voucher
+    counter_id = Column(Integer, nullable=False)
+    slot = Column(Integer, nullable=False)
+    quota = Column(Integer)  # NULL = không giới hạn (max_usage NULL)
+    used = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=func.current_timestamp())
+    updated_at = Column(DateTime, nullable=False, default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+# Chỉ mục metadata của file upload (ghi lúc upload, /upload/list truy vấn bảng này thay vì quét thư mục)
+class TblUploadedFiles(Base):
+    __tablename__ = 'tbl_uploaded_files'
+    __table_args__ = (
+        Index('idx_uploaded_files_tenant_deleted_folder_type', 'tenant_id', 'deleted', 'folder', 'file_type'),
+        Index('idx_uploaded_files_tenant_sha256', 'tenant_id', 'sha256'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    tenant_id = Column(Integer, index=True)  # NULL = thư mục global (super admin)
+    folder = Column(String(100), nullable=False)
+    file_type = Column(String(20), nullable=False)  # 'image', 'video', 'document'
+    filename = Column(String(255), nullable=False)
+    original_filename = Column(String(255))
+    url = Column(String(500), nullable=False, unique=True)
+    size = Column(Integer, nullable=False, default=0)
+    sha256 = Column(String(64))
+    width = Column(Integer)
+    height = Column(Integer)
+    created_at = Column(DateTime, nullable=False, default=func.current_timestamp())
+    updated_at = Column(DateTime, nullable=False, default=func.current_timestamp(), onupdate=func.current_timestamp())
+    created_by = Column(String(50))
+    updated_by = Column(String(50))
+    deleted = Column(Integer, default=0)
+    deleted_at = Column(DateTime, default=None)
+    deleted_by = Column(String(50), default=None)
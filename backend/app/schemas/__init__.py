@@ -20,3 +20,4 @@ from .service_bookings import *
 from .tenants import *
 from .test_items import *
 from .vouchers import *
+from .uploaded_files import *
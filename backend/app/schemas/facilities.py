@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, root_validator
+from typing import Dict, Optional
 import datetime
 
+from app.core.image_variants import variant_urls
+
 class FacilityBase(BaseModel):
     tenant_id: int
     facility_name: str
@@ -44,6 +46,13 @@ class FacilityRead(FacilityBase):
     id: int
     created_at: datetime.datetime
     updated_at: datetime.datetime
+    # thumb/medium/large -> {"webp": url, "jpg": url}, suy ra từ image_url
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
+
+    @root_validator(skip_on_failure=True)
+    def add_image_variants(cls, values):
+        values["image_variants"] = variant_urls(values.get("image_url"))
+        return values
 
     class Config:
         orm_mode = True
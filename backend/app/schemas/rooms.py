@@ -1,8 +1,10 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, root_validator
+from typing import Dict, List, Optional
 import datetime
 import decimal
 
+from app.core.image_variants import variant_urls
+
 class RoomBase(BaseModel):
     tenant_id: int
     room_type: str
@@ -47,6 +49,13 @@ class RoomRead(RoomBase):
     id: int
     created_at: datetime.datetime
     updated_at: datetime.datetime
+    # thumb/medium/large -> {"webp": url, "jpg": url}, suy ra từ image_url
+    image_variants: Optional[Dict[str, Dict[str, str]]] = None
+
+    @root_validator(skip_on_failure=True)
+    def add_image_variants(cls, values):
+        values["image_variants"] = variant_urls(values.get("image_url"))
+        return values
 
     class Config:
         orm_mode = True
@@ -56,3 +65,22 @@ class RoomUpdate(RoomBase):
     tenant_id: Optional[int] = None
     room_type: Optional[str] = None  
     room_name: Optional[str] = None
+
+class RoomNightAvailability(BaseModel):
+    date: datetime.date
+    available: int
+
+class RoomTypeAvailability(BaseModel):
+    room_type: str
+    total_rooms: int
+    # Số phòng trống tất cả các đêm
+    available_rooms: int
+    nightly: List[RoomNightAvailability]
+
+class RoomAvailabilityRead(BaseModel):
+    tenant_id: int
+    check_in: datetime.date
+    check_out: datetime.date
+    nights: int
+    rooms: List[RoomRead]
+    room_types: List[RoomTypeAvailability]
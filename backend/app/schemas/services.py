@@ -1,8 +1,10 @@
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, root_validator, validator
 from datetime import datetime
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Union
 from decimal import Decimal
 
+from app.core.image_variants import variant_urls_list
+
 # Base service schema
 class ServiceBase(BaseModel):
     service_name: Optional[str] = None
@@ -51,6 +53,13 @@ class ServiceRead(ServiceBase):
     created_by: Optional[str] = None
     updated_by: Optional[str] = None
     deleted: int
+    # Variants của từng ảnh trong image_url (cùng thứ tự, None nếu ảnh không có variant)
+    image_variants: Optional[List[Optional[Dict[str, Dict[str, str]]]]] = None
+
+    @root_validator(skip_on_failure=True)
+    def add_image_variants(cls, values):
+        values["image_variants"] = variant_urls_list(values.get("image_url"))
+        return values
 
     class Config:
         orm_mode = True
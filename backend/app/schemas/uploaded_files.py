@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional
+import datetime
+
+class UploadedFileBase(BaseModel):
+    folder: str
+    file_type: str
+    filename: str
+    original_filename: Optional[str] = None
+    url: str
+    size: int
+    sha256: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+class UploadedFileCreate(UploadedFileBase):
+    pass
+
+class UploadedFileRead(UploadedFileBase):
+    id: int
+    tenant_id: Optional[int] = None
+    created_at: datetime.datetime
+    created_by: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the composite (tenant_id, deleted, ...) indexes
+declared in app/models/models.py to an existing database.
+Indexes that already exist are skipped, so the script can be re-run safely.
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import inspect
+
+from app.db.session import engine
+from app.models.models import Base
+
+def add_composite_indexes():
+    """Create every multi-column index declared on the models that is missing in the database"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = 0
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if len(index.columns) < 2:
+                continue
+            if index.name in existing:
+                print(f"ℹ️ Index {index.name} already exists on {table.name}")
+                continue
+
+            columns = ", ".join(column.name for column in index.columns)
+            try:
+                index.create(bind=engine)
+                created += 1
+                print(f"✅ Created {index.name} on {table.name} ({columns})")
+            except Exception as e:
+                print(f"❌ Error creating {index.name}: {str(e)}")
+                raise
+
+    return created
+
+if __name__ == "__main__":
+    print("🚀 Running migration to add composite indexes...")
+    count = add_composite_indexes()
+    print(f"✅ Migration completed! ({count} index(es) created)")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the unique constraint uq_customer_vouchers_live_claim
+(customer_id, promotion_id, live_claim) to tbl_customer_vouchers.
+
+live_claim is a generated column: 1 while the row is not deleted, NULL once it
+is soft-deleted, so only live claims are unique and a claim can be deleted and
+claimed again any number of times. The script adds the column, creates the
+unique index and drops the indexes it replaces
+(idx_customer_vouchers_customer_promotion_deleted and the earlier
+uq_customer_vouchers_customer_promotion_deleted).
+
+Promotion claims rely on it to reject a second claim of the same promotion
+instead of checking first. Existing duplicate live claims are reported; with
+--dedupe the oldest row of each group is kept and the other, unused rows are
+soft-deleted (groups with a duplicate that was already used are left for
+manual review and the migration stops).
+
+Usage:
+    python scripts/add_customer_voucher_claim_unique_migration.py
+    python scripts/add_customer_voucher_claim_unique_migration.py --dedupe
+"""
+
+import argparse
+import sys
+import os
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import Index, and_, func, inspect, text
+
+from app.db.session import SessionLocal, engine
+from app.models.models import TblCustomerVouchers
+
+UNIQUE_NAME = "uq_customer_vouchers_live_claim"
+REPLACED_INDEXES = (
+    "uq_customer_vouchers_customer_promotion_deleted",
+    "idx_customer_vouchers_customer_promotion_deleted",
+)
+LIVE_CLAIM_COLUMN = "live_claim INTEGER GENERATED ALWAYS AS (CASE WHEN deleted = 0 THEN 1 END) VIRTUAL"
+
+
+def find_duplicates(db):
+    """(customer_id, promotion_id) groups with more than one live claim"""
+    return db.query(
+        TblCustomerVouchers.customer_id,
+        TblCustomerVouchers.promotion_id,
+        func.count(TblCustomerVouchers.id).label("count")
+    ).filter(
+        TblCustomerVouchers.promotion_id.isnot(None),
+        TblCustomerVouchers.deleted == 0
+    ).group_by(
+        TblCustomerVouchers.customer_id,
+        TblCustomerVouchers.promotion_id
+    ).having(func.count(TblCustomerVouchers.id) > 1).all()
+
+
+def dedupe(db, groups):
+    """Keep the oldest live claim of each group, soft-delete the other unused ones; returns rows deleted"""
+    deleted = 0
+    for group in groups:
+        rows = db.query(TblCustomerVouchers).filter(
+            and_(
+                TblCustomerVouchers.customer_id == group.customer_id,
+                TblCustomerVouchers.promotion_id == group.promotion_id,
+                TblCustomerVouchers.deleted == 0
+            )
+        ).order_by(TblCustomerVouchers.id).all()
+        extra = rows[1:]
+        used = [row.id for row in extra if row.is_used or row.booking_request_id]
+        if used:
+            raise RuntimeError(
+                f"Duplicate claims {used} of customer {group.customer_id} / promotion {group.promotion_id} "
+                f"were already used, resolve them manually"
+            )
+        for row in extra:
+            row.deleted = 1
+            row.deleted_at = datetime.now()
+            row.deleted_by = "migration"
+            db.add(row)
+            deleted += 1
+    db.commit()
+    return deleted
+
+
+def add_claim_unique_constraint(run_dedupe=False):
+    table = TblCustomerVouchers.__table__
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns(table.name)}
+    existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+    existing |= {uq["name"] for uq in inspector.get_unique_constraints(table.name)}
+
+    db = SessionLocal()
+    try:
+        if "live_claim" not in columns:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {LIVE_CLAIM_COLUMN}"))
+            print(f"✅ Added generated column live_claim to {table.name}")
+
+        if UNIQUE_NAME in existing:
+            print(f"ℹ️ {UNIQUE_NAME} already exists on {table.name}")
+        else:
+            groups = find_duplicates(db)
+            if groups:
+                print(f"⚠️ Found {len(groups)} customer/promotion pair(s) with duplicate live claims:")
+                for group in groups:
+                    print(f"   customer {group.customer_id} / promotion {group.promotion_id}: {group.count} rows")
+                if not run_dedupe:
+                    print("❌ Re-run with --dedupe to soft-delete the unused duplicates")
+                    return False
+                print(f"🧹 Soft-deleted {dedupe(db, groups)} duplicate row(s)")
+
+            # Unique index: MySQL và SQLite đều coi như unique constraint (NULL không trùng nhau)
+            Index(UNIQUE_NAME, table.c.customer_id, table.c.promotion_id, table.c.live_claim, unique=True).create(bind=engine)
+            print(f"✅ Created {UNIQUE_NAME} on {table.name} (customer_id, promotion_id, live_claim)")
+
+        for name in REPLACED_INDEXES:
+            if name in existing:
+                # Unique index mới bắt đầu bằng customer_id nên vẫn phục vụ foreign key và các query cũ
+                Index(name, table.c.customer_id, table.c.promotion_id, table.c.deleted).drop(bind=engine)
+                print(f"✅ Dropped {name} (replaced by {UNIQUE_NAME})")
+        return True
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error adding unique constraint: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add the one-live-claim-per-promotion unique constraint")
+    parser.add_argument("--dedupe", action="store_true", help="Soft-delete unused duplicate claims before adding it")
+    args = parser.parse_args()
+
+    print("🚀 Running migration to add the promotion claim unique constraint...")
+    if add_claim_unique_constraint(run_dedupe=args.dedupe):
+        print("✅ Migration completed!")
+    else:
+        sys.exit(1)
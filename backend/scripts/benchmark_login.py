@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark.
+Fires POST /api/v1/auth/login at a running backend with a fixed concurrency
+and reports latency percentiles, logins/sec and how many requests were shed
+with 503 by the password hashing pool.
+
+Usage:
+    python scripts/benchmark_login.py --username admin --password secret
+    python scripts/benchmark_login.py --base-url http://localhost:8000 --concurrency 50 --requests 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_benchmark(base_url, username, password, concurrency, total):
+    """Run `total` logins with `concurrency` workers; returns (latencies, status counts, elapsed)"""
+    latencies = []
+    statuses = Counter()
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker(client):
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/api/v1/auth/login",
+                    data={"username": username, "password": password}
+                )
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/v1/auth/login")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"🚀 Login benchmark: {args.requests} requests, concurrency {args.concurrency} -> {args.base_url}")
+    latencies, statuses, elapsed = asyncio.run(
+        run_benchmark(args.base_url, args.username, args.password, args.concurrency, args.requests)
+    )
+
+    print(f"📊 Status codes: {dict(statuses)}")
+    if not latencies:
+        print("❌ No successful logins (check credentials and that the server is running)")
+        return
+
+    ms = [value * 1000 for value in latencies]
+    print(f"✅ Successful logins: {len(latencies)} in {elapsed:.2f}s")
+    print(f"   - logins/sec: {len(latencies) / elapsed:.1f}")
+    print(f"   - p50: {percentile(ms, 50):.1f} ms")
+    print(f"   - p99: {percentile(ms, 99):.1f} ms")
+    print(f"   - mean: {statistics.mean(ms):.1f} ms, max: {max(ms):.1f} ms")
+    if statuses.get(503):
+        print(f"⚠️  {statuses[503]} request(s) rejected with 503 (hashing pool saturated)")
+
+
+if __name__ == "__main__":
+    main()
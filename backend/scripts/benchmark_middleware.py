@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Middleware overhead micro-benchmark.
+Calls a trivial FastAPI endpoint directly through ASGI (no network, no
+server) with three stacks and reports the median time per request (with the
+min-max spread across rounds) and the overhead over the bare app:
+    - bare:   no custom middleware
+    - before: the previous BaseHTTPMiddleware implementation (logging,
+              security headers, performance timing)
+    - after:  the pure ASGI middleware in app/middleware
+
+Rounds of the three stacks are interleaved so drift (CPU frequency, GC)
+hits all of them alike. Differences smaller than the spread are noise.
+
+Usage:
+    python scripts/benchmark_middleware.py
+    python scripts/benchmark_middleware.py --requests 20000 --with-logging
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.logging_safe import RequestLoggingMiddlewareSafe, request_logger
+from app.middleware.performance_safe import PerformanceMonitoringMiddlewareSafe, performance_logger
+from app.middleware.security_safe import SecurityHeadersMiddlewareSafe
+
+
+class LegacyRequestLogging(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware request logging (same work, for comparison)"""
+
+    async def dispatch(self, request, call_next):
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        start_time = time.time()
+        request_logger.info(f"REQUEST_START: {{'request_id': '{request_id}', 'url': '{request.url}'}}")
+        response = await call_next(request)
+        request_logger.info(f"REQUEST_SUCCESS: {{'request_id': '{request_id}', 'processing_time': {time.time() - start_time}}}")
+        response.headers["x-request-id"] = request_id
+        return response
+
+
+class LegacySecurityHeaders(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware security headers"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        return response
+
+
+class LegacyPerformance(BaseHTTPMiddleware):
+    """Previous BaseHTTPMiddleware performance timing"""
+
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        performance_logger.info(f"PERFORMANCE: {{'url': '{request.url}', 'processing_time': {time.time() - start_time}}}")
+        return response
+
+
+def make_app(middleware):
+    """FastAPI app with one trivial endpoint and the given middleware (added in order)"""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        return {"ok": True}
+
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/ping",
+    "raw_path": b"/ping",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"bench"), (b"user-agent", b"benchmark")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("bench", 80),
+}
+
+
+async def call(app):
+    """One request through the ASGI app; returns the response status"""
+    sent_body = False
+    status = None
+
+    async def receive():
+        nonlocal sent_body
+        if not sent_body:
+            sent_body = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Body đã gửi hết: báo disconnect ngay, nếu không listener disconnect của
+        # BaseHTTPMiddleware treo đến khi bị huỷ và làm stack "before" chậm giả tạo
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(dict(SCOPE, state={}), receive, send)
+    return status
+
+
+async def measure_round(app, requests):
+    """Mean microseconds per request over one round"""
+    start = time.perf_counter()
+    for _ in range(requests):
+        await call(app)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def run(requests, rounds):
+    stacks = {
+        "bare": make_app([]),
+        "before": make_app([LegacyRequestLogging, LegacySecurityHeaders, LegacyPerformance]),
+        "after": make_app([RequestLoggingMiddlewareSafe, SecurityHeadersMiddlewareSafe, PerformanceMonitoringMiddlewareSafe]),
+    }
+    for name, app in stacks.items():
+        status = await call(app)
+        assert status == 200, f"{name} stack returned {status}"
+        for _ in range(min(500, requests)):
+            await call(app)  # warm-up
+
+    results = {name: [] for name in stacks}
+    for _ in range(rounds):
+        for name, app in stacks.items():
+            results[name].append(await measure_round(app, requests))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark middleware overhead per request")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--with-logging", action="store_true", help="Keep request/performance log output enabled")
+    args = parser.parse_args()
+
+    if not args.with_logging:
+        request_logger.disabled = True
+        performance_logger.disabled = True
+        logging.getLogger("app").disabled = True
+
+    print(f"🚀 Middleware benchmark: {args.requests} requests x {args.rounds} rounds per stack")
+    results = asyncio.run(run(args.requests, args.rounds))
+
+    bare = statistics.median(results["bare"])
+    for name in ("bare", "before", "after"):
+        rounds = results[name]
+        median = statistics.median(rounds)
+        print(f"📊 {name:<7} median {median:8.1f} µs/request  (min {min(rounds):.1f}, max {max(rounds):.1f})"
+              f"   overhead {median - bare:7.1f} µs")
+    print("ℹ️  Overhead differences smaller than the min-max spread are within noise")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Promotion claim contention benchmark.
+Creates one promotion with --max-usage slots and --customers customers in
+--tenant-id, fires every customer's claim at it concurrently (each claim is
+sent --repeat times, so duplicate claims are exercised too) and reports
+claims/sec plus an over-issuance check: live claim rows and used_count must
+both equal min(customers, max_usage), with at most one claim per customer.
+
+Claims call the claim_promotion endpoint function in-process (one DB session
+per call, --concurrency threads) against the configured database. --legacy
+runs the previous implementation (SELECT ... FOR UPDATE, separate duplicate
+check, used_count + 1 in Python) for comparison; note that SQLite ignores
+FOR UPDATE, so only MySQL shows the legacy lock queue correctly.
+--stripes N runs the claims with striped usage counters (N counter slots,
+as USAGE_COUNTER_STRIPES=N); pending totals are flushed before the check.
+The benchmark rows are deleted afterwards unless --keep.
+
+Usage:
+    python scripts/benchmark_promotion_claims.py
+    python scripts/benchmark_promotion_claims.py --customers 500 --max-usage 300 --concurrency 100
+    python scripts/benchmark_promotion_claims.py --legacy
+    python scripts/benchmark_promotion_claims.py --stripes 16
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from fastapi import HTTPException
+from sqlalchemy import func
+
+from app.api.api_v1.endpoints.customers import claim_promotion
+from app.crud.crud_usage_counters import COUNTER_PROMOTION, usage_counters
+from app.db.session import SessionLocal, engine
+from app.models.models import TblCustomers, TblCustomerVouchers, TblPromotions, TblUsageCounterSlots
+
+
+def legacy_claim_promotion(*, item_id, promotion_id, tenant_id, db):
+    """Previous claim implementation: row lock + read-then-check (same responses)"""
+    p = db.query(TblPromotions).filter(
+        TblPromotions.id == promotion_id,
+        TblPromotions.tenant_id == tenant_id,
+        TblPromotions.deleted == 0
+    ).with_for_update().first()
+    if not p:
+        raise HTTPException(status_code=404, detail="Promotion not found")
+    if p.max_usage is not None and (p.used_count or 0) >= p.max_usage:
+        raise HTTPException(status_code=400, detail="Ưu đãi đã đạt giới hạn lượt nhận")
+    existing = db.query(TblCustomerVouchers).filter(
+        TblCustomerVouchers.customer_id == item_id,
+        TblCustomerVouchers.promotion_id == promotion_id,
+        TblCustomerVouchers.deleted == 0
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Bạn đã lưu ưu đãi này rồi")
+    cv = TblCustomerVouchers(tenant_id=tenant_id, customer_id=item_id, promotion_id=promotion_id,
+                             status='assigned', is_used=False)
+    db.add(cv)
+    p.used_count = (p.used_count or 0) + 1
+    db.add(p)
+    db.commit()
+    db.refresh(cv)
+    return {"customer_voucher_id": cv.id, "promotion_used_count": p.used_count}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def setup(tenant_id, customers, max_usage):
+    """Create the benchmark promotion and customers; returns (promotion_id, customer_ids)"""
+    db = SessionLocal()
+    try:
+        stamp = int(time.time())
+        promotion = TblPromotions(
+            tenant_id=tenant_id,
+            title=f"Benchmark flash campaign {stamp}",
+            status="active",
+            max_usage=max_usage,
+            used_count=0,
+            start_date=datetime.date.today(),
+            created_by="benchmark"
+        )
+        db.add(promotion)
+        rows = [
+            TblCustomers(tenant_id=tenant_id, name=f"Benchmark {stamp}-{i}", created_by="benchmark")
+            for i in range(customers)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return promotion.id, [row.id for row in rows]
+    finally:
+        db.close()
+
+
+def cleanup(promotion_id, customer_ids):
+    db = SessionLocal()
+    try:
+        db.query(TblCustomerVouchers).filter(
+            TblCustomerVouchers.promotion_id == promotion_id
+        ).delete(synchronize_session=False)
+        db.query(TblUsageCounterSlots).filter(
+            TblUsageCounterSlots.counter_type == COUNTER_PROMOTION,
+            TblUsageCounterSlots.counter_id == promotion_id
+        ).delete(synchronize_session=False)
+        db.query(TblCustomers).filter(TblCustomers.id.in_(customer_ids)).delete(synchronize_session=False)
+        db.query(TblPromotions).filter(TblPromotions.id == promotion_id).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def run_benchmark(claim, tenant_id, promotion_id, customer_ids, repeat, concurrency):
+    """Fire every claim through a thread pool; returns (latencies, outcomes, elapsed)"""
+    latencies = []
+    outcomes = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency)
+
+    def one(customer_id):
+        db = SessionLocal()
+        start = time.perf_counter()
+        try:
+            claim(item_id=customer_id, promotion_id=promotion_id, tenant_id=tenant_id, db=db)
+            outcome = "claimed"
+        except HTTPException as e:
+            outcome = {
+                "Ưu đãi đã đạt giới hạn lượt nhận": "limit_reached",
+                "Bạn đã lưu ưu đãi này rồi": "already_claimed"
+            }.get(e.detail, f"http_{e.status_code}")
+        except Exception as e:
+            db.rollback()
+            outcome = type(e).__name__
+        finally:
+            db.close()
+        with lock:
+            latencies.append(time.perf_counter() - start)
+            outcomes[outcome] += 1
+
+    def warm_start(_):
+        # Tất cả thread bắt đầu cùng lúc để dồn claim vào một promotion
+        barrier.wait()
+
+    jobs = [customer_id for customer_id in customer_ids for _ in range(repeat)]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(warm_start, range(concurrency)))
+        started = time.perf_counter()
+        list(executor.map(one, jobs))
+        elapsed = time.perf_counter() - started
+    return latencies, outcomes, elapsed
+
+
+def verify(promotion_id, customers, max_usage):
+    """Over-issuance check; returns True when the final state is consistent"""
+    db = SessionLocal()
+    try:
+        used_count = db.query(TblPromotions.used_count).filter(TblPromotions.id == promotion_id).scalar()
+        live = db.query(func.count(TblCustomerVouchers.id)).filter(
+            TblCustomerVouchers.promotion_id == promotion_id,
+            TblCustomerVouchers.deleted == 0
+        ).scalar()
+        distinct = db.query(func.count(func.distinct(TblCustomerVouchers.customer_id))).filter(
+            TblCustomerVouchers.promotion_id == promotion_id,
+            TblCustomerVouchers.deleted == 0
+        ).scalar()
+    finally:
+        db.close()
+
+    expected = min(customers, max_usage)
+    print(f"🔎 used_count={used_count}, live claims={live}, distinct customers={distinct}, "
+          f"max_usage={max_usage}, expected={expected}")
+    ok = used_count == live == distinct == expected
+    if live > max_usage:
+        print(f"❌ Over-issued {live - max_usage} claim(s)")
+    elif live != distinct:
+        print(f"❌ {live - distinct} duplicate claim(s)")
+    elif not ok:
+        print("❌ used_count and claim rows disagree")
+    else:
+        print("✅ No over-issuance, no duplicates, used_count matches the claims")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent promotion claims")
+    parser.add_argument("--tenant-id", type=int, default=1)
+    parser.add_argument("--customers", type=int, default=300)
+    parser.add_argument("--max-usage", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=2, help="Claims sent per customer (duplicates after the first)")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--legacy", action="store_true", help="Benchmark the previous FOR UPDATE implementation")
+    parser.add_argument("--stripes", type=int, default=0, help="Use striped usage counters with this many slots")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark promotion/customers")
+    args = parser.parse_args()
+
+    claim = legacy_claim_promotion if args.legacy else claim_promotion
+    usage_counters.stripes = 0 if args.legacy else args.stripes
+    if usage_counters.enabled:
+        TblUsageCounterSlots.__table__.create(bind=engine, checkfirst=True)
+    mode = "legacy" if args.legacy else f"striped x{args.stripes}" if usage_counters.enabled else "atomic"
+    total = args.customers * args.repeat
+    print(f"🚀 Promotion claim benchmark ({mode}): {total} claims from "
+          f"{args.customers} customers, max_usage {args.max_usage}, concurrency {args.concurrency}")
+
+    promotion_id, customer_ids = setup(args.tenant_id, args.customers, args.max_usage)
+    try:
+        latencies, outcomes, elapsed = run_benchmark(
+            claim, args.tenant_id, promotion_id, customer_ids, args.repeat, args.concurrency
+        )
+        if usage_counters.enabled:
+            asyncio.run(usage_counters.flush())
+            print(f"🧮 Usage counters: {usage_counters.stats()}")
+        ms = [value * 1000 for value in latencies]
+        print(f"📊 Outcomes: {dict(outcomes)}")
+        print(f"✅ {total} claims in {elapsed:.2f}s")
+        print(f"   - claims/sec: {total / elapsed:.1f}")
+        print(f"   - p50: {percentile(ms, 50):.1f} ms")
+        print(f"   - p99: {percentile(ms, 99):.1f} ms")
+        print(f"   - mean: {statistics.mean(ms):.1f} ms, max: {max(ms):.1f} ms")
+        ok = verify(promotion_id, args.customers, args.max_usage)
+    finally:
+        if not args.keep:
+            cleanup(promotion_id, customer_ids)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
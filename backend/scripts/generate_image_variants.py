@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Backfill responsive image variants (thumb/medium/large, WebP + JPEG) for
+images uploaded before the variant pipeline existed.
+Walks UPLOAD_DIR, skips images whose variants are all present (unless
+--force) and generates the rest on a process pool.
+
+Usage:
+    python scripts/generate_image_variants.py
+    python scripts/generate_image_variants.py --force --workers 4
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.core.image_variants import RASTER_EXTENSIONS, VARIANT_DIR, generate_variants, variant_paths
+
+
+def find_images(upload_dir, force=False):
+    """Uploaded raster images that still need variants"""
+    pending = []
+    for root, dirs, files in os.walk(upload_dir):
+        # Không xử lý lại chính các file variant
+        dirs[:] = [d for d in dirs if d != VARIANT_DIR]
+        for name in files:
+            if os.path.splitext(name)[1].lower() not in RASTER_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            if force or not all(os.path.exists(p) for p in variant_paths(path)):
+                pending.append(path)
+    return pending
+
+
+def generate_all(upload_dir, workers, force=False):
+    images = find_images(upload_dir, force=force)
+    if not images:
+        print("✅ All uploaded images already have variants")
+        return 0, 0
+
+    print(f"🖼️  Generating variants for {len(images)} image(s) with {workers} worker(s)...")
+    done = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(generate_variants, path): path for path in images}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result = future.result()
+                done += 1
+                print(f"   ✅ {path} ({result['width']}x{result['height']})")
+            except Exception as e:
+                failed += 1
+                print(f"   ❌ {path}: {str(e)}")
+
+    print(f"✅ Generated variants for {done} image(s), {failed} failed")
+    return done, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate image variants for existing uploads")
+    parser.add_argument("--upload-dir", default=settings.UPLOAD_DIR)
+    parser.add_argument("--workers", type=int, default=settings.IMAGE_PROCESS_WORKERS)
+    parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist")
+    args = parser.parse_args()
+
+    print(f"🚀 Scanning {args.upload_dir}...")
+    generate_all(args.upload_dir, args.workers, force=args.force)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Index advisor: runs EXPLAIN over the queries issued by the CRUD layer and the
+dashboards and flags full table scans and filesorts.
+
+The queries are captured by actually calling the CRUD/dashboard functions, so
+the advisor follows the code instead of a hand-maintained list of SQL.
+With --seed N a throwaway tenant with N bookings/customers (and proportional
+rooms, services, vouchers, ...) is inserted first; everything runs inside one
+transaction that is rolled back at the end, so the database is left untouched.
+
+Usage:
+    python scripts/index_advisor.py                  # use existing data (first tenant)
+    python scripts/index_advisor.py --seed 5000      # seed a temporary tenant
+    python scripts/index_advisor.py --tenant-id 3
+
+Exit code is 1 when at least one full table scan was found.
+"""
+
+import sys
+import os
+import argparse
+import re
+import uuid
+from datetime import datetime, timedelta
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.session_local import engine
+from app.models.models import (
+    TblBookingRequests, TblCustomers, TblCustomerVouchers, TblFacilities,
+    TblPromotions, TblRooms, TblRoomStays, TblServices, TblTenants, TblVouchers
+)
+from app.crud.crud_booking_requests import booking_request
+from app.crud.crud_customers import customer
+from app.crud.crud_customer_vouchers import customer_voucher
+from app.crud.crud_dashboard import dashboard
+from app.crud.crud_promotions import promotion
+from app.crud.crud_rooms import room
+from app.crud.crud_services import service
+from app.crud.crud_tenant_stats import tenant_stats
+
+def known_queries(db, tenant_id):
+    """(name, callable) pairs covering the list endpoints and dashboards"""
+    now = datetime.now()
+    start, previous_start = now - timedelta(days=30), now - timedelta(days=60)
+    return [
+        ("rooms list", lambda: room.get_multi(db, tenant_id=tenant_id, limit=20)),
+        ("services list", lambda: service.get_multi(db, tenant_id=tenant_id, limit=20)),
+        ("customers list", lambda: customer.get_multi(db, tenant_id=tenant_id, skip=1000, limit=20)),
+        ("customers cursor (created_at)", lambda: customer.get_page(db, tenant_id=tenant_id, limit=20, order_by="created_at")),
+        ("bookings list", lambda: booking_request.get_multi(db, tenant_id=tenant_id, skip=1000, limit=20)),
+        ("bookings cursor (created_at)", lambda: booking_request.get_page(db, tenant_id=tenant_id, limit=20, order_by="created_at")),
+        ("bookings by status", lambda: booking_request.get_by_status(db, status="pending", tenant_id=tenant_id)),
+        ("bookings by customer", lambda: booking_request.get_by_customer(db, customer_id=1, tenant_id=tenant_id)),
+        ("active promotions", lambda: promotion.get_active_promotions(db, tenant_id=tenant_id)),
+        ("customer vouchers list", lambda: customer_voucher.get_multi(db, tenant_id=tenant_id, limit=20)),
+        ("customer management (stats)", lambda: customer.get_multi_with_stats(db, tenant_id=tenant_id, sort_by="total_spent")),
+        ("dashboard booking summary", lambda: dashboard.get_booking_summary(
+            db, tenant_id=tenant_id, start_date=start, end_date=now, previous_start=previous_start)),
+        ("dashboard daily bookings", lambda: dashboard.get_daily_bookings(db, tenant_id=tenant_id)),
+        ("dashboard customer summary", lambda: dashboard.get_customer_summary(
+            db, tenant_id=tenant_id, start_date=start, end_date=now, previous_start=previous_start)),
+        ("dashboard room types", lambda: dashboard.get_room_type_counts(db, tenant_id=tenant_id)),
+        ("dashboard catalog summary", lambda: dashboard.get_catalog_summary(db, tenant_id=tenant_id)),
+        ("dashboard recent bookings", lambda: dashboard.get_recent_bookings(db, tenant_id=tenant_id)),
+        ("tenant stats rebuild", lambda: tenant_stats.count_from_source(db, tenant_id=tenant_id)),
+    ]
+
+def seed(db, size):
+    """Insert a temporary tenant with synthetic data (rolled back by the caller)"""
+    tenant = TblTenants(name="Index advisor", domain=f"index-advisor-{uuid.uuid4().hex[:12]}")
+    db.add(tenant)
+    db.flush()
+
+    now = datetime.now()
+    statuses = ["pending", "confirmed", "cancelled", "requested", "completed"]
+    rooms = max(size // 50, 5)
+    db.add_all([
+        TblRooms(tenant_id=tenant.id, room_type=f"Type {i % 4}", room_name=f"Room {i}")
+        for i in range(rooms)
+    ])
+    db.add_all([TblServices(tenant_id=tenant.id, service_name=f"Service {i}") for i in range(max(size // 100, 5))])
+    db.add_all([TblFacilities(tenant_id=tenant.id, facility_name=f"Facility {i}") for i in range(max(size // 100, 5))])
+    db.add_all([
+        TblPromotions(tenant_id=tenant.id, title=f"Promotion {i}", status="active" if i % 2 else "inactive")
+        for i in range(max(size // 100, 5))
+    ])
+    db.add_all([
+        TblVouchers(tenant_id=tenant.id, code=f"ADV{i}", status="active" if i % 2 else "expired")
+        for i in range(max(size // 100, 5))
+    ])
+    db.add_all([
+        TblCustomers(tenant_id=tenant.id, name=f"Customer {i}", phone=f"09{i:08d}", created_at=now - timedelta(minutes=i))
+        for i in range(size)
+    ])
+    db.flush()
+
+    first_customer = db.query(TblCustomers.id).filter(TblCustomers.tenant_id == tenant.id).order_by(TblCustomers.id).first()[0]
+    db.add_all([
+        TblBookingRequests(
+            tenant_id=tenant.id,
+            customer_id=first_customer + (i % size),
+            booking_date=now,
+            check_in_date=now + timedelta(days=i % 60),
+            check_out_date=now + timedelta(days=i % 60 + 2),
+            status=statuses[i % len(statuses)],
+            created_at=now - timedelta(minutes=i * 7)
+        )
+        for i in range(size)
+    ])
+    db.add_all([
+        TblCustomerVouchers(tenant_id=tenant.id, customer_id=first_customer + (i % size))
+        for i in range(size // 2)
+    ])
+    db.add_all([
+        TblRoomStays(
+            tenant_id=tenant.id,
+            customer_id=first_customer + (i % size),
+            checkin_date=now,
+            checkout_date=now + timedelta(days=1),
+            total_amount=100
+        )
+        for i in range(size // 2)
+    ])
+    db.flush()
+    return tenant.id
+
+def explain(connection, statement, parameters):
+    """Return (plan lines, full scan tables, warnings) for one captured statement"""
+    full_scans, warnings, lines = [], [], []
+
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+        for row in rows:
+            detail = row[-1]
+            lines.append(detail)
+            match = re.match(r"SCAN (?:TABLE )?(\w+)(.*)", detail)
+            if match and "USING" not in match.group(2):
+                full_scans.append(match.group(1))
+            if "USE TEMP B-TREE" in detail:
+                warnings.append(detail)
+    else:
+        result = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+        keys = list(result.keys())
+        for row in result.fetchall():
+            plan = dict(zip(keys, row))
+            table, access = plan.get("table"), plan.get("type")
+            lines.append(f"{table}: type={access} key={plan.get('key')} rows={plan.get('rows')} extra={plan.get('Extra')}")
+            if access == "ALL" and table and not str(table).startswith("<"):
+                full_scans.append(table)
+            if plan.get("Extra") and "filesort" in plan["Extra"]:
+                warnings.append(f"{table}: {plan['Extra']}")
+
+    return lines, full_scans, warnings
+
+def run_advisor(tenant_id=None, seed_size=0, verbose=False):
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection)
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    try:
+        if seed_size:
+            print(f"🌱 Seeding temporary tenant with {seed_size} bookings/customers...")
+            tenant_id = seed(db, seed_size)
+        elif tenant_id is None:
+            first = db.query(TblTenants.id).order_by(TblTenants.id).first()
+            if not first:
+                print("❌ No tenant found - use --seed N or --tenant-id")
+                return 1
+            tenant_id = first[0]
+
+        print(f"🔍 Analysing queries for tenant {tenant_id} ({connection.dialect.name})\n")
+        total_scans = 0
+
+        for name, run in known_queries(db, tenant_id):
+            captured.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                run()
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+
+            statements = list(captured)
+            for statement, parameters in statements:
+                lines, full_scans, warnings = explain(connection, statement, parameters)
+                total_scans += len(full_scans)
+                status = "❌" if full_scans else ("⚠️" if warnings else "✅")
+                print(f"{status} {name}")
+                for table in full_scans:
+                    print(f"   - FULL SCAN on {table}")
+                for warning in warnings:
+                    print(f"   - {warning}")
+                if verbose or full_scans:
+                    for line in lines:
+                        print(f"     {line}")
+
+        print()
+        if total_scans:
+            print(f"❌ {total_scans} full table scan(s) found")
+            return 1
+        print("✅ No full table scans found")
+        return 0
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the CRUD/dashboard queries and flag full scans")
+    parser.add_argument("--tenant-id", type=int, default=None, help="Tenant to analyse (default: first tenant)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed a temporary tenant with N rows (rolled back)")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every query")
+    args = parser.parse_args()
+
+    print("🚀 Running index advisor...")
+    sys.exit(run_advisor(tenant_id=args.tenant_id, seed_size=args.seed, verbose=args.verbose))
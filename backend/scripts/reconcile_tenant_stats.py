@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Reconcile tbl_tenant_stats from the source tables.
+Creates the table if it does not exist, rebuilds the counters of every tenant
+(or only the tenant ids given as arguments) and reports any drift that was fixed.
+
+Usage:
+    python scripts/reconcile_tenant_stats.py          # all tenants
+    python scripts/reconcile_tenant_stats.py 1 2 5    # selected tenants
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.session import SessionLocal, engine
+from app.models.models import TblTenantStats
+from app.crud.crud_tenant_stats import tenant_stats
+
+def reconcile_tenant_stats(tenant_ids=None):
+    """Rebuild tenant statistics and print the counters that drifted"""
+    TblTenantStats.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        drift = tenant_stats.reconcile(db, tenant_ids=tenant_ids)
+
+        if not drift:
+            print("✅ All tenant statistics are in sync")
+            return drift
+
+        for item in drift:
+            print(f"🔧 Tenant {item['tenant_id']}:")
+            for column, (old, new) in item["changes"].items():
+                print(f"   - {column}: {old} -> {new}")
+        print(f"✅ Reconciled {len(drift)} tenant(s)")
+        return drift
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reconciling tenant stats: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    ids = [int(arg) for arg in sys.argv[1:]] or None
+    print("🚀 Reconciling tenant statistics...")
+    reconcile_tenant_stats(ids)
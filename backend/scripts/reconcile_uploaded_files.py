@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Reconcile tbl_uploaded_files with the files in UPLOAD_DIR.
+Creates the table if it does not exist, indexes files that have no row
+(e.g. uploaded before the index existed), refreshes changed files and soft
+deletes rows whose file is gone from disk.
+
+Usage:
+    python scripts/reconcile_uploaded_files.py
+    python scripts/reconcile_uploaded_files.py /path/to/uploads
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.models import TblUploadedFiles
+from app.crud.crud_uploaded_files import uploaded_file
+
+def reconcile_uploaded_files(upload_dir=None):
+    """Rescan the upload directory and print what changed in the index"""
+    upload_dir = upload_dir or settings.UPLOAD_DIR
+    TblUploadedFiles.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        summary = uploaded_file.reconcile(db, upload_dir)
+
+        if not any(summary.values()):
+            print("✅ Upload index is in sync with disk")
+            return summary
+
+        print(f"🔧 Added: {summary['added']}")
+        print(f"🔧 Restored: {summary['restored']}")
+        print(f"🔧 Updated: {summary['updated']}")
+        print(f"🔧 Removed (file missing): {summary['removed']}")
+        print("✅ Upload index reconciled")
+        return summary
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reconciling upload index: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+    print("🚀 Reconciling uploaded files index...")
+    reconcile_uploaded_files(directory)
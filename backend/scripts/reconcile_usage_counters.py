@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Reconcile promotion/voucher used_count with the striped usage counter slots.
+Creates tbl_usage_counter_slots if it does not exist (run once before setting
+USAGE_COUNTER_STRIPES), then writes the sum of every counter's slots into the
+used_count column and reports any drift that was fixed.
+
+To switch striped counters off: set USAGE_COUNTER_STRIPES=0, restart the
+workers (they flush their pending totals on shutdown), then run with --reset
+to fold the slots in one last time and delete them.
+
+Usage:
+    python scripts/reconcile_usage_counters.py
+    python scripts/reconcile_usage_counters.py --reset
+"""
+
+import argparse
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.session import SessionLocal, engine
+from app.models.models import TblUsageCounterSlots
+from app.crud.crud_usage_counters import usage_counters
+
+def reconcile_usage_counters(reset=False):
+    """Fold slot totals into used_count and print the counters that drifted"""
+    TblUsageCounterSlots.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        drift = usage_counters.reconcile(db, reset=reset)
+
+        for item in drift:
+            print(f"🔧 {item['counter_type']} {item['counter_id']}: used_count {item['before']} -> {item['after']}")
+        if reset:
+            print("🧹 Deleted all usage counter slots")
+        print(f"✅ Reconciled usage counters ({len(drift)} drifted)")
+        return drift
+
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error reconciling usage counters: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold striped usage counter slots into used_count")
+    parser.add_argument("--reset", action="store_true", help="Delete the slots afterwards (after USAGE_COUNTER_STRIPES=0)")
+    args = parser.parse_args()
+
+    print("🚀 Reconciling usage counters...")
+    reconcile_usage_counters(reset=args.reset)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Zalo Graph / Open API, for testing the shared
+upstream HTTP client without calling graph.zalo.me.
+
+Serves:
+    GET /v2.0/me/info   phone lookup (headers access_token, code, secret_key);
+                        code "expired" returns a Zalo error payload
+    GET /               connectivity check (ZALO_OPENAPI_BASE_URL)
+
+Fault injection: --fail-first N answers the first N requests with 503,
+--fail-rate answers a random share with 503, --delay sleeps before each
+response. The server counts TCP connections so keep-alive reuse is visible.
+
+Point the backend at it with:
+    ZALO_GRAPH_BASE_URL=http://127.0.0.1:8765 ZALO_OPENAPI_BASE_URL=http://127.0.0.1:8765
+
+Usage:
+    python scripts/zalo_stub_server.py --port 8765
+    python scripts/zalo_stub_server.py --port 8765 --fail-rate 0.2 --delay 0.05
+    python scripts/zalo_stub_server.py --check     # run the client checks against the stub
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+STUB_PHONE_NUMBER = "84987654321"
+
+
+class StubState:
+    def __init__(self, fail_first=0, fail_rate=0.0, delay=0.0):
+        self.fail_first = fail_first
+        self.fail_rate = fail_rate
+        self.delay = delay
+        self.requests = 0
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class ZaloStubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 để client giữ được connection keep-alive
+    protocol_version = "HTTP/1.1"
+    # Header và body được ghi riêng: tắt Nagle để không bị delayed ACK ~40ms
+    disable_nagle_algorithm = True
+    state: StubState = None
+
+    def handle(self):
+        # Được gọi một lần cho mỗi TCP connection
+        with self.state.lock:
+            self.state.connections += 1
+        super().handle()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            failing = state.requests <= state.fail_first or random.random() < state.fail_rate
+        if state.delay:
+            time.sleep(state.delay)
+        if failing:
+            self._send_json(503, {"error": -1, "message": "Service temporarily unavailable (stub)"})
+            return
+
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self._send_json(200, {"message": "Zalo stub server"})
+        elif path == "/v2.0/me/info":
+            if not (self.headers.get("access_token") and self.headers.get("code") and self.headers.get("secret_key")):
+                self._send_json(200, {"error": -124, "message": "Missing access_token, code or secret_key"})
+            elif self.headers.get("code") == "expired":
+                self._send_json(200, {"error": -2002, "message": "Code is expired"})
+            else:
+                self._send_json(200, {"data": {"number": STUB_PHONE_NUMBER}, "error": 0, "message": "Success"})
+        else:
+            self._send_json(404, {"error": 404, "message": "Not found"})
+
+
+class StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Client đóng connection giữa chừng (timeout phía client) là bình thường
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def start_stub_server(host="127.0.0.1", port=0, **state_options):
+    """Start the stub in a background thread; returns (server, state, base_url)"""
+    state = StubState(**state_options)
+    handler = type("BoundZaloStubHandler", (ZaloStubHandler,), {"state": state})
+    server = StubHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://{host}:{server.server_address[1]}"
+
+
+async def run_checks():
+    """Exercise UpstreamHTTPClient against the stub: keep-alive, retries, timeouts, metrics"""
+    import httpx
+    from app.core.http_client import UpstreamHTTPClient
+
+    headers = {"access_token": "stub-access-token", "code": "stub-code", "secret_key": "stub-secret"}
+    failed = 0
+
+    def check(name, ok, detail=""):
+        nonlocal failed
+        if not ok:
+            failed += 1
+        print(f"   {'✅' if ok else '❌'} {name}{f' ({detail})' if detail else ''}")
+
+    # 1. Keep-alive: 50 lookup tuần tự chỉ dùng 1 connection
+    server, state, base_url = start_stub_server()
+    client = UpstreamHTTPClient(retries=0)
+    await client.start()
+    start = time.perf_counter()
+    for _ in range(50):
+        response = await client.get(f"{base_url}/v2.0/me/info", endpoint="zalo_me_info", headers=headers)
+    pooled_ms = (time.perf_counter() - start) * 1000
+    check("pooled client reuses connections", state.connections == 1,
+          f"{state.connections} connection(s) for 50 requests, {pooled_ms:.1f}ms")
+    check("phone lookup", response.json()["data"]["number"] == STUB_PHONE_NUMBER)
+
+    # So sánh với client mới cho mỗi request (cách cũ)
+    connections_before = state.connections
+    start = time.perf_counter()
+    for _ in range(50):
+        async with httpx.AsyncClient() as fresh:
+            await fresh.get(f"{base_url}/v2.0/me/info", headers=headers)
+    fresh_ms = (time.perf_counter() - start) * 1000
+    print(f"   ℹ️  client per request: {state.connections - connections_before} connection(s), {fresh_ms:.1f}ms")
+    await client.close()
+    server.shutdown()
+
+    # 2. Retry: 2 lần 503 rồi thành công
+    server, state, base_url = start_stub_server(fail_first=2)
+    client = UpstreamHTTPClient(retries=2, backoff_base=0.01)
+    response = await client.get(f"{base_url}/v2.0/me/info", endpoint="zalo_me_info", headers=headers)
+    stats = client.stats()["endpoints"]["zalo_me_info"]
+    check("retries 503 with backoff", response.status_code == 200 and stats["retries"] == 2,
+          f"attempts={stats['attempts']} errors={stats['errors']}")
+    await client.close()
+    server.shutdown()
+
+    # 3. Hết lượt retry: trả về response 503 cuối cùng
+    server, state, base_url = start_stub_server(fail_first=10)
+    client = UpstreamHTTPClient(retries=1, backoff_base=0.01)
+    response = await client.get(f"{base_url}/", endpoint="zalo_openapi_ping")
+    stats = client.stats()["endpoints"]["zalo_openapi_ping"]
+    check("gives up after retries", response.status_code == 503 and stats["attempts"] == 2 and stats["failures"] == 1)
+    await client.close()
+    server.shutdown()
+
+    # 4. Timeout mỗi lần thử
+    server, state, base_url = start_stub_server(delay=0.3)
+    client = UpstreamHTTPClient(retries=1, backoff_base=0.01)
+    start = time.perf_counter()
+    try:
+        await client.get(f"{base_url}/", endpoint="zalo_openapi_ping", timeout=0.1)
+        timed_out = False
+    except httpx.TimeoutException:
+        timed_out = True
+    elapsed = time.perf_counter() - start
+    stats = client.stats()["endpoints"]["zalo_openapi_ping"]
+    check("per-attempt timeout", timed_out and stats["errors"].get("timeout") == 2 and elapsed < 0.5,
+          f"{elapsed * 1000:.0f}ms for 2 attempts")
+    await client.close()
+    server.shutdown()
+
+    # 5. Lỗi kết nối (không có server)
+    client = UpstreamHTTPClient(retries=1, backoff_base=0.01)
+    try:
+        await client.get("http://127.0.0.1:9/", endpoint="unreachable")
+        connect_failed = False
+    except httpx.ConnectError:
+        connect_failed = True
+    stats = client.stats()["endpoints"]["unreachable"]
+    check("connect errors are retried and counted", connect_failed and stats["errors"].get("connect") == 2)
+    await client.close()
+
+    print(f"{'✅ All checks passed' if not failed else f'❌ {failed} check(s) failed'}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in server for the Zalo Graph API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-first", type=int, default=0, help="Answer the first N requests with 503")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--check", action="store_true", help="Run the HTTP client checks against the stub and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        print("🚀 Running upstream HTTP client checks against the Zalo stub...")
+        sys.exit(0 if asyncio.run(run_checks()) else 1)
+
+    server, state, base_url = start_stub_server(
+        args.host, args.port, fail_first=args.fail_first, fail_rate=args.fail_rate, delay=args.delay
+    )
+    print(f"🚀 Zalo stub server listening on {base_url}")
+    print(f"   ZALO_GRAPH_BASE_URL={base_url} ZALO_OPENAPI_BASE_URL={base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\n✅ Stopped after {state.requests} request(s) on {state.connections} connection(s)")
+        server.shutdown()